@@ -2,16 +2,25 @@ import { NextRequest, NextResponse } from 'next/server';
 
 export async function POST(req: NextRequest) {
   try {
-    const body = await req.json();
-    
+    // Pass the body through unchanged: base64 frames in JSON, or raw frames as
+    // application/octet-stream or multipart/form-data with the session and
+    // question in X-Session-Id / X-Question-Idx headers or the query string
+    const headers: Record<string, string> = {
+      'Content-Type': req.headers.get('content-type') ?? 'application/json',
+    };
+    for (const name of ['x-session-id', 'x-question-idx']) {
+      const value = req.headers.get(name);
+      if (value !== null) {
+        headers[name] = value;
+      }
+    }
+
     console.log('Forwarding frame processing request to Flask backend...');
     // Forward the request to the enhanced Flask backend
-    const response = await fetch('http://localhost:5001/api/interview/process-frame', {
+    const response = await fetch(`http://localhost:5001/api/interview/process-frame${req.nextUrl.search}`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify(body),
+      headers,
+      body: await req.arrayBuffer(),
     });
     
     if (!response.ok) {
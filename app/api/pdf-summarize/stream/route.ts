@@ -0,0 +1,43 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+export async function POST(req: NextRequest) {
+  try {
+    // Get the form data from the request
+    const formData = await req.formData();
+
+    console.log('Received request in streaming proxy API route');
+
+    // Forward the request to the Flask backend's Server-Sent Events endpoint
+    const response = await fetch('http://localhost:5000/api/summarize/stream', {
+      method: 'POST',
+      body: formData,
+    });
+
+    console.log('Flask API response status:', response.status);
+
+    // If the response is not OK, throw an error
+    if (!response.ok || !response.body) {
+      const errorText = await response.text();
+      console.error('Error from Flask API:', errorText);
+      return NextResponse.json(
+        { error: `Failed to summarize PDF: ${errorText}` },
+        { status: response.status }
+      );
+    }
+
+    // Pass the event stream through as it arrives instead of buffering it
+    return new Response(response.body, {
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+      },
+    });
+  } catch (error) {
+    console.error('Error in streaming proxy API route:', error);
+    return NextResponse.json(
+      { error: `Internal server error: ${error instanceof Error ? error.message : String(error)}` },
+      { status: 500 }
+    );
+  }
+}
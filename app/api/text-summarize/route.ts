@@ -15,17 +15,19 @@ export async function POST(req: NextRequest) {
       );
     }
     
-    // Forward the request to the Flask backend
-    const response = await fetch('http://localhost:5000/api/summarize-text', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        text: body.text,
-        summary_length: body.summary_length || 5
-      }),
-    });
+    // Forward the text to the Flask backend as a plain-text body so it can
+    // be split and counted while it streams in
+    const summaryLength = body.summary_length || 5;
+    const response = await fetch(
+      `http://localhost:5000/api/summarize-text?summary_length=${encodeURIComponent(summaryLength)}`,
+      {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'text/plain; charset=utf-8',
+        },
+        body: body.text,
+      }
+    );
     
     console.log('Flask API response status:', response.status);
     
@@ -58,8 +60,8 @@ export async function POST(req: NextRequest) {
     const data = await response.json();
     console.log('Received data from Flask API');
     
-    // Return the response data
-    return NextResponse.json(data);
+    // The plain-text endpoint does not echo the text back
+    return NextResponse.json({ original_text: body.text, ...data });
   } catch (error) {
     console.error('Error in text summarize API route:', error);
     
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from instrumentation import metrics, stage
+
+logger = logging.getLogger(__name__)
+
+# Kinds of chunk to analyse; also the first byte of a streamed binary message
+VIDEO = 1
+AUDIO = 2
+KIND_NAMES = {VIDEO: 'video', AUDIO: 'audio'}
+
+# Seconds between looks at the session store while waiting for chunks queued by other processes
+PENDING_POLL_INTERVAL = 0.05
+
+class AnalysisPool:
+    """Bounded pool of worker threads analysing interview frames and audio chunks in the background
+
+    analyzers maps VIDEO and AUDIO to functions taking the chunk and
+    returning {metric: score}; the scores are recorded on the question in
+    the session store as each chunk finishes. Each session has a queue per
+    kind holding at most limits[kind] waiting chunks. A chunk arriving at a
+    full queue displaces the oldest, which is stale anyway: a session only
+    keeps a question's latest scores. A queue's chunks are analysed one at
+    a time in order, and queues with work take turns, so a busy session
+    cannot hold every worker.
+
+    Queues belong to one process, but each chunk is also counted in its
+    session's pending counts in the store until it is analysed or
+    displaced, so wait covers chunks queued by every server process that
+    shares the store.
+    """
+
+    def __init__(self, sessions, analyzers, limits, workers=8):
+        if workers < 1:
+            raise ValueError(f"An analysis pool needs at least one worker, not {workers}")
+        for kind, limit in limits.items():
+            if limit < 1:
+                raise ValueError(f"At least one waiting {KIND_NAMES[kind]} chunk must be allowed, not {limit}")
+
+        self.sessions = sessions
+        self.analyzers = analyzers
+        self.limits = limits
+        self.workers = workers
+
+        self._queues = {}  # (session_id, kind) -> deque of (question_idx, chunk, callback) waiting
+        self._running = set()  # (session_id, kind) of chunks being analysed
+        self._ready = deque()  # (session_id, kind) with chunks waiting and none running
+        self._outstanding = Counter()  # (session_id, question_idx) -> chunks waiting or running
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def submit(self, session_id, question_idx, kind, chunk, callback=None):
+        """Queue a chunk; returns 1 if it displaced an older waiting chunk, else 0
+
+        callback(kind, question_idx, scores, error), if given, is called
+        from a worker thread once the chunk is analysed, with either the
+        scores or an error message. A displaced chunk gets no callback.
+        """
+        key = (session_id, kind)
+        # Counted before it is queued, so a worker can never uncount it first
+        self.sessions.update(session_id, lambda session: session.add_pending(question_idx, 1))
+        with self._condition:
+            self._start_workers()
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque(maxlen=self.limits[kind])
+            idle = not queue and key not in self._running
+            displaced = None
+            if len(queue) == queue.maxlen:
+                displaced = queue[0][0]
+                self._finished(session_id, displaced)
+                metrics.add('interview_analysis_chunks_total', (('kind', KIND_NAMES[kind]), ('result', 'dropped')))
+            queue.append((question_idx, chunk, callback))
+            self._outstanding[(session_id, question_idx)] += 1
+            if idle:
+                self._ready.append(key)
+            self._condition.notify_all()
+        if displaced is None:
+            return 0
+        self.sessions.update(session_id, lambda session: session.add_pending(displaced, -1))
+        return 1
+
+    def wait(self, session_id, question_idx, timeout=None):
+        """Wait until no chunk of the question is queued or being analysed in any process; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if not self._condition.wait_for(lambda: (session_id, question_idx) not in self._outstanding, timeout):
+                return False
+        # Chunks queued by other processes sharing the store
+        while True:
+            session = self.sessions.get(session_id)
+            if session is None or not session.pending_chunks(question_idx):
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(PENDING_POLL_INTERVAL if remaining is None else min(PENDING_POLL_INTERVAL, remaining))
+
+    def pending_count(self):
+        with self._condition:
+            return sum(self._outstanding.values())
+
+    def _finished(self, session_id, question_idx):
+        # Called with the condition held
+        key = (session_id, question_idx)
+        self._outstanding[key] -= 1
+        if self._outstanding[key] <= 0:
+            del self._outstanding[key]
+            self._condition.notify_all()
+
+    def _start_workers(self):
+        # Called with the condition held; workers start with the first chunk
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"analysis-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_chunk(self):
+        with self._condition:
+            while not self._ready:
+                self._condition.wait()
+            session_id, kind = key = self._ready.popleft()
+            self._running.add(key)
+            return (session_id, kind) + self._queues[key].popleft()
+
+    def _work(self):
+        while True:
+            session_id, kind, question_idx, chunk, callback = self._next_chunk()
+            scores = error = None
+            try:
+                with stage('frame_analysis' if kind == VIDEO else 'audio_analysis'):
+                    scores = self.analyzers[kind](chunk)
+            except Exception as e:
+                logger.exception("Error analyzing %s: %s", KIND_NAMES[kind], e)
+                error = str(e)
+
+            # Store the communication scores and the last activity timestamp,
+            # and uncount the chunk whether or not it was analysed
+            def record(session):
+                nonlocal error
+                session.add_pending(question_idx, -1)
+                if error is not None:
+                    return
+                try:
+                    session.touch()
+                    if kind == VIDEO:
+                        session.record_video(question_idx, scores)
+                    else:
+                        session.record_audio(question_idx, scores)
+                except Exception as e:
+                    logger.exception("Error recording %s scores: %s", KIND_NAMES[kind], e)
+                    error = str(e)
+
+            try:
+                if not self.sessions.update(session_id, record):
+                    error = 'Invalid or expired session ID'
+            except Exception as e:
+                logger.exception("Error recording %s scores: %s", KIND_NAMES[kind], e)
+                error = str(e)
+            metrics.add('interview_analysis_chunks_total',
+                        (('kind', KIND_NAMES[kind]), ('result', 'failed' if error else 'analyzed')))
+
+            with self._condition:
+                key = (session_id, kind)
+                self._running.discard(key)
+                if self._queues[key]:
+                    self._ready.append(key)
+                else:
+                    del self._queues[key]
+                self._finished(session_id, question_idx)
+
+            if callback is not None:
+                try:
+                    callback(kind, question_idx, None if error else scores, error)
+                except Exception as e:
+                    logger.warning("Error delivering %s scores: %s", KIND_NAMES[kind], e)
@@ -1,17 +1,43 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import PyPDF2
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.cluster.util import cosine_distance
 import numpy as np
-import networkx as nx
+import contextlib
+import hashlib
+import json
 import os
-from werkzeug.utils import secure_filename
+import queue
+import tempfile
+import threading
+import time
+import tracemalloc
+from scipy import sparse
+from batch import DEFAULT_MAX_MEMBER_BYTES, iter_batch_items, iter_batch_results
+from disk_store import MappedTermMatrixBuilder, SentenceStore, mapped_pagerank, mapped_similarity_graph
+from incremental import DocumentState, DocumentStateCache, match_sentences, update_similarity_matrix, warm_start_scores
+from instrumentation import instrument, record_cache, register_gauge, stage
+from jobs import CANCELLED, FINISHED_STATES, JobQueue, MemoryJobStore, QueueFull, SQLiteJobStore
+from nltk_resources import get_sentence_tokenizer, get_stop_words, get_word_tokenizer
+from pdf_extract import iter_pdf_pages, page_fingerprints
+from structured_logging import configure_logging
+from summary_cache import SummaryCache, hash_source, hash_stream, summary_key, text_key
+from upload_buffer import SpooledUploadRequest, pdf_source
+from text_stream import iter_sentence_batches, iter_text_chunks
+from tokenization import tokenize_sentences_words, without_stop_words
+from textrank import (TermMatrixBuilder, build_term_matrix, cosine_similarity_matrix, frequency_scores, pagerank,
+                      sparse_similarity_graph)
+
+# JSON-lines logs, written by a background thread
+logger = configure_logging('app')
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=['X-Cache', 'X-Cache-Text', 'Server-Timing', 'X-Profile-File'])  # Enable CORS for all routes
+
+# Stage timers, request metrics and opt-in profiling; Prometheus metrics at /metrics
+instrument(app)
+
+# Parse uploads from memory; only very large ones spill to a unique temp file
+app.request_class = SpooledUploadRequest
+app.config['UPLOAD_MAX_MEMORY'] = int(os.environ.get('UPLOAD_MAX_MEMORY', 16 << 20))
 
 # Create upload folder if it doesn't exist
 UPLOAD_FOLDER = 'uploads'
@@ -19,115 +45,280 @@ if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Download NLTK resources
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-
-    # Verify that the resources are available
-    from nltk.tokenize import word_tokenize
-    word_tokenize("Test sentence.")
-    from nltk.corpus import stopwords
-    stopwords.words('english')
-
-    print("NLTK resources successfully loaded.")
-except Exception as e:
-    print(f"Error loading NLTK resources: {e}")
-    print("Downloading additional NLTK resources...")
-    nltk.download('all', quiet=True)  # Download all NLTK resources as a fallback
-
-def extract_text_from_pdf(pdf_file_path):
-    """Extract text from PDF file"""
-    with open(pdf_file_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page_num in range(len(pdf_reader.pages)):
-            text += pdf_reader.pages[page_num].extract_text()
-    return text
+# PageRank settings; PAGERANK_BACKEND is 'native' (default), 'networkx' or
+# 'compare' (run both and log the largest score difference). The last two
+# need networkx installed.
+app.config['PAGERANK_BACKEND'] = os.environ.get('PAGERANK_BACKEND', 'native')
+app.config['PAGERANK_DAMPING'] = float(os.environ.get('PAGERANK_DAMPING', 0.85))
+app.config['PAGERANK_TOL'] = float(os.environ.get('PAGERANK_TOL', 1.0e-6))
+app.config['PAGERANK_MAX_ITER'] = int(os.environ.get('PAGERANK_MAX_ITER', 100))
+
+# Documents with at least SPARSE_MODE_MIN_SENTENCES sentences are ranked on a
+# sparse graph that keeps each sentence's SPARSE_TOP_K strongest neighbours
+# (0 keeps every neighbour) above SPARSE_SIMILARITY_THRESHOLD, instead of the
+# dense n x n similarity matrix
+app.config['SPARSE_MODE_MIN_SENTENCES'] = int(os.environ.get('SPARSE_MODE_MIN_SENTENCES', 2000))
+app.config['SPARSE_TOP_K'] = int(os.environ.get('SPARSE_TOP_K', 20))
+app.config['SPARSE_SIMILARITY_THRESHOLD'] = float(os.environ.get('SPARSE_SIMILARITY_THRESHOLD', 0.0))
+
+# Documents that would need more than SUMMARY_MAX_MEMORY bytes to rank in
+# memory are ranked in disk mode: their sentences, term matrix and
+# similarity graph move to memory-mapped files under UPLOAD_FOLDER and are
+# read in windows sized from this budget. The disk-mode graph ignores terms
+# found in more than DISK_MODE_MAX_TERM_SENTENCES sentences (0 keeps every
+# term), which keeps building it roughly linear in the document's length.
+# This is an approximation of sparse mode: the ignored terms are left out of
+# every cosine similarity, so pairs sharing only such terms get no edge and
+# the other similarities shift. Documents without such terms are ranked
+# exactly as in sparse mode.
+app.config['SUMMARY_MAX_MEMORY'] = int(os.environ.get('SUMMARY_MAX_MEMORY', 512 << 20))
+app.config['DISK_MODE_MAX_TERM_SENTENCES'] = int(os.environ.get('DISK_MODE_MAX_TERM_SENTENCES', 1000))
+
+# Summaries are cached by the SHA-256 of the uploaded PDF, in memory and
+# under uploads/cache. Bump ALGORITHM_VERSION or TEXT_VERSION whenever a
+# change alters summaries or extracted text so stale entries are not reused.
+ALGORITHM_VERSION = 'textrank-1'
+TEXT_VERSION = 'pdf-text-1'
+app.config['SUMMARY_CACHE_MEMORY_BYTES'] = int(os.environ.get('SUMMARY_CACHE_MEMORY_BYTES', 64 << 20))
+app.config['SUMMARY_CACHE_DISK_BYTES'] = int(os.environ.get('SUMMARY_CACHE_DISK_BYTES', 512 << 20))
+app.config['SUMMARY_CACHE_TTL'] = int(os.environ.get('SUMMARY_CACHE_TTL', 7 * 24 * 3600))
+summary_cache = SummaryCache(os.path.join(UPLOAD_FOLDER, 'cache'),
+                             max_memory_bytes=app.config['SUMMARY_CACHE_MEMORY_BYTES'],
+                             max_disk_bytes=app.config['SUMMARY_CACHE_DISK_BYTES'],
+                             ttl=app.config['SUMMARY_CACHE_TTL'])
+
+# Re-uploads of edited PDFs reuse the previous version's per-page text,
+# sentence tokens, similarity rows and PageRank scores. Up to
+# INCREMENTAL_CACHE_BYTES of document states are kept in memory per
+# process (0 disables it). A previous version is only used when it has at
+# least INCREMENTAL_MIN_SHARED_PAGES (a fraction) of the upload's non-blank
+# pages, so unrelated documents sharing a cover page stay apart.
+app.config['INCREMENTAL_CACHE_BYTES'] = int(os.environ.get('INCREMENTAL_CACHE_BYTES', 256 << 20))
+app.config['INCREMENTAL_MIN_SHARED_PAGES'] = float(os.environ.get('INCREMENTAL_MIN_SHARED_PAGES', 0.5))
+document_states = DocumentStateCache(app.config['INCREMENTAL_CACHE_BYTES'],
+                                     app.config['INCREMENTAL_MIN_SHARED_PAGES'])
+
+# /api/summarize/batch summarizes up to BATCH_WORKERS documents at once and
+# accepts at most BATCH_MAX_FILES PDFs per request; zip members larger than
+# BATCH_MAX_MEMBER_BYTES uncompressed are rejected
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', min(4, os.cpu_count() or 1)))
+app.config['BATCH_MAX_FILES'] = int(os.environ.get('BATCH_MAX_FILES', 200))
+app.config['BATCH_MAX_MEMBER_BYTES'] = int(os.environ.get('BATCH_MAX_MEMBER_BYTES', DEFAULT_MAX_MEMBER_BYTES))
+
+# /api/summarize/stream sends an SSE comment after SSE_HEARTBEAT_SECONDS
+# without events so proxies keep the connection open, and reports
+# extraction progress at most every SSE_PROGRESS_INTERVAL seconds
+app.config['SSE_HEARTBEAT_SECONDS'] = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+app.config['SSE_PROGRESS_INTERVAL'] = float(os.environ.get('SSE_PROGRESS_INTERVAL', 0.25))
+
+# Background jobs (/api/summarize/jobs) run on JOB_WORKERS threads. At most
+# JOB_QUEUE_SIZE jobs wait per process (more are refused with 429), and
+# finished jobs are kept for JOB_RETENTION_SECONDS. JOB_STORE is 'memory'
+# or 'sqlite', which keeps job records in JOB_DATABASE so every server
+# process on the host can report on them.
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', 32))
+app.config['JOB_RETENTION_SECONDS'] = int(os.environ.get('JOB_RETENTION_SECONDS', 3600))
+app.config['JOB_STORE'] = os.environ.get('JOB_STORE', 'memory')
+app.config['JOB_DATABASE'] = os.environ.get('JOB_DATABASE', os.path.join(UPLOAD_FOLDER, 'jobs.sqlite3'))
+
+# tracemalloc is process-wide, so only one sparse ranking is measured at a time
+memory_trace_lock = threading.Lock()
 
 def sentence_similarity(sent1, sent2, stopwords=None):
     """Calculate similarity between two sentences"""
-    if stopwords is None:
-        stopwords = []
-
-    # Custom word tokenization function as a fallback
-    def custom_tokenize(text):
-        import re
-        # Split on word boundaries and filter out non-word characters
-        return [word.lower() for word in re.findall(r'\b\w+\b', text.lower())]
-
-    # Try to use NLTK's word_tokenize, fall back to custom tokenization if it fails
-    try:
-        sent1_tokens = [word.lower() for word in word_tokenize(sent1)]
-        sent2_tokens = [word.lower() for word in word_tokenize(sent2)]
-    except Exception as e:
-        print(f"Error in word tokenization: {e}")
-        sent1_tokens = custom_tokenize(sent1)
-        sent2_tokens = custom_tokenize(sent2)
-
-    sent1 = sent1_tokens
-    sent2 = sent2_tokens
+    stopwords = frozenset(stopwords or ())
 
-    all_words = list(set(sent1 + sent2))
+    sent1, sent2 = tokenize_words([sent1, sent2])
+    all_words = {word: index for index, word in enumerate(set(sent1 + sent2))}
 
-    vector1 = [0] * len(all_words)
-    vector2 = [0] * len(all_words)
+    vector1 = np.zeros(len(all_words))
+    vector2 = np.zeros(len(all_words))
 
     # Build the vector for the first sentence
-    for w in sent1:
-        if w not in stopwords:
-            vector1[all_words.index(w)] += 1
+    for w in without_stop_words(sent1, stopwords):
+        vector1[all_words[w]] += 1
 
     # Build the vector for the second sentence
-    for w in sent2:
-        if w not in stopwords:
-            vector2[all_words.index(w)] += 1
+    for w in without_stop_words(sent2, stopwords):
+        vector2[all_words[w]] += 1
 
     # Calculate cosine similarity
-    if sum(vector1) == 0 or sum(vector2) == 0:
+    if not vector1.any() or not vector2.any():
         return 0.0
-    return 1 - cosine_distance(vector1, vector2)
+    return float(np.dot(vector1, vector2) / (np.linalg.norm(vector1) * np.linalg.norm(vector2)))
+
+def tokenize_words(sentences):
+    """Tokenize every sentence once into lowercase, interned word lists"""
+    # NLTK's word tokenizer when its data is installed, a regex otherwise
+    return tokenize_sentences_words(sentences, get_word_tokenizer())
 
 def build_similarity_matrix(sentences, stop_words):
     """Create similarity matrix among all sentences"""
-    # Create an empty similarity matrix
-    similarity_matrix = np.zeros((len(sentences), len(sentences)))
-
-    for idx1 in range(len(sentences)):
-        for idx2 in range(len(sentences)):
-            if idx1 == idx2:  # Same sentences
-                continue
-            similarity_matrix[idx1][idx2] = sentence_similarity(sentences[idx1], sentences[idx2], stop_words)
-
-    return similarity_matrix
-
-def generate_summary(text, num_sentences=5):
-    """Generate summary using TextRank algorithm"""
-    # Tokenize the text into sentences
-    try:
-        sentences = sent_tokenize(text)
-    except Exception as e:
-        print(f"Error in sentence tokenization: {e}")
-        # Fallback: split by periods, question marks, and exclamation points
-        import re
-        sentences = re.split(r'(?<=[.!?])(\s+)', text)
-        # Filter out empty strings
-        sentences = [s.strip() for s in sentences if s.strip()]
-
-    # Handle case with fewer sentences than requested summary length
-    if len(sentences) <= num_sentences:
-        return ' '.join(sentences)
-
-    # Get English stop words
-    stop_words = stopwords.words('english')
-
-    # Build similarity matrix
-    sentence_similarity_matrix = build_similarity_matrix(sentences, stop_words)
+    # Tokenize each sentence once and compare all pairs with a single
+    # normalized sparse matrix product instead of calling
+    # sentence_similarity for every ordered pair
+    term_matrix, _ = build_term_matrix(tokenize_words(sentences), frozenset(stop_words))
+    return cosine_similarity_matrix(term_matrix)
+
+def build_sparse_similarity_graph(term_matrix):
+    """Create a sparse top-k similarity graph from the sentence term matrix"""
+    top_k = app.config['SPARSE_TOP_K'] or None
+    with stage('similarity'):
+        return sparse_similarity_graph(term_matrix, top_k, app.config['SPARSE_SIMILARITY_THRESHOLD'])
+
+def rank_sentences_sparse(term_matrix, stats, progress=None, initial=None):
+    """Score sentences on the sparse graph and record its peak memory in stats"""
+    # Only graph construction and ranking are traced; tracing the Python
+    # tokenizer as well would roughly double its run time
+    with memory_trace_lock:
+        was_tracing = tracemalloc.is_tracing()
+        if was_tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        try:
+            graph = build_sparse_similarity_graph(term_matrix)
+            if progress is not None:
+                progress('graph', {'mode': 'sparse', 'sentence_count': graph.shape[0], 'edge_count': int(graph.nnz)})
+            scores = rank_sentences(graph, progress, initial, stats)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    stats['edge_count'] = int(graph.nnz)
+    stats['peak_memory_bytes'] = peak
+    return scores
+
+def networkx_pagerank(similarity_matrix, initial=None):
+    """Rank sentences with networkx (only used for the optional comparison modes)"""
+    import networkx as nx
+
+    if sparse.issparse(similarity_matrix):
+        graph = nx.from_scipy_sparse_array(similarity_matrix)
+    else:
+        graph = nx.from_numpy_array(similarity_matrix)
+    scores = nx.pagerank(graph,
+                         alpha=app.config['PAGERANK_DAMPING'],
+                         tol=app.config['PAGERANK_TOL'],
+                         max_iter=app.config['PAGERANK_MAX_ITER'],
+                         nstart=None if initial is None else dict(enumerate(initial)))
+    return np.array([scores[i] for i in range(len(scores))])
+
+def rank_sentences(similarity_matrix, progress=None, initial=None, stats=None):
+    """Score sentences with PageRank over the similarity matrix
+
+    progress, if given, receives a ('pagerank', {...}) event per iteration
+    of the native backend. initial warm-starts the power iteration, and
+    stats, if given, records the number of iterations.
+    """
+    with stage('pagerank'):
+        backend = app.config['PAGERANK_BACKEND']
+        if backend == 'networkx':
+            return networkx_pagerank(similarity_matrix, initial)
+
+        callback = None
+        if progress is not None:
+            def callback(iteration, error):
+                progress('pagerank', {'iteration': iteration, 'error': float(error)})
+
+        scores, iterations, converged = pagerank(similarity_matrix,
+                                                 damping=app.config['PAGERANK_DAMPING'],
+                                                 tol=app.config['PAGERANK_TOL'],
+                                                 max_iter=app.config['PAGERANK_MAX_ITER'],
+                                                 callback=callback,
+                                                 initial=initial)
+        if stats is not None:
+            stats['pagerank_iterations'] = iterations
+        if not converged:
+            logger.warning("PageRank did not converge in %d iterations", iterations)
+
+        if backend == 'compare':
+            reference = networkx_pagerank(similarity_matrix, initial)
+            logger.info("PageRank comparison: %d iterations, max difference from networkx %.3e",
+                        iterations, np.abs(scores - reference).max())
+
+        return scores
+
+def split_sentences(text):
+    """Split text into sentences with NLTK's punkt, or punctuation if it is not installed"""
+    return get_sentence_tokenizer()(text)
+
+def rank_term_matrix(term_matrix, stats, progress=None, previous=None, previous_index=None):
+    """Score sentences from their term matrix, switching to sparse mode for long documents
+
+    previous is the DocumentState of an earlier version of the document and
+    previous_index maps each sentence to its index there (-1 for new
+    sentences): PageRank starts from the matching previous scores and, in
+    dense mode, only the rows and columns of new sentences are computed.
+    Returns the scores and the dense similarity matrix (None in sparse mode).
+    """
+    n = term_matrix.shape[0]
+    reused = 0 if previous_index is None else int(np.count_nonzero(previous_index >= 0))
+    initial = warm_start_scores(previous.scores, previous_index) if reused else None
+    if previous_index is not None:
+        stats['reuse'] = {'sentences': reused / n if n else 0.0, 'similarity': 0.0,
+                          'pagerank_warm_start': initial is not None}
+
+    if n >= app.config['SPARSE_MODE_MIN_SENTENCES']:
+        # Very long documents: rank on a sparse top-k graph
+        stats['mode'] = 'sparse'
+        return rank_sentences_sparse(term_matrix, stats, progress, initial), None
+
+    # Build similarity matrix, copying every entry between unchanged sentences
+    with stage('similarity'):
+        if reused and previous.similarity is not None:
+            sentence_similarity_matrix, _ = update_similarity_matrix(previous.similarity, previous_index, term_matrix)
+            stats['reuse']['similarity'] = (reused / n) ** 2
+        else:
+            sentence_similarity_matrix = cosine_similarity_matrix(term_matrix)
+    if progress is not None:
+        progress('graph', {'mode': 'dense', 'sentence_count': n})
 
     # Rank sentences using PageRank algorithm
-    sentence_similarity_graph = nx.from_numpy_array(sentence_similarity_matrix)
-    scores = nx.pagerank(sentence_similarity_graph)
-
+    return rank_sentences(sentence_similarity_matrix, progress, initial, stats), sentence_similarity_matrix
+
+def estimate_ranking_memory(text_length, sentence_count, term_entries):
+    """Rough peak bytes of ranking a document in memory, to decide on disk mode
+
+    Counts the sentences, the term matrix with its normalized and
+    transposed copies, and the similarity matrix or sparse graph.
+    """
+    memory = text_length + 64 * sentence_count + 64 * term_entries
+    if sentence_count < app.config['SPARSE_MODE_MIN_SENTENCES']:
+        return memory + 24 * sentence_count * sentence_count
+    # Sparse mode scores rows in blocks of at most about 4M nonzeros (160 MB
+    # with their masks and temporaries) and keeps top-k edges both ways
+    neighbours = app.config['SPARSE_TOP_K'] or sentence_count
+    return memory + (160 << 20) + 96 * neighbours * sentence_count
+
+def rank_on_disk(term_matrix, directory, stats):
+    """Score sentences of a MappedCSR term matrix in disk mode, with temporary files in directory"""
+    max_bytes = app.config['SUMMARY_MAX_MEMORY'] // 4
+    max_term_sentences = app.config['DISK_MODE_MAX_TERM_SENTENCES'] or None
+    with stage('similarity'):
+        graph, pruned_terms = mapped_similarity_graph(term_matrix, directory,
+                                                      top_k=app.config['SPARSE_TOP_K'] or None,
+                                                      threshold=app.config['SPARSE_SIMILARITY_THRESHOLD'],
+                                                      max_term_sentences=max_term_sentences,
+                                                      max_bytes=max_bytes)
+    with stage('pagerank'):
+        scores, iterations, converged = mapped_pagerank(graph, max_bytes,
+                                                        damping=app.config['PAGERANK_DAMPING'],
+                                                        tol=app.config['PAGERANK_TOL'],
+                                                        max_iter=app.config['PAGERANK_MAX_ITER'])
+    if not converged:
+        logger.warning("PageRank did not converge in %d iterations", iterations)
+
+    stats['mode'] = 'disk'
+    stats['edge_count'] = graph.nnz
+    stats['pruned_terms'] = pruned_terms
+    stats['pagerank_iterations'] = iterations
+    return scores
+
+def select_summary(sentences, scores, num_sentences):
+    """Join the top-scoring sentences in their original order"""
     # Sort sentences by score and select top ones for summary
     ranked_sentences = sorted(((scores[i], s) for i, s in enumerate(sentences)), reverse=True)
 
@@ -140,10 +331,237 @@ def generate_summary(text, num_sentences=5):
         original_order.append((sentences.index(sentence), sentence))
 
     original_order.sort()
-    summary = ' '.join([sentence for _, sentence in original_order])
-
+    return ' '.join([sentence for _, sentence in original_order])
+
+def select_stored_summary(sentences, scores, num_sentences):
+    """select_summary for a SentenceStore, reading only the selected sentences
+
+    Sentences tied at the cut-off are picked arbitrarily rather than by text.
+    """
+    count = min(num_sentences, len(scores))
+    top = np.argpartition(-scores, count - 1)[:count]
+    return ' '.join(sentences[i] for i in sorted(top))
+
+def generate_summary(text, num_sentences=5, stats=None, progress=None):
+    """Generate summary using TextRank algorithm
+
+    If a stats dict is passed it is filled with the ranking mode, the
+    sentence count and, in sparse mode, the graph's edge count and the peak
+    memory traced while building and ranking it. progress, if given, is
+    called as progress(event, data) after each stage, including a
+    provisional frequency-ranked summary before the graph is built.
+    """
+    summary, _ = summarize_incrementally(text, num_sentences, stats, progress)
     return summary
 
+def summarize_incrementally(text, num_sentences=5, stats=None, progress=None, previous=None):
+    """generate_summary that can build on a previous version of the document
+
+    previous is that version's DocumentState or None. Sentences it already
+    contains keep their tokens, similarity entries and (as the PageRank
+    starting point) scores; stats['reuse'] reports the fractions reused.
+    Returns the summary and this version's DocumentState (None when the
+    text is too short to rank or is ranked in disk mode), with no page
+    data filled in.
+    """
+    if stats is None:
+        stats = {}
+
+    # Tokenize the text into sentences
+    with stage('split_sentences'):
+        sentences = split_sentences(text)
+
+    stats['sentence_count'] = len(sentences)
+    stats['mode'] = 'dense'
+    if progress is not None:
+        progress('sentences', {'count': len(sentences)})
+
+    # Assuming about one term per ten characters, too large to rank in
+    # memory: count terms batch by batch, spilling to disk mode
+    if estimate_ranking_memory(len(text), len(sentences), len(text) // 10) > app.config['SUMMARY_MAX_MEMORY']:
+        batches = (sentences[start:start + 1000] for start in range(0, len(sentences), 1000))
+        return summarize_sentence_batches(batches, num_sentences, stats), None
+
+    # Handle case with fewer sentences than requested summary length
+    if len(sentences) <= num_sentences:
+        return ' '.join(sentences), None
+
+    # Tokenize each sentence once, and only sentences the previous version
+    # did not have
+    with stage('tokenize'):
+        if previous is not None:
+            previous_index = match_sentences(previous.sentences, sentences)
+        else:
+            previous_index = np.full(len(sentences), -1, dtype=np.int64)
+        new_tokens = iter(tokenize_words([sentence for sentence, index in zip(sentences, previous_index) if index < 0]))
+        token_lists = [previous.token_lists[index] if index >= 0 else next(new_tokens) for index in previous_index]
+
+        # One shared term matrix, without English stop words
+        term_matrix, _ = build_term_matrix(token_lists, get_stop_words())
+    if progress is not None:
+        provisional = select_summary(sentences, frequency_scores(term_matrix), num_sentences)
+        progress('provisional', {'summary': provisional, 'method': 'frequency'})
+    scores, similarity = rank_term_matrix(term_matrix, stats, progress, previous, previous_index)
+
+    state = DocumentState(None, [], {}, sentences, token_lists, similarity, scores)
+    return select_summary(sentences, scores, num_sentences), state
+
+class CountingChunks:
+    """Iterate over text chunks while counting the characters that went by"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.length = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.length += len(chunk)
+            yield chunk
+
+def summarize_sentence_batches(sentence_batches, num_sentences=5, stats=None):
+    """Generate a TextRank summary from sentences that arrive in batches
+
+    Each batch is word-tokenized and counted into the term matrix as soon as
+    it arrives, so only the sentences and the compact term counts are kept,
+    never the full text or its token lists. Once ranking them in memory
+    would take more than SUMMARY_MAX_MEMORY, the sentences and term counts
+    spill to memory-mapped files and the document is ranked in disk mode.
+    """
+    if stats is None:
+        stats = {}
+
+    sentences = []
+    builder = TermMatrixBuilder(get_stop_words())
+    text_length = 0
+    with contextlib.ExitStack() as cleanup:
+        for batch in sentence_batches:
+            sentences.extend(batch)
+            with stage('tokenize'):
+                for tokens in tokenize_words(batch):
+                    builder.add(tokens)
+
+            if isinstance(sentences, list):
+                text_length += sum(len(sentence) for sentence in batch)
+                if estimate_ranking_memory(text_length, len(sentences),
+                                           len(builder.indices)) > app.config['SUMMARY_MAX_MEMORY']:
+                    directory = cleanup.enter_context(
+                        tempfile.TemporaryDirectory(prefix='summary-', dir=app.config['UPLOAD_FOLDER']))
+                    store = SentenceStore(os.path.join(directory, 'sentences'))
+                    cleanup.callback(store.close)
+                    store.extend(sentences)
+                    sentences = store
+                    builder = MappedTermMatrixBuilder.spill(builder, os.path.join(directory, 'terms'))
+
+        stats['sentence_count'] = len(sentences)
+        stats['mode'] = 'dense'
+
+        # Handle case with fewer sentences than requested summary length
+        if len(sentences) <= num_sentences:
+            return ' '.join(sentences)
+
+        term_matrix, _ = builder.build()
+        if isinstance(sentences, SentenceStore):
+            scores = rank_on_disk(term_matrix, directory, stats)
+            return select_stored_summary(sentences, scores, num_sentences)
+
+        scores, _ = rank_term_matrix(term_matrix, stats)
+        return select_summary(sentences, scores, num_sentences)
+
+def summary_cache_version():
+    """Algorithm version plus every setting that changes which sentences are picked"""
+    settings = ('PAGERANK_BACKEND', 'PAGERANK_DAMPING', 'PAGERANK_TOL', 'PAGERANK_MAX_ITER',
+                'SPARSE_MODE_MIN_SENTENCES', 'SPARSE_TOP_K', 'SPARSE_SIMILARITY_THRESHOLD',
+                'SUMMARY_MAX_MEMORY', 'DISK_MODE_MAX_TERM_SENTENCES')
+    fingerprint = hashlib.sha256(repr([app.config[name] for name in settings]).encode()).hexdigest()
+    return f"{ALGORITHM_VERSION}-{fingerprint[:12]}"
+
+def summary_response(text, result, cache_status, text_cache_status):
+    """Build the summarize response; X-Cache reports whether the summary came from the cache"""
+    response = jsonify({
+        'original_text': text,
+        'summary': result['summary'],
+        'original_length': len(text),
+        'summary_length': len(result['summary']),
+        'metadata': result['metadata']
+    })
+    response.headers['X-Cache'] = cache_status
+    response.headers['X-Cache-Text'] = text_cache_status
+    return response
+
+def extract_pdf_text(source, fingerprints, known_texts=None, progress=None):
+    """Extract a PDF's text page by page, skipping pages whose text is already known
+
+    fingerprints are the page fingerprints of source and known_texts maps
+    fingerprints to text from an earlier version of the document. Returns
+    the text (the same as extract_text_from_pdf), the fingerprint -> text
+    map of this version's non-empty pages and the number of pages reused.
+    """
+    if known_texts is None:
+        known_texts = {}
+
+    total_pages = len(fingerprints)
+    texts = [known_texts.get(fingerprint) for fingerprint in fingerprints]
+    missing = [page_number for page_number, text in enumerate(texts) if text is None]
+    reused_pages = total_pages - len(missing)
+    if progress is not None:
+        progress('extracting', {'pages': total_pages, 'cached_pages': reused_pages})
+
+    with stage('pdf_extract'):
+        last_report = time.monotonic()
+        for extracted, (page_number, page_text) in enumerate(zip(missing, iter_pdf_pages(source, pages=missing)), 1):
+            texts[page_number] = page_text
+            now = time.monotonic()
+            if progress is not None and (extracted == len(missing) or
+                                         now - last_report >= app.config['SSE_PROGRESS_INTERVAL']):
+                progress('pages', {'extracted': reused_pages + extracted, 'total': total_pages})
+                last_report = now
+
+    # Empty pages are not remembered, so a page that timed out is retried next time
+    page_texts = {fingerprint: text for fingerprint, text in zip(fingerprints, texts) if text}
+    return ''.join(text for text in texts if text), page_texts, reused_pages
+
+def summarize_pdf_source(source, content_hash, summary_length, progress=None):
+    """Summarize PDF bytes or a PDF path through the text and summary caches
+
+    Returns (text, result, cache_status, text_cache_status) for summary_response.
+    progress is passed on to extraction and generate_summary. An edited
+    re-upload of a recently summarized PDF reuses the unchanged pages and
+    sentences of that version; metadata['reuse'] reports how much.
+    """
+    cached_text = summary_cache.get(text_key(content_hash, TEXT_VERSION))
+    cached_summary = summary_cache.get(summary_key(content_hash, summary_length, summary_cache_version()))
+    record_cache('pdf_text', cached_text is not None)
+    record_cache('summary', cached_summary is not None)
+    if cached_text is not None and cached_summary is not None:
+        return cached_text['text'], cached_summary, 'HIT', 'HIT'
+
+    if cached_text is not None:
+        # A different summary_length of a known PDF skips extraction
+        text = cached_text['text']
+        previous = document_states.find(content_hash)
+        fingerprints, page_texts = (previous.page_fingerprints, previous.page_texts) if previous else ([], {})
+        reused_pages = len(fingerprints)
+    else:
+        # Extract text straight from the buffered upload, skipping pages
+        # a previous version of the document already had
+        fingerprints = page_fingerprints(source)
+        previous = document_states.find(content_hash, fingerprints)
+        text, page_texts, reused_pages = extract_pdf_text(source, fingerprints,
+                                                          previous.page_texts if previous else None, progress)
+        summary_cache.set(text_key(content_hash, TEXT_VERSION), {'text': text})
+
+    # Generate summary
+    stats = {}
+    summary, state = summarize_incrementally(text, summary_length, stats, progress, previous)
+    if state is not None:
+        stats['reuse']['pages'] = reused_pages / len(fingerprints) if fingerprints else 0.0
+        state.content_hash, state.page_fingerprints, state.page_texts = content_hash, fingerprints, page_texts
+        document_states.put(state)
+    result = {'summary': summary, 'metadata': stats}
+    summary_cache.set(summary_key(content_hash, summary_length, summary_cache_version()), result)
+
+    return text, result, 'MISS', 'MISS' if cached_text is None else 'HIT'
+
 @app.route('/api/summarize', methods=['POST'])
 def summarize_pdf():
     """API endpoint to summarize PDF"""
@@ -156,38 +574,324 @@ def summarize_pdf():
         return jsonify({'error': 'No selected file'}), 400
 
     if file and file.filename.endswith('.pdf'):
-        # Save the uploaded file
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        # Identify the upload by its content so repeated uploads hit the cache
+        content_hash = hash_stream(file.stream)
 
         try:
-            # Extract text from PDF
-            text = extract_text_from_pdf(file_path)
-
             # Get summary length from request or use default
             summary_length = int(request.form.get('summary_length', 5))
+            return summary_response(*summarize_pdf_source(pdf_source(file), content_hash, summary_length))
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    return jsonify({'error': 'Invalid file format. Please upload a PDF file.'}), 400
+
+def run_summary_job(payload, progress):
+    """Job queue worker: summarize one queued upload and return the /api/summarize body"""
+    text, result, cache_status, _ = summarize_pdf_source(
+        payload['source'], payload['content_hash'], payload['summary_length'],
+        lambda event, data: progress(event))
+    return {
+        'original_text': text,
+        'summary': result['summary'],
+        'original_length': len(text),
+        'summary_length': len(result['summary']),
+        'metadata': result['metadata'],
+        'cache': cache_status
+    }
+
+def make_job_store():
+    if app.config['JOB_STORE'] == 'sqlite':
+        return SQLiteJobStore(app.config['JOB_DATABASE'])
+    return MemoryJobStore()
+
+job_queue = JobQueue(make_job_store(), run_summary_job,
+                     workers=app.config['JOB_WORKERS'],
+                     max_queued=app.config['JOB_QUEUE_SIZE'],
+                     retention=app.config['JOB_RETENTION_SECONDS'])
+register_gauge('summary_jobs_queued', 'Summary jobs waiting for a worker', job_queue.queued_count)
+
+def job_response(record, status_code=200):
+    """Serialize a job record; result and error only appear once they exist"""
+    job = {name: record[name] for name in ('job_id', 'status', 'priority', 'stage',
+                                            'created_at', 'started_at', 'finished_at')}
+    if record['cancel_requested'] and record['status'] not in FINISHED_STATES:
+        job['cancel_requested'] = True
+    if record['result'] is not None:
+        job['result'] = record['result']
+    if record['error'] is not None:
+        job['error'] = record['error']
+    return jsonify(job), status_code
+
+@app.route('/api/summarize/jobs', methods=['POST'])
+def submit_summary_job():
+    """API endpoint to queue a PDF for summarization in the background
+
+    Takes the same form data as /api/summarize plus an optional integer
+    priority (higher runs first, default 0) and answers 202 with the job
+    straight away. Poll GET /api/summarize/jobs/<job_id> for the result.
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    if not file.filename.endswith('.pdf'):
+        return jsonify({'error': 'Invalid file format. Please upload a PDF file.'}), 400
+
+    try:
+        summary_length = int(request.form.get('summary_length', 5))
+        priority = int(request.form.get('priority', 0))
+    except ValueError:
+        return jsonify({'error': 'summary_length and priority must be integers'}), 400
+
+    content_hash = hash_stream(file.stream)
+    # The job keeps the upload until it has run
+    uploads, release_uploads = request.detach_files()
+    payload = {
+        'source': pdf_source(uploads['file']),
+        'content_hash': content_hash,
+        'summary_length': summary_length
+    }
+    try:
+        job_id = job_queue.submit(payload, priority, cleanup=release_uploads)
+    except QueueFull:
+        release_uploads()
+        response = jsonify({'error': 'Too many summaries queued, please retry later'})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+
+    response, status_code = job_response(job_queue.get(job_id), 202)
+    response.headers['Location'] = f"/api/summarize/jobs/{job_id}"
+    return response, status_code
+
+@app.route('/api/summarize/jobs/<job_id>', methods=['GET'])
+def get_summary_job(job_id):
+    """API endpoint to poll a job; a finished job carries its result or error"""
+    record = job_queue.get(job_id)
+    if record is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return job_response(record)
+
+@app.route('/api/summarize/jobs/<job_id>', methods=['DELETE'])
+def cancel_summary_job(job_id):
+    """API endpoint to cancel a queued or running job"""
+    record = job_queue.cancel(job_id)
+    if record is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if record['status'] == CANCELLED:
+        return job_response(record)
+    if record['status'] in FINISHED_STATES:
+        return job_response(record, 409)
+    # Running: it stops at its next stage
+    return job_response(record, 202)
+
+class StreamCancelled(Exception):
+    """Raised in a streaming summarization once its client has gone away"""
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/summarize/stream', methods=['POST'])
+def summarize_pdf_stream():
+    """API endpoint to summarize a PDF while streaming progress as Server-Sent Events
+
+    Takes the same form data as /api/summarize. Events, in order:
+    extracting and pages (extraction progress), sentences, provisional (a
+    summary ranked by word frequency), graph, pagerank (one per
+    iteration) and summary, whose data is the /api/summarize response body
+    plus a cache field. A failure ends the stream with an error event.
+    Cached results go straight to the summary event.
+    """
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    if not file.filename.endswith('.pdf'):
+        return jsonify({'error': 'Invalid file format. Please upload a PDF file.'}), 400
+
+    try:
+        summary_length = int(request.form.get('summary_length', 5))
+    except ValueError:
+        return jsonify({'error': 'summary_length must be an integer'}), 400
 
-            # Generate summary
-            summary = generate_summary(text, summary_length)
+    content_hash = hash_stream(file.stream)
+    # The upload has to outlive the request context the stream runs after
+    uploads, release_uploads = request.detach_files()
+    source = pdf_source(uploads['file'])
 
-            # Clean up - remove the uploaded file
-            os.remove(file_path)
+    events = queue.Queue()
+    cancelled = threading.Event()
 
+    def progress(event, data):
+        if cancelled.is_set():
+            raise StreamCancelled()
+        events.put((event, data))
+
+    def run():
+        try:
+            text, result, cache_status, _ = summarize_pdf_source(source, content_hash, summary_length, progress)
+            events.put(('summary', {
+                'original_text': text,
+                'summary': result['summary'],
+                'original_length': len(text),
+                'summary_length': len(result['summary']),
+                'metadata': result['metadata'],
+                'cache': cache_status
+            }))
+        except StreamCancelled:
+            pass
+        except Exception as e:
+            events.put(('error', {'error': str(e)}))
+        finally:
+            events.put(None)
+
+    worker = threading.Thread(target=run, name='summarize-stream', daemon=True)
+    worker.start()
+
+    def generate():
+        heartbeat = app.config['SSE_HEARTBEAT_SECONDS']
+        try:
+            # Flush the headers and a first byte before any work is done
+            yield ': started\n\n'
+            while True:
+                try:
+                    item = events.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if item is None:
+                    break
+                yield format_sse(*item)
+        finally:
+            # Stop the worker at its next stage if the client disconnected
+            cancelled.set()
+
+    def release():
+        # A spilled upload may only be removed once the worker is done with it
+        worker.join()
+        release_uploads()
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(release)
+    return response
+
+@app.route('/api/summarize/batch', methods=['POST'])
+def summarize_batch():
+    """API endpoint to summarize many PDFs at once
+
+    Accepts any number of PDFs and zip archives of PDFs as multipart "files"
+    (or "file") fields. Documents are extracted and summarized on a bounded
+    pool of BATCH_WORKERS threads, and one JSON line per file is streamed
+    back (application/x-ndjson) as soon as it finishes, in completion order.
+    A file that fails gets a line with its error and the others carry on.
+    The last line reports the batch totals.
+    """
+    if 'files' not in request.files and 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    try:
+        summary_length = int(request.form.get('summary_length', 5))
+    except ValueError:
+        return jsonify({'error': 'summary_length must be an integer'}), 400
+    include_text = request.form.get('include_text', '').lower() in ('1', 'true', 'yes')
+
+    # The uploads have to outlive the request context the stream runs after
+    uploads, release_uploads = request.detach_files()
+    files = uploads.getlist('files') + uploads.getlist('file')
+
+    def summarize_one(source):
+        return summarize_pdf_source(source, hash_source(source), summary_length)
+
+    def generate():
+        file_count = failed = 0
+        items = iter_batch_items(files, app.config['BATCH_MAX_MEMBER_BYTES'])
+        for index, item, summarized, error in iter_batch_results(items, summarize_one,
+                                                                 app.config['BATCH_WORKERS'],
+                                                                 app.config['BATCH_MAX_FILES']):
+            file_count += 1
+            line = {'index': index, 'filename': item.filename}
+            if error is not None:
+                failed += 1
+                line['error'] = error
+            else:
+                text, result, cache_status, _ = summarized
+                if include_text:
+                    line['original_text'] = text
+                line.update({
+                    'summary': result['summary'],
+                    'original_length': len(text),
+                    'summary_length': len(result['summary']),
+                    'metadata': result['metadata'],
+                    'cache': cache_status
+                })
+            yield json.dumps(line) + '\n'
+        yield json.dumps({'done': True, 'files': file_count, 'failed': failed}) + '\n'
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.call_on_close(release_uploads)
+    return response
+
+@app.route('/api/summarize-text', methods=['POST'])
+def summarize_text():
+    """API endpoint to summarize raw text
+
+    A text/plain body (optionally chunked) is read as a stream: sentence
+    splitting and term counting run while it arrives, with summary_length
+    taken from the query string. A JSON body {"text": ..., "summary_length": ...}
+    is also accepted and additionally echoes original_text back.
+    """
+    data = request.get_json() if request.is_json else None
+    if request.is_json and not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        summary_length = int(data.get('summary_length', 5) if data is not None else
+                             request.args.get('summary_length', 5))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'summary_length must be an integer'}), 400
+    if data is not None and not isinstance(data.get('text', ''), str):
+        return jsonify({'error': 'text must be a string'}), 400
+
+    try:
+        stats = {}
+        if data is not None:
+            text = data.get('text', '')
+            if not text:
+                return jsonify({'error': 'No text provided'}), 400
+            batches = iter_sentence_batches([text], split_sentences)
+            summary = summarize_sentence_batches(batches, summary_length, stats)
             return jsonify({
                 'original_text': text,
                 'summary': summary,
                 'original_length': len(text),
-                'summary_length': len(summary)
+                'summary_length': len(summary),
+                'metadata': stats
             })
 
-        except Exception as e:
-            # Clean up in case of error
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            return jsonify({'error': str(e)}), 500
+        chunks = CountingChunks(iter_text_chunks(request.stream))
+        summary = summarize_sentence_batches(iter_sentence_batches(chunks, split_sentences), summary_length, stats)
+        if chunks.length == 0:
+            return jsonify({'error': 'No text provided'}), 400
 
-    return jsonify({'error': 'Invalid file format. Please upload a PDF file.'}), 400
+        return jsonify({
+            'summary': summary,
+            'original_length': chunks.length,
+            'summary_length': len(summary),
+            'metadata': stats
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,99 @@
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from upload_buffer import pdf_source
+
+# Largest uncompressed zip member that is read into memory by default
+DEFAULT_MAX_MEMBER_BYTES = 64 << 20
+
+class BatchItem:
+    """One PDF of a batch; load() returns what pdf_extract accepts (bytes or a path)"""
+
+    def __init__(self, filename, load=None, error=None):
+        self.filename = filename
+        self.load = load
+        self.error = error
+
+def is_zip_upload(file_storage):
+    return file_storage.filename.lower().endswith('.zip') or file_storage.mimetype in (
+        'application/zip', 'application/x-zip-compressed')
+
+def iter_zip_items(file_storage, max_member_bytes=DEFAULT_MAX_MEMBER_BYTES):
+    """Yield one item per PDF inside an uploaded zip archive
+
+    Members are only read when their item is loaded, so a large archive is
+    never decompressed into memory all at once. Folders and macOS resource
+    forks are skipped.
+    """
+    archive = zipfile.ZipFile(file_storage.stream)
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('._'):
+            continue
+        if not name.lower().endswith('.pdf'):
+            continue
+        if info.file_size > max_member_bytes:
+            yield BatchItem(name, error=f"File is larger than {max_member_bytes} bytes uncompressed")
+            continue
+        yield BatchItem(name, load=lambda info=info: archive.read(info))
+
+def iter_batch_items(files, max_member_bytes=DEFAULT_MAX_MEMBER_BYTES):
+    """Expand uploaded files (PDFs and zip archives of PDFs) into batch items"""
+    for file_storage in files:
+        if not file_storage.filename:
+            continue
+        if is_zip_upload(file_storage):
+            try:
+                yield from iter_zip_items(file_storage, max_member_bytes)
+            except zipfile.BadZipFile as e:
+                yield BatchItem(file_storage.filename, error=f"Invalid zip archive: {str(e)}")
+        elif file_storage.filename.lower().endswith('.pdf'):
+            yield BatchItem(file_storage.filename, load=lambda file_storage=file_storage: pdf_source(file_storage))
+        else:
+            yield BatchItem(file_storage.filename, error='Invalid file format. Please upload a PDF file.')
+
+def iter_batch_results(items, process, max_workers=4, max_items=None):
+    """Run process(source) for every item on a bounded thread pool
+
+    Yields (index, item, result, error) tuples in completion order. Items are
+    loaded one at a time as workers free up, so at most max_workers documents
+    are in memory, and an exception in one item is reported as its error
+    without stopping the rest. Items past max_items are reported as errors
+    without being loaded.
+    """
+    max_workers = max(1, max_workers)
+
+    def run(item):
+        return process(item.load())
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch')
+    pending = {}
+    try:
+        for index, item in enumerate(items):
+            if item.error is None and max_items is not None and index >= max_items:
+                item.error = f"Batch limit of {max_items} files reached"
+            if item.error is not None:
+                yield index, item, None, item.error
+                continue
+
+            while len(pending) >= max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _finished(pending.pop(future), future)
+            pending[executor.submit(run, item)] = (index, item)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _finished(pending.pop(future), future)
+    finally:
+        # A client that disconnects closes the generator; drop queued work
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def _finished(entry, future):
+    index, item = entry
+    try:
+        return index, item, future.result(), None
+    except Exception as e:
+        return index, item, None, str(e)
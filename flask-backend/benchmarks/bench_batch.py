@@ -0,0 +1,125 @@
+"""Compare one /api/summarize call per file against a single /api/summarize/batch upload.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_batch.py [--files 12] [--paragraphs 40] [--workers 1 4]
+
+Every variant gets its own freshly generated PDFs and an empty summary
+cache, and talks to app.py behind a real threaded Werkzeug server. The
+sequential variant is what the frontend does today: upload, wait for the
+summary, upload the next file. Times are wall-clock for the whole folder
+plus the time until the first summary arrived.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import app as backend
+from summary_cache import SummaryCache
+
+WORDS = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test_pdf_content.txt')).read().split()
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def make_pdf(paragraphs, seed):
+    """Build an in-memory PDF of random sentences drawn from the sample document's words"""
+    rng = random.Random(seed)
+    styles = getSampleStyleSheet()
+    elements = []
+    for _ in range(paragraphs):
+        sentences = [' '.join(rng.choices(WORDS, k=rng.randint(8, 25))).capitalize().rstrip('.') + '.'
+                     for _ in range(rng.randint(3, 8))]
+        elements.append(Paragraph(' '.join(sentences), styles['Normal']))
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(elements)
+    return buffer.getvalue()
+
+def encode_multipart(files, field):
+    boundary = uuid.uuid4().hex
+    body = b''
+    for filename, data in files:
+        body += (f"--{boundary}\r\n"
+                 f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                 "Content-Type: application/pdf\r\n\r\n").encode() + data + b"\r\n"
+    body += (f'--{boundary}\r\nContent-Disposition: form-data; name="summary_length"\r\n\r\n'
+             f"5\r\n--{boundary}--\r\n").encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def post(url, files, field):
+    body, content_type = encode_multipart(files, field)
+    return urllib.request.urlopen(urllib.request.Request(url, data=body, headers={'Content-Type': content_type}))
+
+def run_sequential(base_url, pdfs):
+    start = time.perf_counter()
+    first = None
+    for index, pdf in enumerate(pdfs):
+        with post(f"{base_url}/api/summarize", [(f"file-{index}.pdf", pdf)], 'file') as response:
+            response.read()
+        if first is None:
+            first = time.perf_counter() - start
+    return time.perf_counter() - start, first, 0
+
+def run_batch(base_url, pdfs):
+    start = time.perf_counter()
+    first = None
+    failed = 0
+    files = [(f"file-{index}.pdf", pdf) for index, pdf in enumerate(pdfs)]
+    with post(f"{base_url}/api/summarize/batch", files, 'files') as response:
+        for line in response:
+            result = json.loads(line)
+            if 'done' in result:
+                continue
+            if first is None:
+                first = time.perf_counter() - start
+            failed += 'error' in result
+    return time.perf_counter() - start, first, failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=12)
+    parser.add_argument('--paragraphs', type=int, default=40)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    server = make_server('127.0.0.1', 0, backend.app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    variants = [('sequential', None, run_sequential)]
+    variants += [(f"batch x{workers}", workers, run_batch) for workers in args.workers]
+
+    print(f"{args.files} PDFs of {args.paragraphs} paragraphs, {os.cpu_count()} CPUs")
+    print(f"{'variant':>12} {'total (s)':>10} {'first (s)':>10} {'failed':>7}")
+    try:
+        # Warm up imports, NLTK data and the extraction pool
+        run_sequential(base_url, [make_pdf(2, seed=-1)])
+        for variant, (name, workers, run) in enumerate(variants):
+            pdfs = [make_pdf(args.paragraphs, seed=variant * 1000 + index) for index in range(args.files)]
+            if workers is not None:
+                backend.app.config['BATCH_WORKERS'] = workers
+            with tempfile.TemporaryDirectory() as cache_dir:
+                backend.summary_cache = SummaryCache(cache_dir)
+                total, first, failed = run(base_url, pdfs)
+            print(f"{name:>12} {total:>10.2f} {first:>10.2f} {failed:>7}")
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Measure the cold-start time of a backend module (fresh interpreter, import only).
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_cold_start.py [--module app] [--runs 5]
+
+Each run imports the module in a new Python process, which is what every
+worker restart pays before it can serve a request.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def time_import(module):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f"import {module}"], cwd=BACKEND_DIR, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = min(time_import('sys') for _ in range(args.runs))
+    timings = [time_import(args.module) for _ in range(args.runs)]
+    print(f"import {args.module}: median {statistics.median(timings):.3f}s, "
+          f"min {min(timings):.3f}s, max {max(timings):.3f}s "
+          f"(bare interpreter {baseline:.3f}s)")
+
+if __name__ == '__main__':
+    main()
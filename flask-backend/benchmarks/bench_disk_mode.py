@@ -0,0 +1,116 @@
+"""Measure peak resident memory and time of summarizing very large texts in memory and in disk mode.
+
+Run from the flask-backend directory (Linux or macOS):
+
+    python benchmarks/bench_disk_mode.py [--sizes 5 25 100] [--in-memory-max 5] [--max-memory 512]
+
+For every size (in MB) a synthetic text is generated once: sentences of
+NLTK stop words mixed with a Zipf-distributed vocabulary, so word
+frequencies look like real prose. Each run streams the file through
+app.summarize_sentence_batches, exactly like a text/plain upload to
+/api/summarize-text, in a fresh Python process. "memory" disables disk
+mode (only up to --in-memory-max MB, beyond that it is slow and large);
+"disk" uses SUMMARY_MAX_MEMORY=--max-memory MB. Growth is the peak
+resident set size minus the process's size after imports and a warm-up
+summary.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'sa', 'tor', 'vel', 'qui', 'bra', 'don', 'fe', 'gal', 'hu', 'jin', 'nor',
+             'pa', 'ris', 'tu', 'wen', 'zo']
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES, size=rng.integers(2, 5))))
+    return sorted(words)
+
+def make_text(path, megabytes, seed=0, vocabulary_size=100000):
+    """Write about megabytes MB of Zipfian prose to path"""
+    from nltk_resources import get_stop_words
+
+    rng = np.random.default_rng(seed)
+    stop_words = np.array(sorted(get_stop_words()))
+    vocabulary = np.array(make_vocabulary(vocabulary_size, rng))
+    weights = 1.0 / np.arange(1, vocabulary_size + 1)
+    weights /= weights.sum()
+
+    target = megabytes << 20
+    written = 0
+    with open(path, 'w', encoding='utf-8') as output:
+        while written < target:
+            lengths = rng.integers(8, 30, size=2000)
+            words = np.where(rng.random(lengths.sum()) < 0.45,
+                             stop_words[rng.integers(0, len(stop_words), size=lengths.sum())],
+                             vocabulary[rng.choice(vocabulary_size, size=lengths.sum(), p=weights)])
+            sentences = []
+            for sentence in np.split(words, np.cumsum(lengths)[:-1]):
+                sentences.append(' '.join(sentence).capitalize() + '.')
+            chunk = ' '.join(sentences) + '\n'
+            output.write(chunk)
+            written += len(chunk)
+
+def peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def run(path):
+    """Summarize one file in this process and print the measurements as JSON"""
+    import app as backend
+    from text_stream import iter_sentence_batches, iter_text_chunks
+
+    backend.summarize_sentence_batches(iter_sentence_batches(['Warm up the tokenizers. ' * 10],
+                                                             backend.split_sentences), 2)
+    baseline = peak_rss()
+    stats = {}
+    start = time.perf_counter()
+    with open(path, 'rb') as stream:
+        batches = iter_sentence_batches(iter_text_chunks(stream), backend.split_sentences)
+        backend.summarize_sentence_batches(batches, 5, stats)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'elapsed': elapsed, 'baseline': baseline, 'peak': peak_rss(), 'stats': stats}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 25, 100])
+    parser.add_argument('--in-memory-max', type=int, default=5)
+    parser.add_argument('--max-memory', type=int, default=512, help='SUMMARY_MAX_MEMORY in MB for disk mode')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(args.run)
+        return
+
+    print(f"{'size':>6} {'variant':>8} {'sentences':>10} {'mode':>7} {'time (s)':>9} "
+          f"{'growth (MB)':>12} {'peak RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"{size}mb.txt")
+            make_text(path, size)
+            variants = [('disk', args.max_memory << 20)]
+            if size <= args.in_memory_max:
+                variants.insert(0, ('memory', 1 << 50))
+            for name, max_memory in variants:
+                env = dict(os.environ, SUMMARY_MAX_MEMORY=str(max_memory))
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', path], env=env,
+                                        check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                growth = (result['peak'] - result['baseline']) / (1 << 20)
+                print(f"{size:>4}MB {name:>8} {result['stats']['sentence_count']:>10} "
+                      f"{result['stats']['mode']:>7} {result['elapsed']:>9.1f} {growth:>12.0f} "
+                      f"{result['peak'] / (1 << 20):>14.0f}")
+
+if __name__ == '__main__':
+    main()
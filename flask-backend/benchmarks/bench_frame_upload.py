@@ -0,0 +1,90 @@
+"""Measure request CPU per video frame: base64 in JSON vs raw binary uploads.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_frame_upload.py [--sizes 50000 200000 1000000] [--frames 300]
+
+Posts --frames frames of each size to enhanced_mock_interview_app's
+/api/interview/process-frame through Flask's test client, once per
+upload form:
+
+    json         {"session_id": ..., "frame_data": "data:image/jpeg;base64,..."}
+    octet-stream the raw bytes, session and question in X-Session-Id and
+                 X-Question-Idx headers
+    multipart    a 'frame' file part, session and question as form fields
+
+and reports the process CPU time per frame and the bytes sent. Bodies are
+encoded before timing starts, so only the server's work is measured. The
+app's simulated analysis sleeps 100 ms without using CPU and is replaced by
+a fixed result; frames are saved under a temporary directory.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+BOUNDARY = 'frame-boundary-7d9a3c'
+
+def json_request(session_id, frame):
+    frame_data = 'data:image/jpeg;base64,' + base64.b64encode(frame).decode('ascii')
+    body = json.dumps({'session_id': session_id, 'question_idx': 0, 'frame_data': frame_data}).encode()
+    return body, 'application/json', {}
+
+def octet_stream_request(session_id, frame):
+    return frame, 'application/octet-stream', {'X-Session-Id': session_id, 'X-Question-Idx': '0'}
+
+def multipart_request(session_id, frame):
+    parts = []
+    for name, value in (('session_id', session_id), ('question_idx', '0')):
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="frame"; filename="frame.jpg"\r\n'
+                 'Content-Type: image/jpeg\r\n\r\n'.encode() + frame + b'\r\n')
+    parts.append(f'--{BOUNDARY}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={BOUNDARY}', {}
+
+FORMS = {'json': json_request, 'octet-stream': octet_stream_request, 'multipart': multipart_request}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50000, 200000, 1000000])
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    with tempfile.TemporaryDirectory() as directory:
+        # The app creates its questions and frames directories in the working directory
+        os.chdir(directory)
+
+        import enhanced_mock_interview_app as interview
+        interview.analyze_video_frame = lambda frame: {'eye_contact': 0.8, 'facial_expressions': 0.7,
+                                                       'posture': 0.9, 'engagement': 0.75}
+        client = interview.app.test_client()
+        session_id = client.post('/api/interview/start', json={'type': 'general'}).get_json()['interview_id']
+
+        print(f"{'frame (kB)':>10} {'form':>13} {'sent (kB)':>10} {'CPU/frame (ms)':>15} {'vs json':>8}")
+        for size in args.sizes:
+            frame = random.Random(size).randbytes(size)  # JPEG data is close to incompressible
+            json_cpu = None
+            for form, build in FORMS.items():
+                body, content_type, headers = build(session_id, frame)
+                for _ in range(5):
+                    client.post('/api/interview/process-frame', data=body, content_type=content_type, headers=headers)
+                start = time.process_time()
+                for _ in range(args.frames):
+                    response = client.post('/api/interview/process-frame', data=body,
+                                           content_type=content_type, headers=headers)
+                    assert response.status_code == 202, response.get_data(as_text=True)
+                cpu = (time.process_time() - start) / args.frames
+                json_cpu = json_cpu or cpu
+                print(f"{size / 1000:>10.0f} {form:>13} {len(body) / 1000:>10.0f} {cpu * 1000:>15.3f} "
+                      f"{cpu / json_cpu:>7.2f}x")
+        os.chdir(backend)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark re-summarizing an edited PDF against summarizing it from scratch.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_incremental.py [--pages 60] [--sentences-per-page 25] [--edited 2]
+
+Generates a document, then a copy with --edited pages rewritten. "cold"
+summarizes the edited copy with empty caches; "incremental" summarizes
+the original first and then the edited copy, timing only the second run.
+Both go through app.summarize_pdf_source, so the timings cover
+fingerprinting, extraction, tokenization, the similarity matrix and
+PageRank. Timings are the best of --runs.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+import app as backend
+from incremental import DocumentStateCache
+from summary_cache import SummaryCache, hash_source
+
+# Without punctuation, so every generated sentence is a whole sentence
+WORDS = [word.strip('.,;:!?()"') for word in
+         open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test_pdf_content.txt')).read().split()]
+WORDS = [word for word in WORDS if word]
+
+def page_paragraph(seed, sentences):
+    rng = random.Random(seed)
+    return ' '.join(' '.join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize().rstrip('.') + '.'
+                    for _ in range(sentences))
+
+def make_pdf(page_seeds, sentences_per_page):
+    """One paragraph per page, so editing a page's seed changes only that page"""
+    styles = getSampleStyleSheet()
+    elements = []
+    for seed in page_seeds:
+        elements += [Paragraph(page_paragraph(seed, sentences_per_page), styles['Normal']), PageBreak()]
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter, invariant=1).build(elements)
+    return buffer.getvalue()
+
+def summarize(pdf):
+    result = backend.summarize_pdf_source(pdf, hash_source(pdf), 5)[1]
+    return result['summary'], result['metadata']
+
+def fresh_caches(cache_dir):
+    backend.summary_cache = SummaryCache(cache_dir)
+    backend.document_states = DocumentStateCache(backend.app.config['INCREMENTAL_CACHE_BYTES'],
+                                                 backend.app.config['INCREMENTAL_MIN_SHARED_PAGES'])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--sentences-per-page', type=int, default=25)
+    parser.add_argument('--edited', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    seeds = list(range(args.pages))
+    edited_seeds = list(seeds)
+    for page in random.Random(3).sample(range(args.pages), args.edited):
+        edited_seeds[page] += 10000
+    original = make_pdf(seeds, args.sentences_per_page)
+    edited = make_pdf(edited_seeds, args.sentences_per_page)
+
+    cold_times, incremental_times = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        summarize(make_pdf([-1], 3))  # warm up imports and the extraction pool
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                fresh_caches(cache_dir)
+                start = time.perf_counter()
+                cold_summary, cold_metadata = summarize(edited)
+                cold_times.append(time.perf_counter() - start)
+            with tempfile.TemporaryDirectory() as cache_dir:
+                fresh_caches(cache_dir)
+                summarize(original)
+                start = time.perf_counter()
+                incremental_summary, metadata = summarize(edited)
+                incremental_times.append(time.perf_counter() - start)
+
+    print(f"{args.pages} pages, {metadata['sentence_count']} sentences ({metadata['mode']}), "
+          f"{args.edited} pages edited, best of {args.runs}")
+    print(f"{'cold':>12} {min(cold_times):8.3f}s  pagerank iterations {cold_metadata['pagerank_iterations']}")
+    print(f"{'incremental':>12} {min(incremental_times):8.3f}s  pagerank iterations {metadata['pagerank_iterations']}")
+    print(f"speedup {min(cold_times) / min(incremental_times):.1f}x, reuse {metadata['reuse']}, "
+          f"same summary: {'yes' if incremental_summary == cold_summary else 'NO'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Measure request latency of simple_app.py with debug logging on and a slow log reader.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_logging.py [--requests 3000] [--reader-bytes-per-second 100000]
+
+Each variant runs in a child process whose stdout (the log stream) is a
+pipe drained by this process at --reader-bytes-per-second, like a slow log
+shipper. The child posts test_document.pdf to /api/summarize --requests
+times through Flask's test client (cache hits after the first, the
+endpoint's most log-heavy path) and reports latency percentiles.
+
+    info           LOG_LEVEL=INFO, debug events filtered out
+    sync-debug     LOG_LEVEL=DEBUG written from the request thread (LOG_QUEUE_SIZE=0),
+                   which blocks like the old print calls
+    queue-debug    LOG_LEVEL=DEBUG through the bounded background queue
+    sampled-debug  queue-debug with LOG_DEBUG_SAMPLE_RATE=10
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+VARIANTS = {
+    'info': {'LOG_LEVEL': 'INFO'},
+    'sync-debug': {'LOG_LEVEL': 'DEBUG', 'LOG_QUEUE_SIZE': '0'},
+    'queue-debug': {'LOG_LEVEL': 'DEBUG'},
+    'sampled-debug': {'LOG_LEVEL': 'DEBUG', 'LOG_DEBUG_SAMPLE_RATE': '10'},
+}
+
+def run(requests, result_path):
+    """Post the test PDF requests times and write latency percentiles to result_path"""
+    import simple_app
+    import structured_logging
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test_document.pdf'), 'rb') as f:
+        pdf = f.read()
+    client = simple_app.app.test_client()
+    latencies = []
+    for _ in range(requests + 1):
+        start = time.perf_counter()
+        response = client.post('/api/summarize', data={'file': (io.BytesIO(pdf), 'test.pdf'), 'summary_length': '5'})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    latencies = sorted(latencies[1:])  # the first request extracts the PDF
+
+    handler = structured_logging._handler
+    with open(result_path, 'w') as f:
+        json.dump({'p50': statistics.median(latencies),
+                   'p99': latencies[int(len(latencies) * 0.99) - 1],
+                   'max': latencies[-1],
+                   'dropped': getattr(handler, 'dropped', 0)}, f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--reader-bytes-per-second', type=int, default=100000)
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument('--run', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(int(args.run[0]), args.run[1])
+        return
+
+    chunk = 4096
+    delay = chunk / args.reader_bytes_per_second
+    print(f"{args.requests} requests, log reader at {args.reader_bytes_per_second / 1000:.0f} kB/s")
+    print(f"{'variant':>14} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'log (kB)':>9} {'dropped':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.variants:
+            result_path = os.path.join(directory, f"{name}.json")
+            env = dict(os.environ, LOG_FORMAT='json', **VARIANTS[name])
+            child = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--run', str(args.requests),
+                                      result_path], stdout=subprocess.PIPE, env=env)
+            logged = 0
+            while True:
+                data = child.stdout.read1(chunk)
+                if not data:
+                    break
+                logged += len(data)
+                time.sleep(delay)
+            if child.wait() != 0:
+                raise RuntimeError(f"{name} failed")
+            with open(result_path) as f:
+                result = json.load(f)
+            print(f"{name:>14} {result['p50'] * 1000:>9.2f} {result['p99'] * 1000:>9.2f} "
+                  f"{result['max'] * 1000:>9.2f} {logged / 1000:>9.0f} {result['dropped']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+"""Time every stage of the three summarizers on a synthetic PDF corpus and record the results as JSON.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_pipeline.py [--pages 1 10 100 500 2000] [--sentence-words 8 25]
+        [--vocabulary 2000] [--output pipeline-results.json] [--compare baseline.json]
+
+The corpus is generated with create_test_pdf.create_synthetic_pdf: one PDF
+per --pages and --vocabulary combination, byte-identical for the same
+arguments and --seed (each PDF's SHA-256 is recorded, so results from
+different corpora are never compared). Every summarizer runs the same
+functions as its endpoint, stage by stage:
+
+    stage          app.py                      simple_app.py              simple_summarizer.py
+    extraction     page fingerprints + pages   extract_text_from_pdf      extract_text_from_pdf
+    tokenization   sentences, words, terms     sentences and words        split on '. '
+    similarity     dense matrix / sparse graph word frequencies           -
+    ranking        PageRank + selection        scores + selection         first sentences
+    serialization  JSON response body          JSON response body         JSON response body
+
+Caches are bypassed. Each stage's median and minimum over --repeat runs
+are written to --output together with the git revision, Python and
+library versions and the app's ranking settings. With --compare, stages
+whose median is more than --tolerance slower than in the baseline file
+(and by at least --min-seconds) are reported and the exit status is 1.
+"""
+import argparse
+import contextlib
+import datetime
+import hashlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import scipy
+
+import app as backend
+import simple_app
+import simple_summarizer
+from create_test_pdf import create_synthetic_pdf
+from pdf_extract import page_fingerprints
+
+STAGES = ('extraction', 'tokenization', 'similarity', 'ranking', 'serialization')
+
+def response_body(flask_app, text, summary, metadata=None):
+    """Serialize the summarize response exactly like the app's jsonify"""
+    payload = {'original_text': text, 'summary': summary, 'original_length': len(text),
+               'summary_length': len(summary)}
+    if metadata is not None:
+        payload['metadata'] = metadata
+    with flask_app.app_context():
+        return flask_app.json.dumps(payload)
+
+def app_stages(pdf, num_sentences):
+    """app.py's summarize_incrementally for a first upload, one stage at a time"""
+    stats = {}
+    text, _, _ = backend.extract_pdf_text(pdf, page_fingerprints(pdf))
+    yield 'extraction'
+
+    sentences = backend.split_sentences(text)
+    stats['sentence_count'] = len(sentences)
+    if backend.estimate_ranking_memory(len(text), len(sentences), len(text) // 10) > \
+            backend.app.config['SUMMARY_MAX_MEMORY']:
+        # Disk mode counts terms batch by batch while ranking, so there is
+        # no separate tokenization or similarity stage to time
+        batches = (sentences[start:start + 1000] for start in range(0, len(sentences), 1000))
+        yield 'tokenization'
+        summary = backend.summarize_sentence_batches(batches, num_sentences, stats)
+        yield 'ranking'
+    else:
+        term_matrix, _ = backend.build_term_matrix(backend.tokenize_words(sentences), backend.get_stop_words())
+        yield 'tokenization'
+
+        if term_matrix.shape[0] >= backend.app.config['SPARSE_MODE_MIN_SENTENCES']:
+            stats['mode'] = 'sparse'
+            graph = backend.build_sparse_similarity_graph(term_matrix)
+            stats['edge_count'] = int(graph.nnz)
+        else:
+            stats['mode'] = 'dense'
+            graph = backend.cosine_similarity_matrix(term_matrix)
+        yield 'similarity'
+
+        scores = backend.rank_sentences(graph, stats=stats)
+        summary = backend.select_summary(sentences, scores, num_sentences)
+        yield 'ranking'
+
+    body = response_body(backend.app, text, summary, stats)
+    yield 'serialization'
+    return text, summary, stats, len(body)
+
+def simple_app_stages(pdf, num_sentences):
+    """simple_app.py's generate_summary, one stage at a time"""
+    text = simple_app.extract_text_from_pdf(pdf)
+    yield 'extraction'
+
+    sentences = simple_app.tokenize_sentences(text)
+    token_lists = simple_app.tokenize_words(sentences)
+    yield 'tokenization'
+
+    word_freq = simple_app.calculate_word_frequency(token_lists)
+    yield 'similarity'
+
+    sentence_scores = simple_app.score_sentences(token_lists, word_freq)
+    top_indices = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
+    top_indices.sort(key=lambda x: x[0])
+    summary = ' '.join(sentences[idx] for idx, _ in top_indices)
+    yield 'ranking'
+
+    body = response_body(simple_app.app, text, summary)
+    yield 'serialization'
+    return text, summary, {'sentence_count': len(sentences)}, len(body)
+
+def simple_summarizer_stages(pdf, num_sentences):
+    """simple_summarizer.py's generate_summary, one stage at a time"""
+    text = simple_summarizer.extract_text_from_pdf(pdf)
+    yield 'extraction'
+
+    sentences = text.replace('\n', ' ').split('. ')
+    yield 'tokenization'
+
+    summary = '. '.join(sentences[:num_sentences]) + '.'
+    yield 'ranking'
+
+    body = response_body(simple_summarizer.app, text, summary)
+    yield 'serialization'
+    return text, summary, {'sentence_count': len(sentences)}, len(body)
+
+SUMMARIZERS = {
+    'app': (app_stages, backend.generate_summary),
+    'simple_app': (simple_app_stages, simple_app.generate_summary),
+    'simple_summarizer': (simple_summarizer_stages, simple_summarizer.generate_summary),
+}
+
+def time_stages(stages, pdf, num_sentences):
+    """Run a stage generator, returning the seconds per stage and its result"""
+    timings = {}
+    generator = stages(pdf, num_sentences)
+    start = time.perf_counter()
+    while True:
+        try:
+            stage = next(generator)
+        except StopIteration as finished:
+            return timings, finished.value
+        now = time.perf_counter()
+        timings[stage] = now - start
+        start = now
+
+def benchmark(name, pdf, num_sentences, repeat):
+    stages, generate_summary = SUMMARIZERS[name]
+    runs = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings, (text, summary, stats, body_length) = time_stages(stages, pdf, num_sentences)
+        runs.append(timings)
+
+    # The staged pipeline must pick the same sentences as the real one
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = generate_summary(text, num_sentences)
+    if summary != expected:
+        raise RuntimeError(f"{name}: staged summary differs from generate_summary")
+
+    result = {
+        'characters': len(text),
+        'sentences': stats['sentence_count'],
+        'response_bytes': body_length,
+        'stages': {},
+    }
+    if 'mode' in stats:
+        result['mode'] = stats['mode']
+    for stage in STAGES:
+        times = [timings[stage] for timings in runs if stage in timings]
+        if times:
+            result['stages'][stage] = {'median': statistics.median(times), 'min': min(times)}
+    totals = [sum(timings.values()) for timings in runs]
+    result['total'] = {'median': statistics.median(totals), 'min': min(totals)}
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'app_version': backend.summary_cache_version(),
+        'sparse_mode_min_sentences': backend.app.config['SPARSE_MODE_MIN_SENTENCES'],
+        'summary_max_memory': backend.app.config['SUMMARY_MAX_MEMORY'],
+    }
+
+def result_key(result):
+    corpus = result['corpus']
+    return (result['summarizer'], corpus['pages'], tuple(corpus['sentence_words']), corpus['vocabulary'],
+            corpus['seed'])
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Print stage-by-stage changes against baseline and return the number of regressions"""
+    previous = {result_key(result): result for result in baseline['results']}
+    regressions = 0
+    print(f"\nCompared with {baseline['environment'].get('git_revision') or 'baseline'} "
+          f"({baseline['created_at']})")
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        if old['corpus']['sha256'] != result['corpus']['sha256']:
+            print(f"{result['summarizer']:>18} {result['corpus']['pages']:>5}p: different corpus PDF, skipped")
+            continue
+        for stage, timing in result['stages'].items():
+            before = old['stages'].get(stage)
+            if before is None:
+                continue
+            change = timing['median'] / before['median'] - 1 if before['median'] else 0.0
+            regressed = change > tolerance and timing['median'] - before['median'] >= min_seconds
+            regressions += regressed
+            print(f"{result['summarizer']:>18} {result['corpus']['pages']:>5}p {stage:>14} "
+                  f"{before['median']:>9.4f}s -> {timing['median']:>9.4f}s {change:>+8.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 500, 2000])
+    parser.add_argument('--sentence-words', type=int, nargs=2, default=(8, 25), metavar=('MIN', 'MAX'))
+    parser.add_argument('--vocabulary', type=int, nargs='+', default=[2000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--summarizers', nargs='+', choices=list(SUMMARIZERS), default=list(SUMMARIZERS))
+    parser.add_argument('--num-sentences', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='pipeline-results.json')
+    parser.add_argument('--compare', help='results file of an earlier run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown of a stage median')
+    parser.add_argument('--min-seconds', type=float, default=0.005, help='ignore smaller slowdowns')
+    args = parser.parse_args()
+    if not all(1 <= pages <= 2000 for pages in args.pages):
+        parser.error('--pages must be between 1 and 2000')
+
+    # Warm up imports, tokenizers and the extraction pool
+    warm_up = io.BytesIO()
+    create_synthetic_pdf(warm_up, 1, seed=-1)
+    for name in args.summarizers:
+        benchmark(name, warm_up.getvalue(), args.num_sentences, 1)
+
+    results = []
+    print(f"{'summarizer':>18} {'pages':>5} {'vocab':>6} {'sentences':>9} "
+          + ' '.join(f"{stage:>13}" for stage in STAGES) + f" {'total':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for vocabulary in args.vocabulary:
+            for pages in args.pages:
+                path = os.path.join(directory, f"corpus-{pages}-{vocabulary}.pdf")
+                create_synthetic_pdf(path, pages, tuple(args.sentence_words), vocabulary, args.seed)
+                with open(path, 'rb') as file:
+                    pdf = file.read()
+                corpus = {'pages': pages, 'sentence_words': list(args.sentence_words), 'vocabulary': vocabulary,
+                          'seed': args.seed, 'bytes': len(pdf), 'sha256': hashlib.sha256(pdf).hexdigest()}
+                for name in args.summarizers:
+                    result = {'summarizer': name, 'corpus': corpus}
+                    result.update(benchmark(name, pdf, args.num_sentences, args.repeat))
+                    results.append(result)
+                    print(f"{name:>18} {pages:>5} {vocabulary:>6} {result['sentences']:>9} "
+                          + ' '.join(f"{result['stages'][stage]['median']:>12.4f}s" if stage in result['stages']
+                                     else f"{'-':>13}" for stage in STAGES)
+                          + f" {result['total']['median']:>8.3f}s")
+
+    report = {
+        'version': 1,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'settings': {'repeat': args.repeat, 'num_sentences': args.num_sentences},
+        'results': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance, args.min_seconds)
+        if regressions:
+            print(f"{regressions} stage(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Time expiring idle interview sessions: heap-based sweep vs the old full scan.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_session_expiry.py [--sessions 10000 100000 1000000] [--expire 100]
+
+The store holds --sessions sessions with distinct activity times, and a
+sweep expires the --expire oldest. The old cleanup parsed every
+session's last_activity with datetime.fromisoformat and compared it with
+the cutoff; MemorySessionStore.purge_inactive only pops the expired
+entries off its heap.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from session_store import MemorySessionStore
+
+def make_session(index, now):
+    return {
+        'type': 'general',
+        'questions': ['Tell me about yourself.'] * 5,
+        'answers': [None] * 5,
+        'feedback': [None] * 5,
+        'communication_scores': [None] * 5,
+        'start_time': now.isoformat(),
+        'last_activity': (now + timedelta(seconds=index)).isoformat(),
+    }
+
+def old_cleanup(sessions, cutoff):
+    """The removed cleanup_old_sessions loop body"""
+    sessions_to_remove = []
+    for session_id, session_data in sessions.items():
+        if datetime.fromisoformat(session_data['last_activity']) < cutoff:
+            sessions_to_remove.append(session_id)
+    for session_id in sessions_to_remove:
+        sessions.pop(session_id, None)
+    return sessions_to_remove
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--expire', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10} {'full scan (ms)':>15} {'heap sweep (ms)':>16} {'reclaimed (kB)':>15}")
+    for count in args.sessions:
+        now = datetime.now()
+        sessions = {str(index): make_session(index, now) for index in range(count)}
+        start = time.perf_counter()
+        removed = old_cleanup(sessions, now + timedelta(seconds=args.expire))
+        scan_seconds = time.perf_counter() - start
+        assert len(removed) == args.expire
+
+        # Activity times 0, 1, 2, ... on a fake clock, read at count + idle
+        store = MemorySessionStore()
+        fake_time = [0.0]
+        store.clock = lambda: fake_time[0]
+        for index in range(count):
+            fake_time[0] = float(index)
+            store.add(str(index), make_session(index, now))
+        fake_time[0] = count
+        start = time.perf_counter()
+        expired = store.purge_inactive(count - args.expire)
+        sweep_seconds = time.perf_counter() - start
+        assert len(expired) == args.expire
+
+        print(f"{count:>10} {scan_seconds * 1000:>15.2f} {sweep_seconds * 1000:>16.3f} "
+              f"{sum(size for _, size in expired) / 1000:>15.1f}")
+
+if __name__ == '__main__':
+    main()
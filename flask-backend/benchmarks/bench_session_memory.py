@@ -0,0 +1,150 @@
+"""Measure the memory held per interview session: nested dicts vs InterviewSession.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_session_memory.py [--sessions 10000 100000 1000000] [--state answered]
+
+Each (layout, count) is measured in its own child process as the growth
+of its peak RSS while building count sessions in a dict keyed by session
+ID, the way MemorySessionStore holds them.
+
+    dict             the previous layout: a dict per session with ISO
+                     timestamp strings, a dict of video and audio score
+                     dicts per question and a feedback dict (with a
+                     detailed_scores dict) per answer
+    InterviewSession __slots__, float timestamps, scores in one array('d')
+
+--state new measures freshly started sessions; answered measures
+sessions whose five questions all have video and audio scores and
+feedback. Answers and feedback texts are shared strings in both layouts,
+so only the per-session overhead is compared. A count whose estimated
+size, from the previous count, would not fit in available memory is
+skipped.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from interview_session import AUDIO_METRICS, VIDEO_METRICS, InterviewSession
+
+QUESTIONS = ["Tell me about yourself.", "What are your strengths and weaknesses?",
+             "Why do you want to work for this company?", "Where do you see yourself in 5 years?",
+             "Describe a challenging situation you faced and how you handled it."]
+ANSWER = "I led a small team through a difficult migration and learned a lot about planning."
+CONTENT_FEEDBACK = "Great answer! You provided clear examples and demonstrated your skills effectively."
+COMMUNICATION_FEEDBACK = ("Good eye contact.", "Your speaking pace was appropriate.")
+
+def random_scores(metrics, rng):
+    return {name: rng.uniform(0.4, 1.0) for name in metrics}
+
+def feedback_data(rng):
+    content_score = round(rng.uniform(5.0, 9.5), 1)
+    communication_score = round(rng.uniform(5.0, 9.5), 1)
+    return {
+        'content_feedback': CONTENT_FEEDBACK,
+        'communication_feedback': list(COMMUNICATION_FEEDBACK),
+        'content_score': content_score,
+        'communication_score': communication_score,
+        'overall_score': round(content_score * 0.4 + communication_score * 0.6, 1),
+        'detailed_scores': {
+            'content': content_score,
+            'eye_contact': round(rng.uniform(4, 10), 1),
+            'facial_expressions': round(rng.uniform(4, 10), 1),
+            'speaking_pace': round(rng.uniform(4, 10), 1),
+            'voice_clarity': round(rng.uniform(4, 10), 1),
+            'filler_words': round(rng.uniform(4, 10), 1)
+        }
+    }
+
+def dict_session(answered, rng):
+    session = {
+        'type': 'general',
+        'questions': list(QUESTIONS),
+        'answers': [None] * len(QUESTIONS),
+        'feedback': [None] * len(QUESTIONS),
+        'communication_scores': [None] * len(QUESTIONS),
+        'start_time': datetime.now().isoformat(),
+        'last_activity': datetime.now().isoformat()
+    }
+    if answered:
+        for question_idx in range(len(QUESTIONS)):
+            session['communication_scores'][question_idx] = {'video': random_scores(VIDEO_METRICS, rng),
+                                                             'audio': random_scores(AUDIO_METRICS, rng)}
+            session['answers'][question_idx] = ANSWER
+            session['feedback'][question_idx] = feedback_data(rng)
+            session['last_activity'] = datetime.now().isoformat()
+    return session
+
+def slotted_session(answered, rng):
+    session = InterviewSession('general', QUESTIONS)
+    if answered:
+        for question_idx in range(len(QUESTIONS)):
+            session.record_video(question_idx, random_scores(VIDEO_METRICS, rng))
+            session.record_audio(question_idx, random_scores(AUDIO_METRICS, rng))
+            session.record_feedback(question_idx, ANSWER, feedback_data(rng))
+            session.touch()
+    return session
+
+LAYOUTS = {'dict': dict_session, 'InterviewSession': slotted_session}
+
+def peak_rss():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def measure(layout, count, answered):
+    """Child process: build count sessions and print the RSS growth in bytes"""
+    rng = random.Random(0)
+    build = LAYOUTS[layout]
+    session_ids = [f"{index:016d}" for index in range(count)]
+    before = peak_rss()
+    start = time.perf_counter()
+    sessions = {session_id: build(answered, rng) for session_id in session_ids}
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'bytes': peak_rss() - before, 'seconds': elapsed, 'count': len(sessions)}))
+
+def available_memory():
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--state', choices=('new', 'answered'), default='answered')
+    parser.add_argument('--measure', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure[0], int(args.measure[1]), args.state == 'answered')
+        return
+
+    print(f"{args.state} sessions")
+    print(f"{'sessions':>10} {'layout':>17} {'bytes/session':>14} {'total (MB)':>11} {'build (s)':>10}")
+    for layout in LAYOUTS:
+        per_session = None
+        for count in sorted(args.sessions):
+            available = available_memory()
+            if per_session is not None and available is not None and per_session * count > 0.8 * available:
+                print(f"{count:>10} {layout:>17} {'skipped: needs ~' + format(per_session * count / 1e9, '.1f') + ' GB':>37}")
+                continue
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--state', args.state,
+                                     '--measure', layout, str(count)], capture_output=True, text=True, check=True)
+            result = json.loads(output.stdout)
+            per_session = result['bytes'] / count
+            print(f"{count:>10} {layout:>17} {per_session:>14.0f} {result['bytes'] / 1e6:>11.1f} "
+                  f"{result['seconds']:>10.2f}")
+
+if __name__ == '__main__':
+    main()
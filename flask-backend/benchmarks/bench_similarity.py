@@ -0,0 +1,110 @@
+"""Benchmark the vectorized similarity matrix against the pairwise implementation.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_similarity.py
+
+The pairwise baseline is a copy of the original sentence_similarity, which
+tokenized both sentences on every call and built list vectors; app's
+current version is not a fair stand-in. It is O(n^2 * L^2), so above a few
+hundred sentences it is timed on a random sample of sentence pairs and
+extrapolated to all n*(n-1) ordered pairs. Those rows are marked as
+estimated.
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nltk.cluster.util import cosine_distance
+from nltk.tokenize import word_tokenize
+
+from app import build_similarity_matrix
+
+SENTENCE_COUNTS = [100, 1000, 5000]
+MAX_BASELINE_PAIRS = 20000
+
+STOP_WORDS = ['the', 'a', 'an', 'of', 'to', 'and', 'in', 'is', 'that', 'it', 'for', 'on', 'with', 'as', 'by']
+
+def make_sentences(count, seed=42, vocabulary_size=3000, min_words=8, max_words=30):
+    """Generate deterministic pseudo-English sentences"""
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(vocabulary_size)] + STOP_WORDS * 20
+    sentences = []
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(min_words, max_words))
+        sentences.append(' '.join(words).capitalize() + '.')
+    return sentences
+
+def sentence_similarity(sent1, sent2, stopwords=None):
+    """The original pairwise implementation, kept as the baseline"""
+    if stopwords is None:
+        stopwords = []
+
+    try:
+        sent1 = [word.lower() for word in word_tokenize(sent1)]
+        sent2 = [word.lower() for word in word_tokenize(sent2)]
+    except LookupError:
+        sent1 = [word.lower() for word in re.findall(r'\b\w+\b', sent1.lower())]
+        sent2 = [word.lower() for word in re.findall(r'\b\w+\b', sent2.lower())]
+
+    all_words = list(set(sent1 + sent2))
+
+    vector1 = [0] * len(all_words)
+    vector2 = [0] * len(all_words)
+
+    for w in sent1:
+        if w not in stopwords:
+            vector1[all_words.index(w)] += 1
+
+    for w in sent2:
+        if w not in stopwords:
+            vector2[all_words.index(w)] += 1
+
+    if sum(vector1) == 0 or sum(vector2) == 0:
+        return 0.0
+    return 1 - cosine_distance(vector1, vector2)
+
+def time_pairwise(sentences, seed=7):
+    """Time the pairwise baseline, sampling pairs when the full run is too slow"""
+    n = len(sentences)
+    total_pairs = n * (n - 1)
+    if total_pairs <= MAX_BASELINE_PAIRS:
+        pairs = [(i, j) for i in range(n) for j in range(n) if i != j]
+        estimated = False
+    else:
+        rng = random.Random(seed)
+        pairs = []
+        while len(pairs) < MAX_BASELINE_PAIRS:
+            i, j = rng.randrange(n), rng.randrange(n)
+            if i != j:
+                pairs.append((i, j))
+        estimated = True
+
+    start = time.perf_counter()
+    for i, j in pairs:
+        sentence_similarity(sentences[i], sentences[j], STOP_WORDS)
+    elapsed = time.perf_counter() - start
+
+    return elapsed * total_pairs / len(pairs), estimated
+
+def time_vectorized(sentences):
+    start = time.perf_counter()
+    build_similarity_matrix(sentences, STOP_WORDS)
+    return time.perf_counter() - start
+
+def main():
+    print(f"{'sentences':>10} {'pairwise (s)':>16} {'vectorized (s)':>16} {'speedup':>10}")
+    for count in SENTENCE_COUNTS:
+        sentences = make_sentences(count)
+        vectorized = time_vectorized(sentences)
+        pairwise, estimated = time_pairwise(sentences)
+        marker = '*' if estimated else ' '
+        print(f"{count:>10} {pairwise:>15.2f}{marker} {vectorized:>16.4f} {pairwise / vectorized:>9.0f}x")
+    print("* estimated from a sample of sentence pairs")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Measure time-to-first-useful-byte of /api/summarize/stream against /api/summarize.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_stream.py [--paragraphs 1500] [--runs 3]
+
+Both endpoints summarize the same generated PDF behind a real threaded
+Werkzeug server, with an empty summary cache for every run. For the
+blocking endpoint every milestone is the full response time. For the
+stream it is the arrival of the first byte, the first extraction progress
+event, the provisional frequency summary and the final TextRank summary.
+Reported times are medians over --runs.
+"""
+import argparse
+import http.client
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import app as backend
+from bench_batch import encode_multipart, make_pdf
+from pdf_extract import count_pages
+from summary_cache import SummaryCache
+
+MILESTONES = ('first byte', 'first progress', 'provisional', 'summary')
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def post(port, path, pdf):
+    body, content_type = encode_multipart([('document.pdf', pdf)], 'file')
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request('POST', path, body=body, headers={'Content-Type': content_type})
+    return connection, connection.getresponse()
+
+def time_blocking(port, pdf):
+    start = time.perf_counter()
+    connection, response = post(port, '/api/summarize', pdf)
+    response.read()
+    connection.close()
+    elapsed = time.perf_counter() - start
+    return {milestone: elapsed for milestone in MILESTONES}
+
+def time_stream(port, pdf):
+    start = time.perf_counter()
+    connection, response = post(port, '/api/summarize/stream', pdf)
+    times = {}
+    event = None
+    while True:
+        line = response.readline()
+        if not line:
+            break
+        elapsed = time.perf_counter() - start
+        times.setdefault('first byte', elapsed)
+        if line.startswith(b'event: '):
+            event = line[7:].strip().decode()
+            if event in ('extracting', 'pages'):
+                times.setdefault('first progress', elapsed)
+            elif event == 'provisional':
+                times.setdefault('provisional', elapsed)
+        elif line.startswith(b'data: ') and event == 'summary':
+            times['summary'] = time.perf_counter() - start
+        elif line.startswith(b'data: ') and event == 'error':
+            raise RuntimeError(line.decode())
+    connection.close()
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paragraphs', type=int, default=1500)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    pdf = make_pdf(args.paragraphs, seed=11)
+    server = make_server('127.0.0.1', 0, backend.app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    try:
+        # Warm up imports, NLTK data and the extraction pool
+        time_blocking(port, make_pdf(2, seed=-1))
+        results = {}
+        for name, run in (('blocking', time_blocking), ('stream', time_stream)):
+            runs = []
+            for _ in range(args.runs):
+                with tempfile.TemporaryDirectory() as cache_dir:
+                    backend.summary_cache = SummaryCache(cache_dir)
+                    runs.append(run(port, pdf))
+            results[name] = {milestone: statistics.median(r[milestone] for r in runs) for milestone in MILESTONES}
+    finally:
+        server.shutdown()
+
+    pages = count_pages(pdf)
+    print(f"{len(pdf)} byte PDF, {pages} pages, median of {args.runs} runs")
+    print(f"{'milestone':>16} {'blocking (s)':>13} {'stream (s)':>11}")
+    for milestone in MILESTONES:
+        print(f"{milestone:>16} {results['blocking'][milestone]:>13.3f} {results['stream'][milestone]:>11.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Microbenchmark every tokenization stage: per-call regexes and stopword lists vs the shared layer.
+
+Run from the flask-backend directory:
+
+    python benchmarks/bench_tokenize.py [--sentences 5000] [--repeat 5]
+
+The "before" column re-implements the previous code paths: module-level
+re.sub/re.findall calls, stopwords as a list, and simple_app tokenizing
+every sentence again for each scoring pass. The "after" column uses
+tokenization.py. Each stage reports the best of --repeat runs, and the
+last line compares the memory held by one document's token lists.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import simple_app
+from app import sentence_similarity
+from nltk_resources import BUNDLED_STOP_WORDS
+from textrank import build_term_matrix
+from tokenization import tokenize_sentences_words, tokenize_words, without_stop_words
+
+PAIRWISE_PAIRS = 2000
+
+def make_document(count, seed=42, vocabulary_size=3000, min_words=8, max_words=30):
+    """Generate deterministic pseudo-English text with real stop words mixed in"""
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(vocabulary_size)] + sorted(BUNDLED_STOP_WORDS) * 10
+    sentences = []
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(min_words, max_words))
+        sentences.append(' '.join(words).capitalize() + '.')
+    return '\n'.join(' '.join(sentences[i:i + 5]) for i in range(0, count, 5))
+
+def old_tokenize_sentences(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'(Mr\.|Mrs\.|Dr\.|Prof\.|etc\.)', lambda m: m.group(0).replace('.', '<DOT>'), text)
+    sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z]|$)', text)
+    sentences = [s.replace('<DOT>', '.') for s in sentences]
+    return [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
+
+def old_tokenize_words(text):
+    return re.findall(r'\b\w+\b', text.lower())
+
+def old_frequency_scores(sentences):
+    """simple_app before: tokenize for the frequency pass, then again for scoring"""
+    word_freq = {}
+    for sentence in sentences:
+        for word in old_tokenize_words(sentence):
+            if word not in word_freq:
+                word_freq[word] = 1
+            else:
+                word_freq[word] += 1
+    sentence_scores = {}
+    for i, sentence in enumerate(sentences):
+        words = old_tokenize_words(sentence)
+        if words:
+            sentence_scores[i] = sum(word_freq.get(word, 0) for word in words) / len(words)
+    return sentence_scores
+
+def new_frequency_scores(sentences):
+    token_lists = simple_app.tokenize_words(sentences)
+    return simple_app.score_sentences(token_lists, simple_app.calculate_word_frequency(token_lists))
+
+def old_sentence_similarity(sent1, sent2, stopwords):
+    sent1 = [word.lower() for word in re.findall(r'\b\w+\b', sent1.lower())]
+    sent2 = [word.lower() for word in re.findall(r'\b\w+\b', sent2.lower())]
+    all_words = list(set(sent1 + sent2))
+    vector1 = [0] * len(all_words)
+    vector2 = [0] * len(all_words)
+    for w in sent1:
+        if w not in stopwords:
+            vector1[all_words.index(w)] += 1
+    for w in sent2:
+        if w not in stopwords:
+            vector2[all_words.index(w)] += 1
+    if sum(vector1) == 0 or sum(vector2) == 0:
+        return 0.0
+    dot = sum(a * b for a, b in zip(vector1, vector2))
+    return dot / (sum(a * a for a in vector1) ** 0.5 * sum(b * b for b in vector2) ** 0.5)
+
+def best_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        # simple_app logs every call; keep that out of the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = function()
+            timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def retained_bytes(function):
+    """Memory still held by the result of function()"""
+    tracemalloc.start()
+    try:
+        result = function()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sentences', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_document(args.sentences)
+    sentences = old_tokenize_sentences(text)
+    stop_word_list = sorted(BUNDLED_STOP_WORDS)
+    old_tokens = [old_tokenize_words(sentence) for sentence in sentences]
+    new_tokens = tokenize_sentences_words(sentences)
+    rng = random.Random(7)
+    pairs = [(rng.randrange(len(sentences)), rng.randrange(len(sentences))) for _ in range(PAIRWISE_PAIRS)]
+
+    stages = [
+        ('sentence split', lambda: old_tokenize_sentences(text),
+         lambda: simple_app.tokenize_sentences(text)),
+        ('word tokenize', lambda: [old_tokenize_words(sentence) for sentence in sentences],
+         lambda: [tokenize_words(sentence) for sentence in sentences]),
+        ('stopword filter', lambda: [[w for w in tokens if w not in stop_word_list] for tokens in old_tokens],
+         lambda: [without_stop_words(tokens, BUNDLED_STOP_WORDS) for tokens in new_tokens]),
+        ('term matrix', lambda: build_term_matrix(old_tokens, BUNDLED_STOP_WORDS),
+         lambda: build_term_matrix(new_tokens, BUNDLED_STOP_WORDS)),
+        ('frequency scoring', lambda: old_frequency_scores(sentences),
+         lambda: new_frequency_scores(sentences)),
+        (f'pairwise x{PAIRWISE_PAIRS}', lambda: [old_sentence_similarity(sentences[i], sentences[j], stop_word_list)
+                                                 for i, j in pairs],
+         lambda: [sentence_similarity(sentences[i], sentences[j], stop_word_list) for i, j in pairs]),
+    ]
+
+    print(f"{len(sentences)} sentences, {sum(map(len, old_tokens))} tokens, best of {args.repeat}")
+    print(f"{'stage':>20} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8} {'same':>5}")
+    for name, before, after in stages:
+        before_time, before_result = best_time(before, args.repeat)
+        after_time, after_result = best_time(after, args.repeat)
+        if name == 'term matrix':
+            same = (before_result[0] != after_result[0]).nnz == 0
+        elif name.startswith('pairwise'):
+            same = max(abs(a - b) for a, b in zip(before_result, after_result)) < 1e-12
+        else:
+            same = before_result == after_result
+        print(f"{name:>20} {before_time * 1000:>12.1f} {after_time * 1000:>12.1f} "
+              f"{before_time / after_time:>7.1f}x {'yes' if same else 'NO':>5}")
+
+    # Interning makes repeated words share one string object across all token lists
+    before_bytes = retained_bytes(lambda: [old_tokenize_words(sentence) for sentence in sentences])
+    after_bytes = retained_bytes(lambda: tokenize_sentences_words(sentences))
+    print(f"token lists held in memory: {before_bytes / 1e6:.1f} MB before, {after_bytes / 1e6:.1f} MB after")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Load test frame and audio uploads with the interview app's 100 ms simulated analysis.
+
+Run from the flask-backend directory (Linux or macOS):
+
+    python benchmarks/load_test_analysis.py [--clients 16] [--frames 60] [--fps 30]
+                                            [--backend-dir DIR]
+
+enhanced_mock_interview_app is started with serve.py (one worker, 32
+threads). Each client starts a session, then posts --frames frames to
+/api/interview/process-frame at up to --fps frames per second, with an
+audio chunk to /api/interview/process-audio after every fifth, and
+finally asks /api/interview/feedback for the question. A client sends its
+next request once the previous one is answered, as a browser with one
+upload in flight would.
+
+Reported: the upload rate each client achieved, upload latency, and
+feedback latency (which includes waiting for the question's outstanding
+analysis). To compare with synchronous analysis, check out an earlier
+commit (git worktree add /tmp/before <commit>) and pass its flask-backend
+directory as --backend-dir.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from load_test_serving import BACKEND_DIR, post, start_server, stop_server
+
+PORT = 5001
+
+def client(base_url, args):
+    start_body = json.dumps({'type': 'general'}).encode()
+    session_id = json.loads(post(f"{base_url}/api/interview/start", start_body, 'application/json'))['interview_id']
+    frame = json.dumps({'session_id': session_id, 'question_idx': 0,
+                        'frame_data': 'data:image/jpeg;base64,' + 'A' * 4000}).encode()
+    audio = json.dumps({'session_id': session_id, 'question_idx': 0, 'audio_data': 'A' * 4000}).encode()
+
+    upload_latencies = []
+    start = time.perf_counter()
+    for index in range(args.frames):
+        delay = start + index / args.fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+        post(f"{base_url}/api/interview/process-frame", frame, 'application/json')
+        if index % 5 == 4:
+            post(f"{base_url}/api/interview/process-audio", audio, 'application/json')
+        upload_latencies.append(time.perf_counter() - sent)
+    upload_seconds = time.perf_counter() - start
+
+    feedback = json.dumps({'session_id': session_id, 'question_idx': 0, 'question': 'Tell me about yourself.',
+                           'answer': 'I have led several projects and enjoy solving hard problems.'}).encode()
+    sent = time.perf_counter()
+    post(f"{base_url}/api/interview/feedback", feedback, 'application/json')
+    return args.frames / upload_seconds, upload_latencies, time.perf_counter() - sent
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--frames', type=int, default=60, help='frames per client')
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--backend-dir', default=BACKEND_DIR, help='flask-backend directory to serve from')
+    args = parser.parse_args()
+
+    backend_dir = os.path.abspath(args.backend_dir)
+    command = [sys.executable, os.path.join(backend_dir, 'serve.py'), 'interview', '--app', 'enhanced_mock_interview_app',
+               '--port', str(PORT), '--workers', '1', '--threads', '32']
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+    process = start_server(command, PORT, env)
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = list(pool.map(lambda _: client(f"http://127.0.0.1:{PORT}", args), range(args.clients)))
+    finally:
+        stop_server(process)
+
+    rates = [rate for rate, _, _ in results]
+    uploads = [latency for _, latencies, _ in results for latency in latencies]
+    feedback = [latency for _, _, latency in results]
+    print(f"{backend_dir}: {args.clients} clients x {args.frames} frames at up to {args.fps:g} fps, "
+          f"{os.cpu_count()} CPUs")
+    print(f"  frames/s per client: mean {sum(rates) / len(rates):.1f}, min {min(rates):.1f}")
+    print(f"  upload latency (ms): p50 {percentile(uploads, 0.50) * 1000:.1f}, p99 {percentile(uploads, 0.99) * 1000:.1f}")
+    print(f"  feedback latency (ms): p50 {percentile(feedback, 0.50) * 1000:.1f}, "
+          f"max {max(feedback) * 1000:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Measure how large summarizations affect other routes: inline /api/summarize vs background jobs.
+
+Run from the flask-backend directory:
+
+    python benchmarks/load_test_jobs.py [--uploads 6] [--paragraphs 300] [--probes 200]
+
+Each variant starts a real threaded Werkzeug server, fires --uploads large
+PDFs at once (inline: POST /api/summarize and wait; jobs: POST
+/api/summarize/jobs and poll until done), and meanwhile sends a small
+/api/summarize-text request every 50 ms. It reports the probe latencies
+and the time until every large summary was available. Every variant gets
+its own freshly generated PDFs and an empty summary cache.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import app as backend
+from bench_batch import make_pdf, post
+from summary_cache import SummaryCache
+
+PROBE_TEXT = json.dumps({'text': 'Short texts should stay fast. ' * 20, 'summary_length': 2}).encode()
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def summarize_inline(base_url, pdf):
+    with post(f"{base_url}/api/summarize", [('large.pdf', pdf)], 'file') as response:
+        response.read()
+
+def summarize_job(base_url, pdf):
+    with post(f"{base_url}/api/summarize/jobs", [('large.pdf', pdf)], 'file') as response:
+        location = response.headers['Location']
+    while True:
+        with urllib.request.urlopen(base_url + location) as response:
+            job = json.loads(response.read())
+        if job['status'] not in ('queued', 'running'):
+            return
+        time.sleep(0.1)
+
+def probe(base_url):
+    request = urllib.request.Request(f"{base_url}/api/summarize-text", data=PROBE_TEXT,
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+def run_variant(base_url, summarize, pdfs, probes):
+    latencies = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(pdfs)) as pool:
+        uploads = [pool.submit(summarize, base_url, pdf) for pdf in pdfs]
+        while len(latencies) < probes and not all(upload.done() for upload in uploads):
+            latencies.append(probe(base_url))
+            time.sleep(0.05)
+        for upload in uploads:
+            upload.result()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return latencies, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uploads', type=int, default=6)
+    parser.add_argument('--paragraphs', type=int, default=300)
+    parser.add_argument('--probes', type=int, default=200)
+    args = parser.parse_args()
+
+    server = make_server('127.0.0.1', 0, backend.app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{args.uploads} concurrent PDFs of {args.paragraphs} paragraphs, "
+          f"JOB_WORKERS={backend.app.config['JOB_WORKERS']}, {os.cpu_count()} CPUs")
+    print(f"{'variant':>8} {'probes':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'all done (s)':>13}")
+    try:
+        summarize_inline(base_url, make_pdf(2, seed=-1))
+        for variant, (name, summarize) in enumerate((('inline', summarize_inline), ('jobs', summarize_job))):
+            pdfs = [make_pdf(args.paragraphs, seed=variant * 1000 + index) for index in range(args.uploads)]
+            with tempfile.TemporaryDirectory() as cache_dir:
+                backend.summary_cache = SummaryCache(cache_dir)
+                latencies, elapsed = run_variant(base_url, summarize, pdfs, args.probes)
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            print(f"{name:>8} {len(latencies):>7} {p50:>9.1f} {p99:>9.1f} {latencies[-1] * 1000:>9.1f} {elapsed:>13.2f}")
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
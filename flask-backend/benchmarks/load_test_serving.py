@@ -0,0 +1,141 @@
+"""Load test app.run (the Werkzeug debug server) against serve.py.
+
+Run from the flask-backend directory (Linux or macOS):
+
+    python benchmarks/load_test_serving.py summarizer [--requests 400] [--concurrency 16] [--workers N] [--threads N]
+    python benchmarks/load_test_serving.py interview [--app enhanced_mock_interview_app] [--requests 4000]
+
+Each variant is started as its own server process on the service's port:
+
+    app.run   python <module>.py, as in development (debug mode, reloader on)
+    serve     python serve.py <service> with --workers and --threads
+
+The summarizer workload posts --pages pages of synthetic text to
+/api/summarize-text, which is CPU-bound and never cached. The interview
+workload starts one session per client and posts frames to
+/api/interview/process-frame. Every request opens a new connection.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from create_test_pdf import generate_pages
+from serve import SERVICES
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def start_server(command, port, env):
+    # A new session, so the debug server's reloader child is stopped with it
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1):
+                return process
+        except (urllib.error.URLError, ConnectionError):
+            if process.poll() is not None:
+                raise RuntimeError(f"{' '.join(command)} exited with {process.returncode}")
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"{' '.join(command)} did not start")
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+def post(url, body, content_type):
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+    with urllib.request.urlopen(req, timeout=120) as response:
+        return response.read()
+
+def summarizer_workload(base_url, args):
+    text = ' '.join(generate_pages(args.pages)).encode()
+    url = f"{base_url}/api/summarize-text?summary_length=5"
+    return lambda client: post(url, text, 'text/plain')
+
+def interview_workload(base_url, args):
+    start_body = json.dumps({'type': 'general'}).encode()
+    sessions = [json.loads(post(f"{base_url}/api/interview/start", start_body, 'application/json'))['interview_id']
+                for _ in range(args.concurrency)]
+    frames = [json.dumps({'session_id': session_id, 'question_idx': 0, 'frame': 'data:image/jpeg;base64,'}).encode()
+              for session_id in sessions]
+    url = f"{base_url}/api/interview/process-frame"
+    return lambda client: post(url, frames[client], 'application/json')
+
+WORKLOADS = {'summarizer': summarizer_workload, 'interview': interview_workload}
+
+def run_load(base_url, args):
+    request = WORKLOADS[args.service](base_url, args)
+    request(0)  # warm-up
+
+    def client(index):
+        latencies = []
+        for _ in range(index, args.requests, args.concurrency):
+            start = time.perf_counter()
+            request(index)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = sorted(latency for result in pool.map(client, range(args.concurrency)) for latency in result)
+    elapsed = time.perf_counter() - start
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return len(latencies) / elapsed, percentile(0.50), percentile(0.99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('service', choices=list(SERVICES))
+    parser.add_argument('--app', help='module to serve (default: the service default of serve.py)')
+    parser.add_argument('--requests', type=int)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--pages', type=int, default=2, help='pages of text per summarizer request')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--threads', type=int)
+    parser.add_argument('--variants', nargs='+', choices=('app.run', 'serve'), default=['app.run', 'serve'])
+    args = parser.parse_args()
+    if args.requests is None:
+        args.requests = 400 if args.service == 'summarizer' else 4000
+
+    service = SERVICES[args.service]
+    module_name = args.app or service['apps'][0]
+    port = service['port']
+    serve_command = [sys.executable, 'serve.py', args.service, '--app', module_name, '--port', str(port)]
+    if args.workers:
+        serve_command += ['--workers', str(args.workers)]
+    if args.threads:
+        serve_command += ['--threads', str(args.threads)]
+    commands = {'app.run': [sys.executable, f"{module_name}.py"], 'serve': serve_command}
+    # Keep the request path identical: only warnings reach the log pipe
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+
+    print(f"{args.service} ({module_name}), {args.requests} requests, concurrency {args.concurrency}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'variant':>10} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for name in args.variants:
+        process = start_server(commands[name], port, env)
+        try:
+            throughput, p50, p99 = run_load(f"http://127.0.0.1:{port}", args)
+        finally:
+            stop_server(process)
+        print(f"{name:>10} {throughput:>10.1f} {p50:>10.1f} {p99:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Load test streaming interview frames: an HTTP POST per frame vs one WebSocket per session.
+
+Run from the flask-backend directory (Linux):
+
+    python benchmarks/load_test_stream.py [--app simple_interview_app] [--clients 16] [--frames 100]
+                                          [--fps 10] [--frame-bytes 20000]
+
+The app is started with serve.py (one worker). Each client starts a
+session and sends --frames frames of --frame-bytes bytes at --fps:
+
+    http    a POST to /api/interview/process-frame per frame, base64 in
+            JSON on a new connection, as the browser sends them today
+    stream  binary messages on one /api/interview/stream WebSocket, with
+            scores pushed back
+
+Reported per mode: frames sent, scores received, frames dropped as stale,
+the latency from sending a frame to its scores, and the server's CPU time
+per frame (from /proc). Latency is only paired up on connections where
+nothing was dropped. With enhanced_mock_interview_app, whose analysis
+takes 100 ms, frames at more than 10 fps are dropped rather than queued,
+and an http "score" is only the acknowledgement that the frame is queued.
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from load_test_serving import post, start_server, stop_server
+
+PORT = 5001
+
+def server_cpu_seconds(process_group):
+    """User plus system CPU seconds of every process in the server's process group"""
+    ticks = 0
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) == process_group:  # pgrp
+            ticks += int(fields[11]) + int(fields[12])  # utime, stime
+    return ticks / os.sysconf('SC_CLK_TCK')
+
+def paced(frames, fps):
+    """Yield frame indexes, sleeping so they go out at fps"""
+    start = time.perf_counter()
+    for index in range(frames):
+        delay = start + index / fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield index
+
+def http_client(base_url, session_id, frame, args):
+    body = json.dumps({'session_id': session_id, 'question_idx': 0,
+                       'frame_data': 'data:image/jpeg;base64,' + base64.b64encode(frame).decode()}).encode()
+    latencies = []
+    for _ in paced(args.frames, args.fps):
+        start = time.perf_counter()
+        post(f"{base_url}/api/interview/process-frame", body, 'application/json')
+        latencies.append(time.perf_counter() - start)
+    return {'sent': args.frames, 'scores': args.frames, 'dropped': 0, 'latencies': latencies}
+
+def stream_client(base_url, session_id, frame, args):
+    from simple_websocket import Client
+
+    ws = Client.connect(f"{base_url.replace('http', 'ws', 1)}/api/interview/stream?session_id={session_id}")
+    message = b'\x01' + frame
+    sent_at = []
+    received = []  # (time, scores message)
+
+    def receive():
+        while True:
+            text = ws.receive(timeout=5)
+            if text is None:
+                return
+            received.append((time.perf_counter(), json.loads(text)))
+            if len(received) + received[-1][1].get('dropped', 0) >= args.frames:
+                return
+
+    receiver = threading.Thread(target=receive)
+    receiver.start()
+    for _ in paced(args.frames, args.fps):
+        sent_at.append(time.perf_counter())
+        ws.send(message)
+    receiver.join()
+    ws.close()
+
+    dropped = received[-1][1].get('dropped', 0) if received else 0
+    latencies = []
+    if not dropped:
+        latencies = [arrived - sent for (arrived, _), sent in zip(received, sent_at)]
+    return {'sent': args.frames, 'scores': len(received), 'dropped': dropped, 'latencies': latencies}
+
+CLIENTS = {'http': http_client, 'stream': stream_client}
+
+def run(mode, base_url, args):
+    start_body = json.dumps({'type': 'general'}).encode()
+    sessions = [json.loads(post(f"{base_url}/api/interview/start", start_body, 'application/json'))['interview_id']
+                for _ in range(args.clients)]
+    frame = os.urandom(args.frame_bytes)
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(lambda session_id: CLIENTS[mode](base_url, session_id, frame, args), sessions))
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    return {
+        'sent': sum(result['sent'] for result in results),
+        'scores': sum(result['scores'] for result in results),
+        'dropped': sum(result['dropped'] for result in results),
+        'latencies': latencies,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default='simple_interview_app')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--frames', type=int, default=100, help='frames per client')
+    parser.add_argument('--fps', type=float, default=10)
+    parser.add_argument('--frame-bytes', type=int, default=20000)
+    parser.add_argument('--modes', nargs='+', choices=list(CLIENTS), default=list(CLIENTS))
+    args = parser.parse_args()
+
+    command = [sys.executable, 'serve.py', 'interview', '--app', args.app, '--port', str(PORT), '--workers', '1']
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+    print(f"{args.app}: {args.clients} clients x {args.frames} frames of {args.frame_bytes} bytes at {args.fps:g} fps, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'mode':>7} {'sent':>7} {'scores':>7} {'dropped':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'CPU/frame (ms)':>15}")
+    for mode in args.modes:
+        process = start_server(command, PORT, env)
+        try:
+            cpu_before = server_cpu_seconds(process.pid)
+            result = run(mode, f"http://127.0.0.1:{PORT}", args)
+            cpu = server_cpu_seconds(process.pid) - cpu_before
+        finally:
+            stop_server(process)
+        latencies = result['latencies']
+
+        def percentile(p):
+            if not latencies:
+                return '-'
+            return f"{latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000:.1f}"
+
+        print(f"{mode:>7} {result['sent']:>7} {result['scores']:>7} {result['dropped']:>8} {percentile(0.50):>9} "
+              f"{percentile(0.99):>9} {cpu / result['sent'] * 1000:>15.2f}")
+
+if __name__ == '__main__':
+    main()
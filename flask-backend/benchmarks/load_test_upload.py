@@ -0,0 +1,113 @@
+"""Load test the PDF upload path: save-to-disk (old) vs in-memory buffer (new).
+
+Run from the flask-backend directory:
+
+    python benchmarks/load_test_upload.py [--pdf test_document.pdf] [--requests 200] [--concurrency 8]
+
+Both variants run behind a real threaded Werkzeug server and use the same
+pdf_extract/generate_summary code, so the only difference is how the
+upload reaches PyPDF2: the old handler saves it under UPLOAD_FOLDER,
+reopens it and deletes it; the new one parses it straight from memory.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+from werkzeug.utils import secure_filename
+
+import simple_summarizer
+from pdf_extract import extract_text_from_pdf
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def make_disk_app():
+    """The pre-change handler: save, reopen from disk, remove"""
+    app = Flask('disk_upload')
+    app.config['UPLOAD_FOLDER'] = simple_summarizer.UPLOAD_FOLDER
+
+    @app.route('/api/summarize', methods=['POST'])
+    def summarize_pdf():
+        file = request.files['file']
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(file.filename))
+        file.save(file_path)
+        try:
+            text = extract_text_from_pdf(file_path, page_separator="\n")
+            summary = simple_summarizer.generate_summary(text, int(request.form.get('summary_length', 5)))
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        return jsonify({'summary': summary})
+
+    return app
+
+def encode_multipart(pdf_bytes, filename):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + pdf_bytes + (
+        f"\r\n--{boundary}\r\n"
+        'Content-Disposition: form-data; name="summary_length"\r\n\r\n'
+        f"5\r\n--{boundary}--\r\n"
+    ).encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def run_load(app, pdf_bytes, total_requests, concurrency):
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/summarize"
+
+    def one_request(index):
+        # Unique names keep the old handler from deleting another request's file
+        body, content_type = encode_multipart(pdf_bytes, f"load-test-{index}.pdf")
+        req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+        start = time.perf_counter()
+        with urllib.request.urlopen(req) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    try:
+        # Warm up the extraction pool and imports before measuring
+        one_request(-1)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = sorted(pool.map(one_request, range(total_requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return total_requests / elapsed, percentile(0.50), percentile(0.99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf', default='test_document.pdf')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    with open(args.pdf, 'rb') as f:
+        pdf_bytes = f.read()
+
+    print(f"{len(pdf_bytes)} byte PDF, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'variant':>10} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for name, app in (('disk', make_disk_app()), ('memory', simple_summarizer.app)):
+        throughput, p50, p99 = run_load(app, pdf_bytes, args.requests, args.concurrency)
+        print(f"{name:>10} {throughput:>10.1f} {p50:>10.1f} {p99:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Create many interview sessions from many threads and check that none was overwritten.
+
+Run from the flask-backend directory:
+
+    python benchmarks/stress_session_ids.py [--sessions 100000] [--threads 16] [--stores memory sqlite]
+
+Every thread creates its share of sessions with create_session, each
+session tagged with its creator and sequence number. Afterwards every
+returned ID must be distinct, the store must hold exactly --sessions
+sessions, and each ID must still map to the session created under it.
+For comparison, the old random.randint(1000, 9999) IDs are drawn as many
+times and the overwrites they would have caused are counted. Exits 1 if
+any check fails.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from session_store import MemorySessionStore, SQLiteSessionStore, create_session
+
+def stress(store, sessions, threads):
+    """Create sessions from threads threads; return (seconds, [(creator, sequence, session_id)])"""
+    created = [[] for _ in range(threads)]
+    start_barrier = threading.Barrier(threads + 1)
+
+    def create(creator):
+        start_barrier.wait()
+        for sequence in range(creator, sessions, threads):
+            session_id = create_session(store, {'creator': creator, 'sequence': sequence})
+            created[creator].append((creator, sequence, session_id))
+
+    workers = [threading.Thread(target=create, args=(creator,)) for creator in range(threads)]
+    for worker in workers:
+        worker.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, [entry for entries in created for entry in entries]
+
+def check(store, sessions, created):
+    """Return a list of problems; empty when no session was lost or overwritten"""
+    problems = []
+    ids = [session_id for _, _, session_id in created]
+    if len(ids) != sessions:
+        problems.append(f"{len(ids)} IDs returned for {sessions} sessions")
+    if len(set(ids)) != len(ids):
+        problems.append(f"{len(ids) - len(set(ids))} duplicate IDs")
+    if store.count() != sessions:
+        problems.append(f"store holds {store.count()} sessions")
+    overwritten = 0
+    for creator, sequence, session_id in created:
+        if store.get(session_id) != {'creator': creator, 'sequence': sequence}:
+            overwritten += 1
+    if overwritten:
+        problems.append(f"{overwritten} sessions overwritten")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--stores', nargs='+', choices=('memory', 'sqlite'), default=['memory', 'sqlite'])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    old_ids = [rng.randint(1000, 9999) for _ in range(args.sessions)]
+    print(f"randint(1000, 9999): {args.sessions - len(set(old_ids))} of {args.sessions} sessions would overwrite another")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in args.stores:
+            if kind == 'memory':
+                store = MemorySessionStore()
+            else:
+                store = SQLiteSessionStore(os.path.join(directory, 'sessions.sqlite3'))
+            elapsed, created = stress(store, args.sessions, args.threads)
+            problems = check(store, args.sessions, created)
+            failed = failed or bool(problems)
+            print(f"{kind:>7}: {args.sessions} sessions from {args.threads} threads in {elapsed:.2f} s "
+                  f"({args.sessions / elapsed:,.0f}/s), IDs like {created[0][2]!r}: "
+                  f"{'; '.join(problems) if problems else 'no collisions, none overwritten'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,109 @@
+import argparse
+import random
+
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph
+from reportlab.platypus import PageBreak, SimpleDocTemplate, Paragraph
+
+from nltk_resources import BUNDLED_STOP_WORDS
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'sa', 'tor', 'vel', 'qui', 'bra', 'don', 'fe', 'gal', 'hu', 'jin', 'nor',
+             'pa', 'ris', 'tu', 'wen', 'zo']
+
+# Characters of text per generated page; a letter page in the Normal
+# style holds roughly 4,500, so every page's text fits on one page
+PAGE_CHARACTERS = 3000
 
 def create_test_pdf(output_path, text_path):
     # Read the text content
     with open(text_path, 'r') as file:
         content = file.read()
-    
+
     # Create a PDF document
     doc = SimpleDocTemplate(output_path, pagesize=letter)
     styles = getSampleStyleSheet()
-    
+
     # Split the content into paragraphs
     paragraphs = content.split('\n\n')
-    
+
     # Convert paragraphs to Paragraph objects
     elements = []
     for para in paragraphs:
         if para.strip():
             elements.append(Paragraph(para, styles['Normal']))
-    
+
     # Build the PDF
     doc.build(elements)
-    
+
     print(f"PDF created at {output_path}")
 
+def make_vocabulary(size, seed=0):
+    """Return size distinct pronounceable pseudo-words, the same for the same seed"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def generate_pages(pages, sentence_words=(8, 25), vocabulary_size=2000, seed=0, stop_word_ratio=0.45):
+    """Generate deterministic pseudo-English text, one string per page
+
+    Sentence lengths are drawn uniformly from sentence_words (inclusive).
+    Content words follow a Zipf distribution over vocabulary_size
+    pseudo-words, and stop_word_ratio of all words are English stop words,
+    so word frequencies look like real prose.
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(vocabulary_size, seed)
+    stop_words = sorted(BUNDLED_STOP_WORDS)
+    cumulative_weights = []
+    total = 0.0
+    for rank in range(1, vocabulary_size + 1):
+        total += 1.0 / rank
+        cumulative_weights.append(total)
+
+    page_texts = []
+    for _ in range(pages):
+        sentences = []
+        length = 0
+        while length < PAGE_CHARACTERS:
+            count = rng.randint(*sentence_words)
+            content_words = rng.choices(vocabulary, cum_weights=cumulative_weights, k=count)
+            words = [rng.choice(stop_words) if rng.random() < stop_word_ratio else word for word in content_words]
+            sentence = ' '.join(words).capitalize() + '.'
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        page_texts.append(' '.join(sentences))
+    return page_texts
+
+def create_synthetic_pdf(output, pages=1, sentence_words=(8, 25), vocabulary_size=2000, seed=0):
+    """Write a deterministic PDF of exactly pages pages of generated text
+
+    output is a path or a binary file object. The same arguments always
+    produce byte-identical PDFs.
+    """
+    styles = getSampleStyleSheet()
+    elements = []
+    for page_text in generate_pages(pages, sentence_words, vocabulary_size, seed):
+        elements += [Paragraph(page_text, styles['Normal']), PageBreak()]
+
+    # invariant leaves out the creation date and random document ID
+    doc = SimpleDocTemplate(output, pagesize=letter, invariant=1)
+    doc.build(elements[:-1])
+
 if __name__ == "__main__":
-    create_test_pdf("test_document.pdf", "test_pdf_content.txt")
+    parser = argparse.ArgumentParser(description='Create test_document.pdf, or a synthetic PDF with --pages')
+    parser.add_argument('--pages', type=int, help='generate this many pages of synthetic text')
+    parser.add_argument('--sentence-words', type=int, nargs=2, default=(8, 25), metavar=('MIN', 'MAX'))
+    parser.add_argument('--vocabulary', type=int, default=2000, help='distinct content words')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='output path (default test_document.pdf or synthetic-<pages>.pdf)')
+    args = parser.parse_args()
+
+    if args.pages is None:
+        create_test_pdf(args.output or "test_document.pdf", "test_pdf_content.txt")
+    else:
+        output_path = args.output or f"synthetic-{args.pages}.pdf"
+        create_synthetic_pdf(output_path, args.pages, tuple(args.sentence_words), args.vocabulary, args.seed)
+        print(f"PDF created at {output_path}")
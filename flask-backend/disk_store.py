@@ -0,0 +1,381 @@
+import mmap
+import os
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+from textrank import TermMatrixBuilder, power_iteration
+
+# Column indices on disk; row offsets stay int64 in memory and are rebased
+# per window, so windows can use the same compact dtype for both
+INDEX_DTYPE = np.int32
+# One stored matrix entry: its column index and float64 value
+ENTRY_BYTES = np.dtype(INDEX_DTYPE).itemsize + 8
+
+def _map(path, dtype, start, stop):
+    """Memory-map elements [start, stop) of a flat binary file of dtype"""
+    if stop <= start:
+        return np.empty(0, dtype=dtype)
+    itemsize = np.dtype(dtype).itemsize
+    return np.memmap(path, dtype=dtype, mode='r', offset=int(start) * itemsize, shape=(int(stop - start),))
+
+def _row_ids(window):
+    """The window-relative row of every entry of a CSR window"""
+    return np.repeat(np.arange(window.shape[0], dtype=INDEX_DTYPE), np.diff(window.indptr))
+
+class SentenceStore:
+    """Sentences appended to one UTF-8 file and read back through mmap by offset
+
+    Only an 8-byte end offset per sentence is kept in memory; the text
+    itself is left to the page cache. All sentences are appended first,
+    reading the first one freezes the store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'wb')
+        self._offsets = array('q', [0])
+        self._map = None
+
+    def extend(self, sentences):
+        encoded = [sentence.encode('utf-8') for sentence in sentences]
+        end = self._offsets[-1]
+        for data in encoded:
+            end += len(data)
+            self._offsets.append(end)
+        self._file.write(b''.join(encoded))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError('sentence index out of range')
+        if self._map is None:
+            self._file.close()
+            self._file = open(self.path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._offsets[-1] else b''
+        return self._map[self._offsets[index]:self._offsets[index + 1]].decode('utf-8')
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+class MappedCSR:
+    """A CSR matrix whose column indices and values live in files
+
+    Only indptr (8 bytes per row) is kept in memory. Rows are read in
+    windows that map just their slice of the files and are unmapped once
+    dropped, so a pass over the matrix keeps one window resident however
+    large the matrix is.
+    """
+
+    def __init__(self, indptr, indices_path, data_path, shape):
+        self.indptr = indptr
+        self.indices_path = indices_path
+        self.data_path = data_path
+        self.shape = shape
+
+    @property
+    def nnz(self):
+        return int(self.indptr[-1])
+
+    def window(self, start, stop):
+        """Rows [start, stop) as a scipy CSR matrix over memory-mapped arrays"""
+        begin, end = self.indptr[start], self.indptr[stop]
+        indptr = self.indptr[start:stop + 1] - begin
+        if end - begin < np.iinfo(INDEX_DTYPE).max:
+            indptr = indptr.astype(INDEX_DTYPE)
+        return sparse.csr_matrix((_map(self.data_path, np.float64, begin, end),
+                                  _map(self.indices_path, INDEX_DTYPE, begin, end),
+                                  indptr), shape=(stop - start, self.shape[1]), copy=False)
+
+    def windows(self, max_bytes):
+        """Yield (start, stop, window) over all rows, each window at most max_bytes of entries (or one row)"""
+        max_entries = max(1, max_bytes // ENTRY_BYTES)
+        n = self.shape[0]
+        start = 0
+        while start < n:
+            stop = int(np.searchsorted(self.indptr, self.indptr[start] + max_entries, side='right')) - 1
+            stop = min(max(stop, start + 1), n)
+            yield start, stop, self.window(start, stop)
+            start = stop
+
+    def row_sums(self, max_bytes):
+        sums = np.empty(self.shape[0])
+        for start, stop, window in self.windows(max_bytes):
+            sums[start:stop] = np.bincount(_row_ids(window), weights=window.data, minlength=stop - start)
+        return sums
+
+    def matvec(self, vector, max_bytes):
+        result = np.empty(self.shape[0])
+        for start, stop, window in self.windows(max_bytes):
+            result[start:stop] = window @ vector
+        return result
+
+class MappedCSRWriter:
+    """Write a MappedCSR block of rows by block of rows, in row order"""
+
+    def __init__(self, path_prefix):
+        self.indices_path = path_prefix + '.indices'
+        self.data_path = path_prefix + '.data'
+        self._indices = open(self.indices_path, 'wb')
+        self._data = open(self.data_path, 'wb')
+        self._indptr = array('q', [0])
+
+    def append(self, row_lengths, indices, data):
+        np.asarray(indices, dtype=INDEX_DTYPE).tofile(self._indices)
+        np.asarray(data, dtype=np.float64).tofile(self._data)
+        ends = self._indptr[-1] + np.cumsum(row_lengths, dtype=np.int64)
+        self._indptr.frombytes(ends.tobytes())
+
+    def finish(self, columns):
+        self._indices.close()
+        self._data.close()
+        indptr = np.array(self._indptr, dtype=np.int64)
+        return MappedCSR(indptr, self.indices_path, self.data_path, (len(indptr) - 1, columns))
+
+class MappedTermMatrixBuilder(TermMatrixBuilder):
+    """TermMatrixBuilder whose counted rows are appended to files as it goes
+
+    Token columns are buffered as in TermMatrixBuilder; every flush_entries
+    of them the buffered rows are counted and written out, so memory holds
+    the vocabulary but not the term matrix. build returns a MappedCSR.
+    """
+
+    def __init__(self, path_prefix, stop_words=None, flush_entries=1 << 20):
+        super().__init__(stop_words)
+        self.writer = MappedCSRWriter(path_prefix)
+        self.flush_entries = flush_entries
+        self._flushed_rows = 0
+
+    @classmethod
+    def spill(cls, builder, path_prefix, flush_entries=1 << 20):
+        """Continue an in-memory TermMatrixBuilder on disk"""
+        mapped = cls(path_prefix, builder.stop_words, flush_entries)
+        mapped.vocabulary = builder.vocabulary
+        mapped.indices, mapped.indptr = builder.indices, builder.indptr
+        mapped.flush()
+        return mapped
+
+    def add(self, tokens):
+        super().add(tokens)
+        if len(self.indices) >= self.flush_entries:
+            self.flush()
+
+    @property
+    def sentence_count(self):
+        return self._flushed_rows + len(self.indptr) - 1
+
+    def flush(self):
+        """Count the buffered rows' terms and append them to the files"""
+        rows = len(self.indptr) - 1
+        if rows == 0:
+            return
+        indptr = np.array(self.indptr, dtype=np.int64)
+        row_ids = np.repeat(np.arange(rows), np.diff(indptr))
+        columns = np.array(self.indices, dtype=np.int64)
+
+        # Sort by row, then column, and fold repeated words into counts like
+        # csr_matrix.sum_duplicates
+        order = np.lexsort((columns, row_ids))
+        row_ids, columns = row_ids[order], columns[order]
+        first = np.ones(len(columns), dtype=bool)
+        first[1:] = (row_ids[1:] != row_ids[:-1]) | (columns[1:] != columns[:-1])
+        starts = np.flatnonzero(first)
+        counts = np.diff(np.append(starts, len(columns)))
+
+        self.writer.append(np.bincount(row_ids[starts], minlength=rows), columns[starts], counts)
+        self._flushed_rows += rows
+        self.indices = array('q')
+        self.indptr = array('q', [0])
+
+    def build(self):
+        self.flush()
+        return self.writer.finish(len(self.vocabulary)), self.vocabulary
+
+class EntryBuckets:
+    """(row, column, value) matrix entries sorted into files by ranges of rows
+
+    Regroups entries that arrive in any order (transposing, symmetrizing)
+    with one pass that appends them to their bucket and one pass that
+    reads each bucket back. row_counts, the number of entries every row
+    will get, sizes the buckets to at most max_entries each (or one row).
+    """
+
+    def __init__(self, path_prefix, row_counts, max_entries):
+        self.path_prefix = path_prefix
+        ends = np.cumsum(row_counts)
+        starts = [0]
+        while starts[-1] < len(row_counts):
+            first = starts[-1]
+            done = ends[first - 1] if first else 0
+            last = int(np.searchsorted(ends, done + max_entries, side='right'))
+            starts.append(min(len(row_counts), max(first + 1, last)))
+        self.starts = np.array(starts, dtype=np.int64)
+
+    def _paths(self, bucket):
+        return [f"{self.path_prefix}.{bucket}.{part}" for part in ('rows', 'columns', 'values')]
+
+    def add(self, rows, columns, values):
+        buckets = np.searchsorted(self.starts, rows, side='right') - 1
+        # A stable sort keeps the arrival order within every bucket
+        order = np.argsort(buckets, kind='stable')
+        buckets, rows, columns, values = buckets[order], rows[order], columns[order], values[order]
+        bounds = np.flatnonzero(np.diff(buckets)) + 1
+        for part_start, part_stop in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(buckets)]))):
+            if part_stop == part_start:
+                continue
+            for path, array_, dtype in zip(self._paths(buckets[part_start]), (rows, columns, values),
+                                           (INDEX_DTYPE, INDEX_DTYPE, np.float64)):
+                with open(path, 'ab') as bucket_file:
+                    array_[part_start:part_stop].astype(dtype, copy=False).tofile(bucket_file)
+
+    def __iter__(self):
+        """Yield (first_row, stop_row, rows, columns, values) per bucket, in arrival order, deleting it"""
+        for bucket in range(len(self.starts) - 1):
+            parts = []
+            for path, dtype in zip(self._paths(bucket), (INDEX_DTYPE, INDEX_DTYPE, np.float64)):
+                if os.path.exists(path):
+                    parts.append(np.fromfile(path, dtype=dtype))
+                    os.remove(path)
+                else:
+                    parts.append(np.empty(0, dtype=dtype))
+            yield (int(self.starts[bucket]), int(self.starts[bucket + 1]), *parts)
+
+def mapped_transpose(matrix, path_prefix, max_bytes):
+    """Write the transpose of a MappedCSR, sorting its entries into column buckets of max_bytes"""
+    window_bytes = max(ENTRY_BYTES, max_bytes // 4)
+    counts = np.zeros(matrix.shape[1], dtype=np.int64)
+    for _, _, window in matrix.windows(window_bytes):
+        counts += np.bincount(window.indices, minlength=matrix.shape[1])
+
+    # Bucketed entries carry a row, a column and a value, and are sorted once
+    buckets = EntryBuckets(path_prefix + '.bucket', counts, max(1, max_bytes // (2 * (ENTRY_BYTES + 4))))
+    for start, _, window in matrix.windows(window_bytes):
+        buckets.add(window.indices, _row_ids(window) + start, window.data)
+
+    writer = MappedCSRWriter(path_prefix)
+    for first, last, columns, rows, values in buckets:
+        # Rows arrived in order, and a stable sort by column keeps it
+        order = np.argsort(columns, kind='stable')
+        writer.append(counts[first:last], rows[order], values[order])
+    return writer.finish(matrix.shape[0])
+
+def mapped_similarity_graph(term_matrix, directory, top_k=20, threshold=0.0, max_term_sentences=None,
+                            max_bytes=64 << 20):
+    """Build the sparse top-k cosine similarity graph of a MappedCSR term matrix on disk
+
+    The graph of textrank.sparse_similarity_graph, built so that neither
+    memory nor run time grows with the square of the sentence count:
+
+    - terms found in more than max_term_sentences sentences are dropped like
+      stop words, which bounds the candidate neighbours of every sentence
+    - rows are multiplied with the inverted index (the transposed,
+      normalized term matrix) in blocks whose candidate count fits
+      max_bytes, and only the resulting top-k edges are written out
+    - the edges are symmetrized into a MappedCSR through row buckets
+
+    Returns the graph and the number of terms dropped.
+    """
+    window_bytes = max(ENTRY_BYTES, max_bytes // 4)
+    n = term_matrix.shape[0]
+
+    # Document frequency of every term (rows hold each term once)
+    frequencies = np.zeros(term_matrix.shape[1], dtype=np.int64)
+    for _, _, window in term_matrix.windows(window_bytes):
+        frequencies += np.bincount(window.indices, minlength=term_matrix.shape[1])
+    kept_terms = frequencies <= max_term_sentences if max_term_sentences else np.ones(len(frequencies), dtype=bool)
+    kept_frequencies = np.where(kept_terms, frequencies, 0)
+
+    # Normalize the remaining terms, and bound each row's candidate
+    # neighbours by the summed frequencies of its terms
+    normalized_writer = MappedCSRWriter(os.path.join(directory, 'normalized'))
+    candidates = np.empty(n)
+    for start, stop, window in term_matrix.windows(window_bytes):
+        kept = kept_terms[window.indices]
+        rows, columns, counts = _row_ids(window)[kept], window.indices[kept], window.data[kept]
+        norms = np.sqrt(np.bincount(rows, weights=counts * counts, minlength=stop - start))
+        normalized_writer.append(np.bincount(rows, minlength=stop - start), columns, counts / norms[rows])
+        candidates[start:stop] = np.bincount(rows, weights=kept_frequencies[columns], minlength=stop - start)
+    normalized = normalized_writer.finish(term_matrix.shape[1])
+    inverted_index = mapped_transpose(normalized, os.path.join(directory, 'inverted'), max_bytes)
+
+    # Score blocks of rows against the inverted index and keep each row's
+    # strongest edges in a flat (row, column, value) edge list
+    block_entries = max(1, max_bytes // (4 * (ENTRY_BYTES + 4)))
+    block_ends = np.cumsum(candidates)
+    edge_paths = [os.path.join(directory, name) for name in ('edges.rows', 'edges.columns', 'edges.values')]
+    degrees = np.zeros(n, dtype=np.int64)
+    edge_count = 0
+    edge_files = [open(path, 'wb') for path in edge_paths]
+    try:
+        start = 0
+        while start < n:
+            done = block_ends[start - 1] if start else 0.0
+            stop = min(n, max(start + 1, int(np.searchsorted(block_ends, done + block_entries, side='right'))))
+            block = normalized.window(start, stop) @ inverted_index.window(0, inverted_index.shape[0])
+            rows = _row_ids(block) + start
+            columns, values = block.indices, block.data
+            keep = (values > threshold) & (columns != rows)
+            rows, columns, values = rows[keep], columns[keep], values[keep]
+            if top_k is not None:
+                order = np.lexsort((-values, rows))
+                rows, columns, values = rows[order], columns[order], values[order]
+                rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+                keep = rank < top_k
+                rows, columns, values = rows[keep], columns[keep], values[keep]
+            for edge_file, array_ in zip(edge_files, (rows, columns.astype(INDEX_DTYPE), values)):
+                array_.tofile(edge_file)
+            degrees[start:stop] += np.bincount(rows - start, minlength=stop - start)
+            edge_count += len(rows)
+            start = stop
+    finally:
+        for edge_file in edge_files:
+            edge_file.close()
+
+    # Symmetrize like graph.maximum(graph.T): sort every edge and its
+    # reverse into row buckets, then keep the strongest of duplicates
+    edge_window = max(1, window_bytes // (2 * 4 + 8))
+    edge_windows = [(edge_start, min(edge_count, edge_start + edge_window))
+                    for edge_start in range(0, edge_count, edge_window)]
+    for edge_start, edge_stop in edge_windows:
+        # Every edge also appears reversed in the symmetrized graph
+        degrees += np.bincount(_map(edge_paths[1], INDEX_DTYPE, edge_start, edge_stop), minlength=n)
+    buckets = EntryBuckets(os.path.join(directory, 'graph.bucket'), degrees, block_entries)
+    for edge_start, edge_stop in edge_windows:
+        edge_rows, edge_columns, edge_values = (_map(path, dtype, edge_start, edge_stop) for path, dtype in
+                                               zip(edge_paths, (INDEX_DTYPE, INDEX_DTYPE, np.float64)))
+        buckets.add(edge_rows, edge_columns, edge_values)
+        buckets.add(edge_columns, edge_rows, edge_values)
+        del edge_rows, edge_columns, edge_values
+
+    graph_writer = MappedCSRWriter(os.path.join(directory, 'graph'))
+    for first, last, rows, columns, values in buckets:
+        order = np.lexsort((-values, columns, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        unique = np.ones(len(rows), dtype=bool)
+        unique[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+        rows, columns, values = rows[unique], columns[unique], values[unique]
+        graph_writer.append(np.bincount(rows - first, minlength=last - first), columns, values)
+
+    for path in edge_paths:
+        os.remove(path)
+    return graph_writer.finish(n), int(np.count_nonzero(~kept_terms))
+
+def mapped_pagerank(graph, max_bytes, damping=0.85, tol=1.0e-6, max_iter=100, callback=None, initial=None):
+    """textrank.pagerank for a symmetric MappedCSR graph, one window at a time
+
+    For a symmetric weight matrix W the update's P^T @ x is W @ (x / row
+    sums), so the graph is read as it is stored and never copied.
+    """
+    if graph.shape[0] == 0:
+        return np.zeros(0), 0, True
+    window_bytes = max(ENTRY_BYTES, max_bytes // 4)
+    row_sums = graph.row_sums(window_bytes)
+    dangling = row_sums == 0
+    inverse_sums = np.divide(1.0, row_sums, out=np.zeros_like(row_sums), where=~dangling)
+    return power_iteration(lambda scores: graph.matvec(scores * inverse_sums, window_bytes), dangling,
+                           damping, tol, max_iter, callback, initial)
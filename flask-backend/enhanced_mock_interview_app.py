@@ -3,24 +3,38 @@ from flask_cors import CORS
 import random
 import json
 import os
-import base64
+import binascii
 import numpy as np
 import time
-import threading
 import re
 from datetime import datetime
+from analysis_pool import AUDIO, VIDEO, AnalysisPool
+from instrumentation import instrument, register_gauge, stage
+from interview_session import InterviewSession
+from interview_stream import add_stream_endpoint
+from session_store import SessionExpiry, create_session, open_session_store
+from structured_logging import configure_logging
+from upload_buffer import SpooledUploadRequest, read_upload
+
+# JSON-lines logs, written by a background thread
+logger = configure_logging('enhanced_mock_interview_app')
 
 app = Flask(__name__)
+# Multipart frame uploads are parsed into memory rather than temporary files
+app.request_class = SpooledUploadRequest
 CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": "*"}})
 
 # Add CORS headers to all responses
 @app.after_request
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-Session-Id, X-Question-Idx'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
     return response
 
+# Stage timers, request metrics and opt-in profiling; Prometheus metrics at /metrics
+instrument(app)
+
 # Simple ping endpoint to check if the server is running
 @app.route('/api/ping', methods=['GET', 'OPTIONS'])
 def ping():
@@ -42,6 +56,8 @@ def create_directories():
 create_directories()
 
 # Load interview questions from JSON file
+question_bank = {'mtime': None, 'questions': None}
+
 def load_questions():
     # Create default questions file if it doesn't exist
     default_questions_path = os.path.join('questions', 'default_questions.json')
@@ -72,12 +88,16 @@ def load_questions():
         with open(default_questions_path, 'w') as f:
             json.dump(default_questions, f, indent=4)
 
-    # Load questions from file
+    # Load questions from file, re-reading it only after it changes
     try:
-        with open(default_questions_path, 'r') as f:
-            return json.load(f)
+        mtime = os.path.getmtime(default_questions_path)
+        if question_bank['mtime'] != mtime:
+            with open(default_questions_path, 'r') as f:
+                question_bank['questions'] = json.load(f)
+            question_bank['mtime'] = mtime
+        return question_bank['questions']
     except Exception as e:
-        print(f"Error loading questions: {e}")
+        logger.exception("Error loading questions: %s", e)
         return {
             "general": ["Tell me about yourself."],
             "technical": ["What is your technical background?"],
@@ -138,11 +158,56 @@ communication_feedback = {
     }
 }
 
-# Active interview sessions
-active_sessions = {}
+# Active interview sessions. SESSION_STORE is 'memory', which keeps them
+# in this process, or 'sqlite', which keeps them in SESSION_DATABASE so
+# every server process on the host can serve every session.
+app.config['SESSION_STORE'] = os.environ.get('SESSION_STORE', 'memory')
+app.config['SESSION_DATABASE'] = os.environ.get('SESSION_DATABASE', 'interview_sessions.sqlite3')
+active_sessions = open_session_store(app.config['SESSION_STORE'], app.config['SESSION_DATABASE'],
+                                     InterviewSession.to_json, InterviewSession.from_json)
+# Every process counts the same sessions in a shared store
+register_gauge('interview_active_sessions', 'Interview sessions in the session store', active_sessions.count,
+               aggregate='max' if app.config['SESSION_STORE'] == 'sqlite' else 'sum')
+
+# Sessions idle for SESSION_IDLE_SECONDS are deleted as soon as they expire
+app.config['SESSION_IDLE_SECONDS'] = float(os.environ.get('SESSION_IDLE_SECONDS', 3600))
+session_expiry = SessionExpiry(active_sessions, app.config['SESSION_IDLE_SECONDS']).start()
+
+# Frames may be posted as raw bytes (Content-Type: application/octet-stream,
+# or a 'frame' file in multipart/form-data) and are then read straight into
+# the bytes handed to analysis; larger ones than MAX_FRAME_BYTES are refused.
+app.config['MAX_FRAME_BYTES'] = int(os.environ.get('MAX_FRAME_BYTES', 8 << 20))
+
+BINARY_FRAME_TYPES = ('application/octet-stream', 'multipart/form-data')
+
+def binary_frame_fields():
+    """session_id and question_idx of a binary frame, from headers, the query string or form fields"""
+    fields = request.form if request.mimetype == 'multipart/form-data' else {}
+    session_id = (request.headers.get('X-Session-Id') or request.args.get('session_id')
+                  or fields.get('session_id'))
+    question_idx = (request.headers.get('X-Question-Idx') or request.args.get('question_idx')
+                    or fields.get('question_idx') or 0)
+    return session_id, int(question_idx)
+
+def binary_frame_source():
+    """Stream and length of a binary frame upload; the stream is None without a 'frame' file"""
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('frame')
+        if upload is None:
+            return None, 0
+        length = upload.stream.seek(0, os.SEEK_END)
+        upload.stream.seek(0)
+        return upload.stream, length
+    return request.stream, request.content_length
+
+def decode_frame_data(frame_data):
+    """Bytes of a base64 frame from a JSON body, with or without a data: URL prefix"""
+    if frame_data.startswith('data:'):
+        frame_data = frame_data.partition(',')[2]
+    return binascii.a2b_base64(frame_data)
 
 # Simulate AI analysis of video frames
-def analyze_video_frame(frame_data):
+def analyze_video_frame(frame):
     """
     Simulates AI analysis of a video frame to detect eye contact, facial expressions, etc.
     In a real implementation, this would use computer vision libraries like OpenCV and facial recognition.
@@ -181,9 +246,27 @@ def analyze_audio(audio_data):
 
     return scores
 
+# Frames and audio chunks are analysed by ANALYSIS_WORKERS background
+# threads, so process-frame and process-audio answer as soon as a chunk is
+# queued; they can also be streamed over the WebSocket at
+# /api/interview/stream. Each session keeps at most
+# ANALYSIS_PENDING_FRAMES frames and ANALYSIS_PENDING_AUDIO audio chunks
+# waiting; when more arrive, the oldest waiting one is dropped. Feedback
+# waits up to ANALYSIS_WAIT_SECONDS for its question's chunks.
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', 8))
+app.config['ANALYSIS_PENDING_FRAMES'] = int(os.environ.get('ANALYSIS_PENDING_FRAMES', 1))
+app.config['ANALYSIS_PENDING_AUDIO'] = int(os.environ.get('ANALYSIS_PENDING_AUDIO', 4))
+app.config['ANALYSIS_WAIT_SECONDS'] = float(os.environ.get('ANALYSIS_WAIT_SECONDS', 5))
+analysis_pool = AnalysisPool(active_sessions, {VIDEO: analyze_video_frame, AUDIO: analyze_audio},
+                             {VIDEO: app.config['ANALYSIS_PENDING_FRAMES'], AUDIO: app.config['ANALYSIS_PENDING_AUDIO']},
+                             app.config['ANALYSIS_WORKERS'])
+register_gauge('interview_analysis_pending', 'Frames and audio chunks waiting for or in analysis',
+               analysis_pool.pending_count)
+add_stream_endpoint(app, active_sessions, analysis_pool)
+
 # Function to save frame data (for demonstration purposes)
-def save_frame(session_id, question_idx, frame_data):
-    """Save a base64 encoded frame to disk"""
+def save_frame(session_id, question_idx, frame):
+    """Save a frame's bytes to disk"""
     try:
         # Create directory for this session if it doesn't exist
         session_dir = os.path.join('frames', str(session_id))
@@ -199,7 +282,7 @@ def save_frame(session_id, question_idx, frame_data):
 
         return True
     except Exception as e:
-        print(f"Error saving frame: {e}")
+        logger.exception("Error saving frame: %s", e)
         return False
 
 # Function to save audio data (for demonstration purposes)
@@ -220,7 +303,7 @@ def save_audio(session_id, question_idx, audio_data):
 
         return True
     except Exception as e:
-        print(f"Error saving audio: {e}")
+        logger.exception("Error saving audio: %s", e)
         return False
 
 # API endpoint to start a new interview session
@@ -242,19 +325,8 @@ def start_interview():
             selected_questions = random.sample(questions.get(interview_type, questions['general']),
                                              min(5, len(questions.get(interview_type, questions['general']))))
 
-        # Generate a unique session ID
-        session_id = random.randint(1000, 9999)
-
-        # Initialize session data
-        active_sessions[session_id] = {
-            'type': interview_type,
-            'questions': selected_questions,
-            'answers': [None] * len(selected_questions),
-            'feedback': [None] * len(selected_questions),
-            'communication_scores': [None] * len(selected_questions),
-            'start_time': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
-        }
+        # Store the new session under a unique random ID
+        session_id = create_session(active_sessions, InterviewSession(interview_type, selected_questions))
 
         return jsonify({
             'success': True,
@@ -262,7 +334,7 @@ def start_interview():
             'questions': selected_questions
         })
     except Exception as e:
-        print(f"Error starting interview: {e}")
+        logger.exception("Error starting interview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -272,41 +344,69 @@ def start_interview():
 @app.route('/api/interview/process-frame', methods=['POST'])
 def process_frame():
     try:
-        data = request.json
-        session_id = data.get('session_id')
-        question_idx = data.get('question_idx', 0)
-        frame_data = data.get('frame_data', '')  # Base64 encoded image
+        binary = request.mimetype in BINARY_FRAME_TYPES
+        if binary:
+            try:
+                session_id, question_idx = binary_frame_fields()
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid question index'
+                }), 400
+        else:
+            data = request.json
+            session_id = data.get('session_id')
+            question_idx = data.get('question_idx', 0)
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            known_session = bool(session_id) and session_id in active_sessions
+        if not known_session:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        # Update last activity timestamp
-        active_sessions[session_id]['last_activity'] = datetime.now().isoformat()
+        with stage('frame_read'):
+            if binary:
+                stream, length = binary_frame_source()
+                if stream is None:
+                    return jsonify({
+                        'success': False,
+                        'error': 'No frame uploaded'
+                    }), 400
+                if length is None:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Content-Length required'
+                    }), 411
+                if length > app.config['MAX_FRAME_BYTES']:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Frame too large'
+                    }), 413
+                frame = read_upload(stream, length)
+            else:
+                try:
+                    frame = decode_frame_data(data.get('frame_data', ''))  # Base64 encoded image
+                except (binascii.Error, ValueError):
+                    return jsonify({
+                        'success': False,
+                        'error': 'Invalid frame data'
+                    }), 400
 
         # Save frame for analysis (in a real implementation)
-        save_frame(session_id, question_idx, frame_data)
+        save_frame(session_id, question_idx, frame)
 
-        # Analyze frame
-        frame_scores = analyze_video_frame(frame_data)
-
-        # Store or update communication scores
-        if active_sessions[session_id]['communication_scores'][question_idx] is None:
-            active_sessions[session_id]['communication_scores'][question_idx] = {
-                'video': frame_scores,
-                'audio': None
-            }
-        else:
-            active_sessions[session_id]['communication_scores'][question_idx]['video'] = frame_scores
+        # Analyze the frame in the background; its scores are recorded in the session when done
+        dropped = analysis_pool.submit(session_id, question_idx, VIDEO, frame)
 
         return jsonify({
             'success': True,
-            'scores': frame_scores
-        })
+            'status': 'queued',
+            'dropped': dropped
+        }), 202
     except Exception as e:
-        print(f"Error processing frame: {e}")
+        logger.exception("Error processing frame: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -321,36 +421,27 @@ def process_audio():
         question_idx = data.get('question_idx', 0)
         audio_data = data.get('audio_data', '')  # Base64 encoded audio
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            known_session = bool(session_id) and session_id in active_sessions
+        if not known_session:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        # Update last activity timestamp
-        active_sessions[session_id]['last_activity'] = datetime.now().isoformat()
-
         # Save audio for analysis (in a real implementation)
         save_audio(session_id, question_idx, audio_data)
 
-        # Analyze audio
-        audio_scores = analyze_audio(audio_data)
-
-        # Store or update communication scores
-        if active_sessions[session_id]['communication_scores'][question_idx] is None:
-            active_sessions[session_id]['communication_scores'][question_idx] = {
-                'video': None,
-                'audio': audio_scores
-            }
-        else:
-            active_sessions[session_id]['communication_scores'][question_idx]['audio'] = audio_scores
+        # Analyze the audio in the background; its scores are recorded in the session when done
+        dropped = analysis_pool.submit(session_id, question_idx, AUDIO, audio_data)
 
         return jsonify({
             'success': True,
-            'scores': audio_scores
-        })
+            'status': 'queued',
+            'dropped': dropped
+        }), 202
     except Exception as e:
-        print(f"Error processing audio: {e}")
+        logger.exception("Error processing audio: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -368,121 +459,129 @@ def get_feedback():
         video_data = data.get('video_data', {})  # Aggregated video analysis data
         audio_data = data.get('audio_data', {})  # Aggregated audio analysis data
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            known_session = bool(session_id) and session_id in active_sessions
+        if not known_session:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        # Update last activity timestamp
-        active_sessions[session_id]['last_activity'] = datetime.now().isoformat()
-
-        # Store the answer
-        active_sessions[session_id]['answers'][question_idx] = answer
-
-        # Content feedback logic based on answer length and quality
-        # Improved scoring algorithm with more nuanced ranges
-        answer_length = len(answer)
-
-        # Base score calculation
-        if answer_length < 20:  # Very short answer
-            feedback_type = "constructive"
-            content_score = random.uniform(5.0, 6.5)  # Higher minimum score
-        elif answer_length < 50:  # Short answer
-            feedback_type = "constructive"
-            content_score = random.uniform(6.0, 7.5)
-        elif answer_length < 100:  # Brief answer
-            feedback_type = "neutral"
-            content_score = random.uniform(7.0, 8.0)
-        elif answer_length < 200:  # Moderate answer
-            feedback_type = "neutral"
-            content_score = random.uniform(7.5, 8.5)
-        else:  # Detailed answer
-            feedback_type = "positive"
-            content_score = random.uniform(8.0, 9.5)
-
-        # Round to one decimal place
-        content_score = round(content_score, 1)
-
-        content_feedback = random.choice(feedback_templates[feedback_type])
-
-        # Add question-specific feedback
-        if "yourself" in question.lower():
-            content_feedback += " When introducing yourself, remember to keep it professional but personable."
-        elif "strength" in question.lower() or "weakness" in question.lower():
-            content_feedback += " For strengths and weaknesses, always show how you're working on improving."
-        elif "technical" in question.lower() or "programming" in question.lower():
-            content_feedback += " Technical questions should demonstrate both knowledge and practical experience."
-
-        # Communication feedback based on video and audio analysis
-        # In a real implementation, these would be calculated from actual analysis
-        eye_contact_score = video_data.get('eye_contact', random.uniform(0.5, 1.0))
-        facial_expressions_score = video_data.get('facial_expressions', random.uniform(0.4, 0.9))
-        speaking_pace_score = audio_data.get('speaking_pace', random.uniform(0.6, 0.95))
-        voice_clarity_score = audio_data.get('voice_clarity', random.uniform(0.5, 0.9))
-        filler_words_score = audio_data.get('filler_words', random.uniform(0.4, 0.85))
-
-        # Generate communication feedback
-        comm_feedback = []
-
-        # Eye contact feedback
-        if eye_contact_score > 0.8:
-            comm_feedback.append(communication_feedback["eye_contact"]["good"])
-        elif eye_contact_score > 0.5:
-            comm_feedback.append(communication_feedback["eye_contact"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["eye_contact"]["poor"])
-
-        # Facial expressions feedback
-        if facial_expressions_score > 0.8:
-            comm_feedback.append(communication_feedback["facial_expressions"]["good"])
-        elif facial_expressions_score > 0.5:
-            comm_feedback.append(communication_feedback["facial_expressions"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["facial_expressions"]["poor"])
-
-        # Speaking pace feedback
-        if speaking_pace_score > 0.8:
-            comm_feedback.append(communication_feedback["speaking_pace"]["good"])
-        elif speaking_pace_score > 0.5:
-            comm_feedback.append(communication_feedback["speaking_pace"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["speaking_pace"]["poor"])
-
-        # Voice clarity feedback
-        if voice_clarity_score > 0.8:
-            comm_feedback.append(communication_feedback["voice_clarity"]["good"])
-        elif voice_clarity_score > 0.5:
-            comm_feedback.append(communication_feedback["voice_clarity"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["voice_clarity"]["poor"])
-
-        # Filler words feedback
-        if filler_words_score > 0.8:
-            comm_feedback.append(communication_feedback["filler_words"]["good"])
-        elif filler_words_score > 0.5:
-            comm_feedback.append(communication_feedback["filler_words"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["filler_words"]["poor"])
-
-        # Select 2 random communication feedback items to avoid overwhelming the user
-        selected_comm_feedback = random.sample(comm_feedback, min(2, len(comm_feedback)))
-
-        # Calculate overall communication score with weighted components
-        # Give more weight to eye contact and facial expressions
-        communication_score = round((
-            eye_contact_score * 2.5 +  # Higher weight for eye contact
-            facial_expressions_score * 2.0 +  # Higher weight for facial expressions
-            speaking_pace_score * 1.8 +
-            voice_clarity_score * 1.8 +
-            filler_words_score * 1.9
-        ) / 10.0 * 10, 1)  # Scale to 0-10
-
-        # Ensure communication score is never below 5.0 for better user experience
-        communication_score = max(communication_score, 5.0)
-
-        # Calculate overall score with higher weight on communication (60%)
-        overall_score = round(content_score * 0.4 + communication_score * 0.6, 1)
+        # Let the question's queued frames and audio finish analysis, so their scores count
+        with stage('analysis_wait'):
+            analysis_pool.wait(session_id, question_idx, app.config['ANALYSIS_WAIT_SECONDS'])
+        session = active_sessions.get(session_id)
+        recorded_scores = session.communication_scores(question_idx) if session is not None else {}
+
+        with stage('feedback_scoring'):
+            # Content feedback logic based on answer length and quality
+            # Improved scoring algorithm with more nuanced ranges
+            answer_length = len(answer)
+
+            # Base score calculation
+            if answer_length < 20:  # Very short answer
+                feedback_type = "constructive"
+                content_score = random.uniform(5.0, 6.5)  # Higher minimum score
+            elif answer_length < 50:  # Short answer
+                feedback_type = "constructive"
+                content_score = random.uniform(6.0, 7.5)
+            elif answer_length < 100:  # Brief answer
+                feedback_type = "neutral"
+                content_score = random.uniform(7.0, 8.0)
+            elif answer_length < 200:  # Moderate answer
+                feedback_type = "neutral"
+                content_score = random.uniform(7.5, 8.5)
+            else:  # Detailed answer
+                feedback_type = "positive"
+                content_score = random.uniform(8.0, 9.5)
+
+            # Round to one decimal place
+            content_score = round(content_score, 1)
+
+            content_feedback = random.choice(feedback_templates[feedback_type])
+
+            # Add question-specific feedback
+            if "yourself" in question.lower():
+                content_feedback += " When introducing yourself, remember to keep it professional but personable."
+            elif "strength" in question.lower() or "weakness" in question.lower():
+                content_feedback += " For strengths and weaknesses, always show how you're working on improving."
+            elif "technical" in question.lower() or "programming" in question.lower():
+                content_feedback += " Technical questions should demonstrate both knowledge and practical experience."
+
+            # Communication feedback based on video and audio analysis: the client's
+            # aggregates, else the latest scores analysed for this question
+            eye_contact_score = video_data.get('eye_contact',
+                                               recorded_scores.get('eye_contact', random.uniform(0.5, 1.0)))
+            facial_expressions_score = video_data.get('facial_expressions',
+                                                      recorded_scores.get('facial_expressions', random.uniform(0.4, 0.9)))
+            speaking_pace_score = audio_data.get('speaking_pace',
+                                                 recorded_scores.get('speaking_pace', random.uniform(0.6, 0.95)))
+            voice_clarity_score = audio_data.get('voice_clarity',
+                                                 recorded_scores.get('voice_clarity', random.uniform(0.5, 0.9)))
+            filler_words_score = audio_data.get('filler_words',
+                                                recorded_scores.get('filler_words', random.uniform(0.4, 0.85)))
+
+            # Generate communication feedback
+            comm_feedback = []
+
+            # Eye contact feedback
+            if eye_contact_score > 0.8:
+                comm_feedback.append(communication_feedback["eye_contact"]["good"])
+            elif eye_contact_score > 0.5:
+                comm_feedback.append(communication_feedback["eye_contact"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["eye_contact"]["poor"])
+
+            # Facial expressions feedback
+            if facial_expressions_score > 0.8:
+                comm_feedback.append(communication_feedback["facial_expressions"]["good"])
+            elif facial_expressions_score > 0.5:
+                comm_feedback.append(communication_feedback["facial_expressions"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["facial_expressions"]["poor"])
+
+            # Speaking pace feedback
+            if speaking_pace_score > 0.8:
+                comm_feedback.append(communication_feedback["speaking_pace"]["good"])
+            elif speaking_pace_score > 0.5:
+                comm_feedback.append(communication_feedback["speaking_pace"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["speaking_pace"]["poor"])
+
+            # Voice clarity feedback
+            if voice_clarity_score > 0.8:
+                comm_feedback.append(communication_feedback["voice_clarity"]["good"])
+            elif voice_clarity_score > 0.5:
+                comm_feedback.append(communication_feedback["voice_clarity"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["voice_clarity"]["poor"])
+
+            # Filler words feedback
+            if filler_words_score > 0.8:
+                comm_feedback.append(communication_feedback["filler_words"]["good"])
+            elif filler_words_score > 0.5:
+                comm_feedback.append(communication_feedback["filler_words"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["filler_words"]["poor"])
+
+            # Select 2 random communication feedback items to avoid overwhelming the user
+            selected_comm_feedback = random.sample(comm_feedback, min(2, len(comm_feedback)))
+
+            # Calculate overall communication score with weighted components
+            # Give more weight to eye contact and facial expressions
+            communication_score = round((
+                eye_contact_score * 2.5 +  # Higher weight for eye contact
+                facial_expressions_score * 2.0 +  # Higher weight for facial expressions
+                speaking_pace_score * 1.8 +
+                voice_clarity_score * 1.8 +
+                filler_words_score * 1.9
+            ) / 10.0 * 10, 1)  # Scale to 0-10
+
+            # Ensure communication score is never below 5.0 for better user experience
+            communication_score = max(communication_score, 5.0)
+
+            # Calculate overall score with higher weight on communication (60%)
+            overall_score = round(content_score * 0.4 + communication_score * 0.6, 1)
 
         # Store feedback
         feedback_data = {
@@ -501,7 +600,12 @@ def get_feedback():
             }
         }
 
-        active_sessions[session_id]['feedback'][question_idx] = feedback_data
+        # Store the answer, its feedback and the last activity timestamp
+        def record_feedback(session):
+            session.touch()
+            session.record_feedback(question_idx, answer, feedback_data)
+
+        active_sessions.update(session_id, record_feedback)
 
         return jsonify({
             'success': True,
@@ -520,7 +624,7 @@ def get_feedback():
             }
         })
     except Exception as e:
-        print(f"Error generating feedback: {e}")
+        logger.exception("Error generating feedback: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -533,20 +637,20 @@ def end_interview():
         data = request.json
         session_id = data.get('session_id')
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            session_data = active_sessions.get(session_id) if session_id else None
+        if session_data is None:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        session_data = active_sessions[session_id]
-
         # Calculate average scores
         content_scores = []
         communication_scores = []
         overall_scores = []
 
-        for feedback in session_data['feedback']:
+        for feedback in session_data.all_feedback():
             if feedback:
                 content_scores.append(feedback['content_score'])
                 communication_scores.append(feedback['communication_score'])
@@ -598,7 +702,7 @@ def end_interview():
         all_tips = selected_content_tips + selected_communication_tips
 
         # Store end time
-        session_data['end_time'] = datetime.now().isoformat()
+        active_sessions.update(session_id, InterviewSession.end)
 
         # Calculate detailed scores
         detailed_scores = {
@@ -619,7 +723,7 @@ def end_interview():
         }
 
         count = 0
-        for feedback in session_data['feedback']:
+        for feedback in session_data.all_feedback():
             if feedback and 'detailed_scores' in feedback:
                 for key in detailed_scores:
                     if key in feedback['detailed_scores']:
@@ -691,38 +795,11 @@ def end_interview():
 
         return jsonify(response_data)
     except Exception as e:
-        print(f"Error ending interview: {e}")
+        logger.exception("Error ending interview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-# Cleanup thread to remove old sessions
-def cleanup_old_sessions():
-    while True:
-        try:
-            current_time = datetime.now()
-            sessions_to_remove = []
-
-            for session_id, session_data in active_sessions.items():
-                last_activity = datetime.fromisoformat(session_data['last_activity'])
-                # Remove sessions inactive for more than 1 hour
-                if (current_time - last_activity).total_seconds() > 3600:
-                    sessions_to_remove.append(session_id)
-
-            for session_id in sessions_to_remove:
-                active_sessions.pop(session_id, None)
-                print(f"Removed inactive session: {session_id}")
-
-            # Check every 10 minutes
-            time.sleep(600)
-        except Exception as e:
-            print(f"Error in cleanup thread: {e}")
-            time.sleep(600)
-
-# Start cleanup thread
-cleanup_thread = threading.Thread(target=cleanup_old_sessions, daemon=True)
-cleanup_thread.start()
-
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True, threaded=True)
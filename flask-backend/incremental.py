@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict, defaultdict, deque
+
+import numpy as np
+
+from pdf_extract import EMPTY_PAGE_FINGERPRINT
+from textrank import normalize_rows
+
+class DocumentState:
+    """Everything worth keeping from one summarization to speed up the next version
+
+    page_texts maps page fingerprints to extracted text. token_lists are
+    aligned with sentences, similarity is the dense similarity matrix (None
+    in sparse mode) and scores the PageRank scores.
+    """
+
+    def __init__(self, content_hash, page_fingerprints, page_texts, sentences, token_lists, similarity, scores):
+        self.content_hash = content_hash
+        self.page_fingerprints = page_fingerprints
+        self.page_texts = page_texts
+        self.sentences = sentences
+        self.token_lists = token_lists
+        self.similarity = similarity
+        self.scores = scores
+
+    def size(self):
+        """Rough memory footprint in bytes"""
+        size = sum(len(text) for text in self.page_texts.values())
+        size += sum(len(sentence) + 56 for sentence in self.sentences)
+        size += sum(8 * len(tokens) + 56 for tokens in self.token_lists)
+        size += self.scores.nbytes
+        if self.similarity is not None:
+            size += self.similarity.nbytes
+        return size
+
+class DocumentStateCache:
+    """In-memory LRU of document states, bounded by their approximate size
+
+    A state is found by the upload's content hash or, for an edited
+    re-upload, by the previous version sharing the most page fingerprints,
+    provided they make up at least min_shared_pages of the upload's pages.
+    Blank pages are ignored: every document may have them.
+    """
+
+    def __init__(self, max_bytes=256 << 20, min_shared_pages=0.5):
+        self.max_bytes = max_bytes
+        self.min_shared_pages = min_shared_pages
+        self._states = OrderedDict()  # content_hash -> (size, state)
+        self._by_page = defaultdict(set)  # page fingerprint -> content hashes
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def find(self, content_hash, page_fingerprints=()):
+        with self._lock:
+            if content_hash in self._states:
+                self._states.move_to_end(content_hash)
+                return self._states[content_hash][1]
+
+            fingerprints = set(page_fingerprints) - {EMPTY_PAGE_FINGERPRINT}
+            shared_pages = defaultdict(int)
+            for fingerprint in fingerprints:
+                for candidate in self._by_page.get(fingerprint, ()):
+                    shared_pages[candidate] += 1
+            if not shared_pages:
+                return None
+            best = max(shared_pages, key=shared_pages.get)
+            if shared_pages[best] < self.min_shared_pages * len(fingerprints):
+                return None
+            self._states.move_to_end(best)
+            return self._states[best][1]
+
+    def put(self, state):
+        size = state.size()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(state.content_hash)
+            self._states[state.content_hash] = (size, state)
+            self._bytes += size
+            for fingerprint in set(state.page_fingerprints) - {EMPTY_PAGE_FINGERPRINT}:
+                self._by_page[fingerprint].add(state.content_hash)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._states)))
+
+    def _remove(self, content_hash):
+        entry = self._states.pop(content_hash, None)
+        if entry is None:
+            return
+        size, state = entry
+        self._bytes -= size
+        for fingerprint in state.page_fingerprints:
+            holders = self._by_page.get(fingerprint)
+            if holders is not None:
+                holders.discard(content_hash)
+                if not holders:
+                    del self._by_page[fingerprint]
+
+def match_sentences(previous_sentences, sentences):
+    """For every sentence, the index of an identical previous sentence or -1
+
+    Repeated sentences are paired with their previous occurrences in order.
+    """
+    positions = defaultdict(deque)
+    for index, sentence in enumerate(previous_sentences):
+        positions[sentence].append(index)
+
+    previous_index = np.full(len(sentences), -1, dtype=np.int64)
+    for index, sentence in enumerate(sentences):
+        candidates = positions.get(sentence)
+        if candidates:
+            previous_index[index] = candidates.popleft()
+    return previous_index
+
+def update_similarity_matrix(previous_similarity, previous_index, term_matrix):
+    """Dense cosine similarity matrix reusing every entry between unchanged sentences
+
+    Only the rows and columns of sentences without a previous match
+    (previous_index -1) are computed, from the normalized term_matrix; the
+    rest is copied from previous_similarity. Returns the matrix and the
+    number of rows that were computed.
+    """
+    n = len(previous_index)
+    reused = np.flatnonzero(previous_index >= 0)
+    changed = np.flatnonzero(previous_index < 0)
+
+    similarity = np.empty((n, n))
+    old = previous_index[reused]
+    similarity[np.ix_(reused, reused)] = previous_similarity[np.ix_(old, old)]
+
+    if len(changed):
+        normalized = normalize_rows(term_matrix)
+        rows = (normalized[changed] @ normalized.T).toarray()
+        similarity[changed, :] = rows
+        similarity[:, changed] = rows.T
+
+    # A sentence is never compared with itself
+    np.fill_diagonal(similarity, 0.0)
+    return similarity, len(changed)
+
+def warm_start_scores(previous_scores, previous_index):
+    """Starting PageRank vector: previous scores where sentences match, uniform elsewhere"""
+    n = len(previous_index)
+    initial = np.full(n, 1.0 / n)
+    reused = previous_index >= 0
+    initial[reused] = previous_scores[previous_index[reused]] * len(previous_scores) / n
+    return initial
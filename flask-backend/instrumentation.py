@@ -0,0 +1,336 @@
+import atexit
+import bisect
+import cProfile
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'stage_duration_seconds': ('histogram', 'Time spent in a named processing stage'),
+    'http_request_duration_seconds': ('histogram', 'Time to handle a request, up to the start of the response body'),
+    'http_requests_in_flight': ('gauge', 'Requests being handled right now'),
+    'cache_lookups_total': ('counter', 'Cache lookups by cache and result'),
+    'cache_hit_ratio': ('gauge', 'Fraction of cache lookups that were hits since the process started'),
+    'interview_sessions_expired_total': ('counter', 'Interview sessions deleted after being idle'),
+    'interview_session_bytes_reclaimed_total': ('counter', 'Approximate bytes of session data freed by expiry'),
+    'interview_analysis_chunks_total': ('counter', 'Frames and audio chunks analyzed, failed or dropped as stale'),
+}
+
+class Histogram:
+    """Latency histogram with Prometheus' cumulative le buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+class Metrics:
+    """Thread-safe registry of histograms, counters and gauges, rendered in the Prometheus text format
+
+    Labels are tuples of (name, value) pairs. Gauges registered with
+    register_gauge are read from their callback on every scrape.
+
+    With a directory, every server process writes a snapshot of its metrics
+    to <directory>/<pid>.json every flush_interval seconds and at exit, and
+    render() merges them, so any worker's /metrics reports the whole server:
+    counters and histograms are summed over every process that ever wrote
+    one, gauges over the processes still running. A forked child starts
+    with empty metrics of its own.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._values = defaultdict(float)  # (name, labels) -> counter or gauge value
+        self._callbacks = {}  # name -> (label, callback, aggregate)
+        self._help = dict(METRIC_HELP)
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._start_flusher()
+            atexit.register(self.flush)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram()
+            histogram.observe(value)
+
+    def add(self, name, labels, amount=1):
+        with self._lock:
+            self._values[(name, labels)] += amount
+
+    def register_gauge(self, name, help_text, callback, label=None, aggregate='sum'):
+        """Export callback() as gauge name; with label, callback returns {label value: number}
+
+        With a metrics directory, aggregate decides how the values of the
+        server processes are combined: 'sum' for per-process quantities,
+        'max' for ones every process reads from shared state.
+        """
+        if aggregate not in ('sum', 'max'):
+            raise ValueError(f"aggregate must be 'sum' or 'max', not {aggregate!r}")
+        with self._lock:
+            self._help[name] = ('gauge', help_text)
+            self._callbacks[name] = (label, callback, aggregate)
+
+    def _snapshot(self):
+        """This process's metrics: ({key: (counts, sum)}, {key: value}, {key: (gauge value, aggregate)})"""
+        with self._lock:
+            histograms = {key: (list(histogram.counts), histogram.sum)
+                          for key, histogram in self._histograms.items()}
+            values = dict(self._values)
+            callbacks = dict(self._callbacks)
+
+        gauges = {}
+        for name, (label, callback, aggregate) in callbacks.items():
+            try:
+                current = callback()
+            except Exception as e:
+                logger.warning("Error reading metric %s: %s", name, e)
+                continue
+            if label is None:
+                gauges[(name, ())] = (current, aggregate)
+            else:
+                for label_value, value in current.items():
+                    gauges[(name, ((label, label_value),))] = (value, aggregate)
+        return histograms, values, gauges
+
+    def flush(self):
+        """Write this process's snapshot to the metrics directory"""
+        histograms, values, gauges = self._snapshot()
+        snapshot = {
+            'histograms': [[name, labels, counts, total] for (name, labels), (counts, total) in histograms.items()],
+            'values': [[name, labels, value] for (name, labels), value in values.items()],
+            'gauges': [[name, labels, value, aggregate] for (name, labels), (value, aggregate) in gauges.items()],
+        }
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(path + '.tmp', path)
+
+    def _start_flusher(self):
+        def flush_periodically():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning("Error writing metrics to %s: %s", self.directory, e)
+
+        threading.Thread(target=flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def _reset_after_fork(self):
+        # The parent keeps reporting what it recorded before the fork
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._values = defaultdict(float)
+        self._start_flusher()
+
+    def _merge_other_processes(self, histograms, values, gauges):
+        """Add the snapshots other processes wrote to this process's metrics"""
+        live_gauges = defaultdict(list)
+        for key, (value, aggregate) in gauges.items():
+            live_gauges[key].append((value, aggregate))
+
+        for filename in os.listdir(self.directory):
+            pid, extension = os.path.splitext(filename)
+            if extension != '.json' or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Error reading metrics of process %s: %s", pid, e)
+                continue
+            alive = _process_alive(int(pid))
+
+            for name, labels, counts, total in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged_counts, merged_total = histograms.get(key, ([0] * len(counts), 0.0))
+                histograms[key] = ([a + b for a, b in zip(merged_counts, counts)], merged_total + total)
+            for name, labels, value in snapshot['values']:
+                # http_requests_in_flight of a process that died is stale
+                if alive or self._help.get(name, ('untyped',))[0] != 'gauge':
+                    key = (name, tuple(map(tuple, labels)))
+                    values[key] = values.get(key, 0) + value
+            if alive:
+                for name, labels, value, aggregate in snapshot['gauges']:
+                    live_gauges[(name, tuple(map(tuple, labels)))].append((value, aggregate))
+
+        for key, samples in live_gauges.items():
+            combine = max if samples[0][1] == 'max' else sum
+            values[key] = combine(value for value, _ in samples)
+
+    def render(self):
+        histograms, values, gauges = self._snapshot()
+        if self.directory is not None:
+            self._merge_other_processes(histograms, values, gauges)
+        else:
+            values.update({key: value for key, (value, _) in gauges.items()})
+
+        # Hit ratio of every cache with lookups
+        lookups = defaultdict(lambda: [0.0, 0.0])
+        for (name, labels), value in values.items():
+            if name == 'cache_lookups_total':
+                labels = dict(labels)
+                lookups[labels['cache']][labels['result'] == 'hit'] += value
+        for cache, (misses, hits) in lookups.items():
+            values[('cache_hit_ratio', (('cache', cache),))] = hits / (hits + misses)
+
+        families = defaultdict(list)
+        for (name, labels), (counts, total) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), counts):
+                cumulative += count
+                families[name].append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {cumulative}")
+            families[name].append(f"{name}_sum{format_labels(labels)} {total}")
+            families[name].append(f"{name}_count{format_labels(labels)} {cumulative}")
+        for (name, labels), value in sorted(values.items()):
+            families[name].append(f"{name}{format_labels(labels)} {value}")
+
+        lines = []
+        for name, samples in families.items():
+            metric_type, help_text = self._help.get(name, ('untyped', name))
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"] + samples
+        return '\n'.join(lines) + '\n'
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# With METRICS_DIR set (serve.py sets it for more than one worker), /metrics
+# reports every process of the server, updated every METRICS_FLUSH_SECONDS
+metrics = Metrics(os.environ.get('METRICS_DIR') or None, float(os.environ.get('METRICS_FLUSH_SECONDS', 1.0)))
+
+class StageTimer:
+    """Context manager recording its duration as stage_duration_seconds{stage=name}
+
+    Inside a request the duration is also reported in the response's
+    Server-Timing header.
+    """
+    __slots__ = ('labels', 'start')
+
+    def __init__(self, name):
+        self.labels = (('stage', name),)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.start
+        metrics.observe('stage_duration_seconds', self.labels, elapsed)
+        if has_request_context():
+            g.setdefault('stage_timings', []).append((self.labels[0][1], elapsed))
+
+def stage(name):
+    """Time a block as a named stage: with stage('pagerank'): ..."""
+    return StageTimer(name)
+
+def record_cache(cache, hit):
+    """Count one lookup in cache as a hit or a miss"""
+    metrics.add('cache_lookups_total', (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+def register_gauge(name, help_text, callback, label=None, aggregate='sum'):
+    metrics.register_gauge(name, help_text, callback, label, aggregate)
+
+def metrics_view():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def _profile_name(endpoint):
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint or 'unmatched')}-{os.getpid()}"
+
+def instrument(app):
+    """Add request metrics, opt-in profiling and a Prometheus /metrics route to a Flask app
+
+    With PROFILE_REQUESTS=1 in the environment, a request with an
+    X-Profile header runs under cProfile and the stats are written to
+    PROFILE_DIR; the response's X-Profile-File header names the file (open
+    it with python -m pstats). Only one request is profiled at a time and a
+    streamed response is profiled up to the start of its body. Without
+    PROFILE_REQUESTS the header is ignored and costs nothing.
+    """
+    app.config.setdefault('PROFILE_REQUESTS', os.environ.get('PROFILE_REQUESTS', '0') == '1')
+    app.config.setdefault('PROFILE_DIR', os.environ.get('PROFILE_DIR', 'profiles'))
+    profile_lock = threading.Lock()
+
+    @app.before_request
+    def start_request_metrics():
+        if request.endpoint == 'metrics':
+            return
+        g.request_start = time.perf_counter()
+        metrics.add('http_requests_in_flight', ())
+        if app.config['PROFILE_REQUESTS'] and 'X-Profile' in request.headers and profile_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('request_start', None)
+        if start is None:
+            return response
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            profile_lock.release()
+            os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+            name = _profile_name(request.endpoint) + '.prof'
+            profiler.dump_stats(os.path.join(app.config['PROFILE_DIR'], name))
+            response.headers['X-Profile-File'] = name
+
+        metrics.add('http_requests_in_flight', (), -1)
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.observe('http_request_duration_seconds',
+                        (('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))),
+                        time.perf_counter() - start)
+        timings = g.pop('stage_timings', None)
+        if timings:
+            response.headers['Server-Timing'] = ', '.join(f"{name};dur={elapsed * 1000:.1f}"
+                                                          for name, elapsed in timings)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        # Requests that ended without a response still leave the in-flight count
+        if g.pop('request_start', None) is not None:
+            profiler = g.pop('profiler', None)
+            if profiler is not None:
+                profiler.disable()
+                profile_lock.release()
+            metrics.add('http_requests_in_flight', (), -1)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return app
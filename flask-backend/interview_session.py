@@ -0,0 +1,140 @@
+import json
+import time
+from array import array
+
+VIDEO_METRICS = ('eye_contact', 'facial_expressions', 'posture', 'engagement')
+AUDIO_METRICS = ('speaking_pace', 'voice_clarity', 'filler_words', 'tone')
+# Scores kept from each answer's feedback; detailed_scores repeats content_score as 'content'
+FEEDBACK_SCORES = ('content_score', 'communication_score', 'overall_score',
+                   'eye_contact', 'facial_expressions', 'speaking_pace', 'voice_clarity', 'filler_words')
+DETAILED_SCORES = FEEDBACK_SCORES[3:]
+
+NOT_RECORDED = float('nan')
+
+# Each question's stretch of the score buffer: video, then audio, then feedback scores
+QUESTION_SCORES = VIDEO_METRICS + AUDIO_METRICS + FEEDBACK_SCORES
+VIDEO_OFFSET = 0
+AUDIO_OFFSET = len(VIDEO_METRICS)
+FEEDBACK_OFFSET = AUDIO_OFFSET + len(AUDIO_METRICS)
+
+class InterviewSession:
+    """State of one interview, with float timestamps and scores in one flat array buffer
+
+    Question i's scores sit at [i * len(QUESTION_SCORES):(i + 1) *
+    len(QUESTION_SCORES)] of scores, in QUESTION_SCORES order; NaN means
+    not recorded yet. The buffer is allocated with the first score, so a
+    session nobody has answered stays small. pending counts each
+    question's chunks queued or in analysis on any server process, so
+    feedback can wait for them wherever they were uploaded. Timestamps are
+    time.time() seconds.
+    """
+    __slots__ = ('interview_type', 'questions', 'answers', 'feedback_text', 'scores', 'pending',
+                 'start_time', 'last_activity', 'end_time')
+
+    def __init__(self, interview_type, questions, start_time=None):
+        self.interview_type = interview_type
+        self.questions = tuple(questions)
+        self.answers = [None] * len(questions)
+        self.feedback_text = [None] * len(questions)  # (content_feedback, communication_feedback) per answer
+        self.scores = None
+        self.pending = None  # Chunks awaiting analysis per question, allocated with the first
+        self.start_time = time.time() if start_time is None else start_time
+        self.last_activity = self.start_time
+        self.end_time = None
+
+    def touch(self):
+        self.last_activity = time.time()
+
+    def end(self):
+        self.end_time = time.time()
+
+    def _record(self, question_idx, offset, values):
+        if not 0 <= question_idx < len(self.questions):
+            raise IndexError(f"question index {question_idx} out of range")
+        if self.scores is None:
+            self.scores = array('d', [NOT_RECORDED]) * (len(self.questions) * len(QUESTION_SCORES))
+        start = question_idx * len(QUESTION_SCORES) + offset
+        self.scores[start:start + len(values)] = array('d', values)
+
+    def record_video(self, question_idx, scores):
+        """Store a {metric: score} dict with the VIDEO_METRICS keys"""
+        self._record(question_idx, VIDEO_OFFSET, [scores[name] for name in VIDEO_METRICS])
+
+    def record_audio(self, question_idx, scores):
+        """Store a {metric: score} dict with the AUDIO_METRICS keys"""
+        self._record(question_idx, AUDIO_OFFSET, [scores[name] for name in AUDIO_METRICS])
+
+    def record_feedback(self, question_idx, answer, feedback):
+        """Store an answer and the feedback dict returned for it"""
+        values = [feedback[name] for name in FEEDBACK_SCORES[:3]]
+        values += [feedback['detailed_scores'][name] for name in DETAILED_SCORES]
+        self._record(question_idx, FEEDBACK_OFFSET, values)
+        self.feedback_text[question_idx] = (feedback['content_feedback'], tuple(feedback['communication_feedback']))
+        self.answers[question_idx] = answer
+
+    def add_pending(self, question_idx, count):
+        """Add count (negative once analysed) to a question's chunks awaiting analysis"""
+        if not isinstance(question_idx, int) or not 0 <= question_idx < len(self.questions):
+            return  # Its scores cannot be recorded either
+        if self.pending is None:
+            self.pending = [0] * len(self.questions)
+        self.pending[question_idx] = max(0, self.pending[question_idx] + count)
+
+    def pending_chunks(self, question_idx):
+        if self.pending is None or not isinstance(question_idx, int) or not 0 <= question_idx < len(self.questions):
+            return 0
+        return self.pending[question_idx]
+
+    def _recorded(self, question_idx, offset, names):
+        """{name: score} of the scores recorded at offset in a question's stretch of the buffer"""
+        if self.scores is None or not 0 <= question_idx < len(self.questions):
+            return {}
+        start = question_idx * len(QUESTION_SCORES) + offset
+        return {name: value for name, value in zip(names, self.scores[start:start + len(names)])
+                if value == value}  # NaN != NaN
+
+    def communication_scores(self, question_idx):
+        """Latest video and audio scores recorded for a question, {metric: score}"""
+        scores = self._recorded(question_idx, VIDEO_OFFSET, VIDEO_METRICS)
+        scores.update(self._recorded(question_idx, AUDIO_OFFSET, AUDIO_METRICS))
+        return scores
+
+    def all_feedback(self):
+        """Feedback dicts in the shape record_feedback took, None for unanswered questions"""
+        feedback = []
+        for question_idx, text in enumerate(self.feedback_text):
+            if text is None:
+                feedback.append(None)
+                continue
+            scores = self._recorded(question_idx, FEEDBACK_OFFSET, FEEDBACK_SCORES)
+            detailed_scores = {'content': scores['content_score']}
+            detailed_scores.update((name, scores[name]) for name in DETAILED_SCORES)
+            feedback.append({
+                'content_feedback': text[0],
+                'communication_feedback': list(text[1]),
+                'content_score': scores['content_score'],
+                'communication_score': scores['communication_score'],
+                'overall_score': scores['overall_score'],
+                'detailed_scores': detailed_scores,
+            })
+        return feedback
+
+    def to_json(self):
+        # NaN is written as the NaN literal, which json.loads reads back
+        return json.dumps({name: list(value) if isinstance(value, array) else value
+                           for name in self.__slots__ for value in (getattr(self, name),)})
+
+    @classmethod
+    def from_json(cls, text):
+        fields = json.loads(text)
+        session = cls.__new__(cls)
+        session.pending = None  # Absent from sessions stored before it was added
+        for name, value in fields.items():
+            if name == 'scores' and value is not None:
+                value = array('d', value)
+            elif name == 'questions':
+                value = tuple(value)
+            elif name == 'feedback_text':
+                value = [(text[0], tuple(text[1])) if text is not None else None for text in value]
+            setattr(session, name, value)
+        return session
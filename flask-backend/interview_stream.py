@@ -0,0 +1,82 @@
+import json
+import threading
+
+from flask import request
+from flask_sock import ConnectionClosed, Sock
+
+from analysis_pool import KIND_NAMES
+from instrumentation import stage
+
+# Largest message accepted when the app sets no MAX_FRAME_BYTES
+DEFAULT_MAX_MESSAGE_BYTES = 8 << 20
+
+def add_stream_endpoint(app, sessions, analysis_pool, route='/api/interview/stream'):
+    """Serve the interview WebSocket channel at route
+
+    A connection streams one session's frames and audio chunks as binary
+    messages (a VIDEO or AUDIO byte, then the data), switches questions
+    with {"type": "question", "question_idx": n} text messages, and gets
+    each chunk's scores pushed back as a JSON "scores" message. Chunks are
+    analysed by analysis_pool, whose per-session queues drop stale ones, so
+    receiving never waits for analysis. Each open connection holds a
+    server thread.
+    """
+    app.config.setdefault('SOCK_SERVER_OPTIONS', {
+        'ping_interval': 25,
+        # One kind byte more than the largest frame
+        'max_message_size': app.config.get('MAX_FRAME_BYTES', DEFAULT_MAX_MESSAGE_BYTES) + 1,
+    })
+    sock = Sock(app)
+
+    @sock.route(route)
+    def interview_stream(ws):
+        session_id = request.args.get('session_id')
+        send_lock = threading.Lock()
+
+        def send(message):
+            with send_lock:
+                ws.send(json.dumps(message))
+
+        try:
+            question_idx = int(request.args.get('question_idx', 0))
+        except ValueError:
+            send({'type': 'error', 'error': 'Invalid question index'})
+            return
+        with stage('session_lookup'):
+            known_session = bool(session_id) and session_id in sessions
+        if not known_session:
+            send({'type': 'error', 'error': 'Invalid or expired session ID'})
+            return
+
+        dropped = dict.fromkeys(KIND_NAMES, 0)
+
+        def deliver(kind, question_idx, scores, error):
+            try:
+                if error is not None:
+                    send({'type': 'error', 'error': error})
+                else:
+                    send({'type': 'scores', 'kind': KIND_NAMES[kind], 'question_idx': question_idx,
+                          'scores': scores, 'dropped': dropped[kind]})
+            except ConnectionClosed:
+                pass  # The scores are recorded in the session all the same
+
+        try:
+            while True:
+                message = ws.receive()
+                if isinstance(message, str):
+                    try:
+                        control = json.loads(message)
+                        if control.get('type') != 'question':
+                            raise ValueError(f"unknown message type {control.get('type')!r}")
+                        question_idx = int(control['question_idx'])
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        send({'type': 'error', 'error': f"Invalid control message: {e}"})
+                elif message and message[0] in KIND_NAMES:
+                    # A view, so the chunk is not copied out of the message
+                    kind = message[0]
+                    dropped[kind] += analysis_pool.submit(session_id, question_idx, kind,
+                                                          memoryview(message)[1:], deliver)
+                else:
+                    send({'type': 'error', 'error': 'Binary messages start with 1 (video) or 2 (audio)'})
+        except ConnectionClosed:
+            pass
@@ -0,0 +1,310 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+logger = logging.getLogger(__name__)
+
+# How often a running job re-reads its cancel flag from the store
+CANCEL_POLL_INTERVAL = 0.5
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_queued jobs are already waiting"""
+
+class JobCancelled(Exception):
+    """Raised from a running job's progress callback once it has been cancelled"""
+
+def new_job_record(job_id, priority, now):
+    return {
+        'job_id': job_id,
+        'status': QUEUED,
+        'priority': priority,
+        'stage': None,
+        'created_at': now,
+        'started_at': None,
+        'finished_at': None,
+        'result': None,
+        'error': None,
+        'owner_pid': os.getpid(),
+        'cancel_requested': False,
+    }
+
+def _process_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows; assume it is alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class MemoryJobStore:
+    """Job records in a dict; lost when the process exits"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._jobs[record['job_id']] = dict(record)
+
+    def get(self, job_id):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return dict(record) if record is not None else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def purge_finished(self, finished_before):
+        """Delete finished jobs older than finished_before; return how many went"""
+        with self._lock:
+            expired = [job_id for job_id, record in self._jobs.items()
+                       if record['finished_at'] is not None and record['finished_at'] < finished_before]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+class SQLiteJobStore:
+    """Job records in a local SQLite file, shared by every server process on the host
+
+    Results are stored as JSON. Any process can report on or cancel a job;
+    only the process that accepted it holds its upload and runs it.
+    """
+
+    COLUMNS = ('job_id', 'status', 'priority', 'stage', 'created_at', 'started_at', 'finished_at',
+               'result', 'error', 'owner_pid', 'cancel_requested')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connect()
+        if hasattr(os, 'register_at_fork'):
+            # A SQLite connection must not be used across fork (preloaded server workers)
+            os.register_at_fork(after_in_child=self._reconnect_after_fork)
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'job_id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, stage TEXT, '
+            'created_at REAL NOT NULL, started_at REAL, finished_at REAL, result TEXT, error TEXT, '
+            'owner_pid INTEGER NOT NULL, cancel_requested INTEGER NOT NULL DEFAULT 0)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)')
+
+    def _reconnect_after_fork(self):
+        # Keep the inherited connection referenced: closing it here could
+        # checkpoint or remove WAL files the parent process still uses
+        self._inherited_connection = self._connection
+        self._lock = threading.Lock()
+        self._connect()
+
+    def add(self, record):
+        row = self._to_row(record)
+        with self._lock:
+            self._connection.execute(
+                f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                [row[column] for column in self.COLUMNS])
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(zip(self.COLUMNS, row))
+        record['result'] = json.loads(record['result']) if record['result'] is not None else None
+        record['cancel_requested'] = bool(record['cancel_requested'])
+        return record
+
+    def update(self, job_id, **fields):
+        fields = self._to_row(fields)
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._connection.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                                     [*fields.values(), job_id])
+
+    def purge_finished(self, finished_before):
+        with self._lock:
+            cursor = self._connection.execute('DELETE FROM jobs WHERE finished_at < ?', (finished_before,))
+            return cursor.rowcount
+
+    @staticmethod
+    def _to_row(fields):
+        row = dict(fields)
+        if row.get('result') is not None:
+            row['result'] = json.dumps(row['result'])
+        if 'cancel_requested' in row:
+            row['cancel_requested'] = int(row['cancel_requested'])
+        return row
+
+class JobQueue:
+    """Bounded priority queue of background jobs run by a pool of worker threads
+
+    process(payload, progress) does the work and returns a JSON-serializable
+    result. progress(stage) records the job's current stage and raises
+    JobCancelled once the job has been cancelled, so long jobs stop at their
+    next stage. Higher priorities run first, equal priorities in submission
+    order. Finished jobs stay in the store for retention seconds.
+    """
+
+    def __init__(self, store, process, workers=2, max_queued=32, retention=3600):
+        self.store = store
+        self.process = process
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+
+        self._heap = []  # (-priority, sequence, job_id)
+        self._payloads = {}  # job_id -> (payload, cleanup) for queued jobs
+        self._running = set()  # job_id of jobs running in this process
+        self._cancelled = set()  # job_id of running jobs cancelled in this process
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._last_purge = 0.0
+
+    def submit(self, payload, priority=0, cleanup=None):
+        """Queue a job and return its ID; raises QueueFull when the queue is at capacity
+
+        cleanup, if given, is called once the job no longer needs its payload.
+        """
+        self.purge_expired()
+        with self._condition:
+            if len(self._payloads) >= self.max_queued:
+                raise QueueFull()
+            self._start_workers()
+            job_id = secrets.token_urlsafe(12)
+            self.store.add(new_job_record(job_id, priority, time.time()))
+            self._payloads[job_id] = (payload, cleanup)
+            heapq.heappush(self._heap, (-priority, next(self._sequence), job_id))
+            self._condition.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Return a job's record, or None once it is unknown or past retention"""
+        self.purge_expired()
+        record = self.store.get(job_id)
+        if record is not None and record['status'] not in FINISHED_STATES and not _process_alive(record['owner_pid']):
+            # The process holding the upload is gone, so the job can never finish
+            self.store.update(job_id, status=FAILED, error='Interrupted by a server restart',
+                              finished_at=time.time())
+            record = self.store.get(job_id)
+        return record
+
+    def queued_count(self):
+        with self._condition:
+            return len(self._payloads)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; return its record, or None if unknown
+
+        A queued job is cancelled at once. A running one keeps its status
+        until it reaches its next stage, with cancel_requested set meanwhile.
+        """
+        record = self.get(job_id)
+        if record is None or record['status'] in FINISHED_STATES:
+            return record
+
+        cleanup = None
+        with self._condition:
+            if job_id in self._payloads:
+                # Still queued here: its heap entry is skipped when popped
+                _, cleanup = self._payloads.pop(job_id)
+                self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+            else:
+                if job_id in self._running:
+                    self._cancelled.add(job_id)
+                # A job running in another process sharing the store sees
+                # the flag when it next polls the store
+                self.store.update(job_id, cancel_requested=True)
+        if cleanup is not None:
+            cleanup()
+        return self.store.get(job_id)
+
+    def purge_expired(self):
+        """Drop finished jobs past their retention window, at most once a second"""
+        now = time.time()
+        if now - self._last_purge < 1.0:
+            return
+        self._last_purge = now
+        self.store.purge_finished(now - self.retention)
+
+    def _start_workers(self):
+        # Called with the condition held; workers start with the first job
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"summary-job-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    if job_id in self._payloads:
+                        payload, cleanup = self._payloads.pop(job_id)
+                        self._running.add(job_id)
+                        self.store.update(job_id, status=RUNNING, started_at=time.time())
+                        return job_id, payload, cleanup
+                self._condition.wait()
+
+    def _progress_callback(self, job_id):
+        last_stage = None
+        next_poll = time.monotonic() + CANCEL_POLL_INTERVAL
+
+        def progress(stage):
+            nonlocal last_stage, next_poll
+            if job_id in self._cancelled:
+                raise JobCancelled()
+            now = time.monotonic()
+            if now >= next_poll:
+                # Another process may have cancelled it through the store
+                next_poll = now + CANCEL_POLL_INTERVAL
+                record = self.store.get(job_id)
+                if record is not None and record['cancel_requested']:
+                    raise JobCancelled()
+            if stage != last_stage:
+                last_stage = stage
+                self.store.update(job_id, stage=stage)
+
+        return progress
+
+    def _work(self):
+        while True:
+            job_id, payload, cleanup = self._next_job()
+            try:
+                result = self.process(payload, self._progress_callback(job_id))
+                self.store.update(job_id, status=DONE, result=result, finished_at=time.time())
+            except JobCancelled:
+                self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+            finally:
+                with self._condition:
+                    self._running.discard(job_id)
+                    self._cancelled.discard(job_id)
+                if cleanup is not None:
+                    cleanup()
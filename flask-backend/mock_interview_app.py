@@ -3,6 +3,11 @@ from flask_cors import CORS
 import random
 import json
 import os
+from instrumentation import instrument, stage
+from structured_logging import configure_logging
+
+# JSON-lines logs, written by a background thread
+logger = configure_logging('mock_interview_app')
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": "*"}})
@@ -15,7 +20,12 @@ def add_cors_headers(response):
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
     return response
 
+# Stage timers, request metrics and opt-in profiling; Prometheus metrics at /metrics
+instrument(app)
+
 # Load interview questions from JSON file
+question_bank = {'mtime': None, 'questions': None}
+
 def load_questions():
     # Create questions directory if it doesn't exist
     if not os.path.exists('questions'):
@@ -50,12 +60,16 @@ def load_questions():
         with open(default_questions_path, 'w') as f:
             json.dump(default_questions, f, indent=4)
     
-    # Load questions from file
+    # Load questions from file, re-reading it only after it changes
     try:
-        with open(default_questions_path, 'r') as f:
-            return json.load(f)
+        mtime = os.path.getmtime(default_questions_path)
+        if question_bank['mtime'] != mtime:
+            with open(default_questions_path, 'r') as f:
+                question_bank['questions'] = json.load(f)
+            question_bank['mtime'] = mtime
+        return question_bank['questions']
     except Exception as e:
-        print(f"Error loading questions: {e}")
+        logger.exception("Error loading questions: %s", e)
         return {
             "general": ["Tell me about yourself."],
             "technical": ["What is your technical background?"],
@@ -112,7 +126,7 @@ def start_interview():
             'questions': selected_questions
         })
     except Exception as e:
-        print(f"Error starting interview: {e}")
+        logger.exception("Error starting interview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -126,27 +140,28 @@ def get_feedback():
         answer = data.get('answer', '')
         question = data.get('question', '')
         
-        # Simple feedback logic based on answer length
-        # In a real implementation, you would use NLP or an AI model here
-        if len(answer) < 50:
-            feedback_type = "constructive"
-            score = random.randint(1, 3)
-        elif len(answer) < 200:
-            feedback_type = "neutral"
-            score = random.randint(4, 7)
-        else:
-            feedback_type = "positive"
-            score = random.randint(8, 10)
+        with stage('feedback_scoring'):
+            # Simple feedback logic based on answer length
+            # In a real implementation, you would use NLP or an AI model here
+            if len(answer) < 50:
+                feedback_type = "constructive"
+                score = random.randint(1, 3)
+            elif len(answer) < 200:
+                feedback_type = "neutral"
+                score = random.randint(4, 7)
+            else:
+                feedback_type = "positive"
+                score = random.randint(8, 10)
         
-        feedback = random.choice(feedback_templates[feedback_type])
+            feedback = random.choice(feedback_templates[feedback_type])
         
-        # Add question-specific feedback
-        if "yourself" in question.lower():
-            feedback += " When introducing yourself, remember to keep it professional but personable."
-        elif "strength" in question.lower() or "weakness" in question.lower():
-            feedback += " For strengths and weaknesses, always show how you're working on improving."
-        elif "technical" in question.lower() or "programming" in question.lower():
-            feedback += " Technical questions should demonstrate both knowledge and practical experience."
+            # Add question-specific feedback
+            if "yourself" in question.lower():
+                feedback += " When introducing yourself, remember to keep it professional but personable."
+            elif "strength" in question.lower() or "weakness" in question.lower():
+                feedback += " For strengths and weaknesses, always show how you're working on improving."
+            elif "technical" in question.lower() or "programming" in question.lower():
+                feedback += " Technical questions should demonstrate both knowledge and practical experience."
         
         return jsonify({
             'success': True,
@@ -159,7 +174,7 @@ def get_feedback():
             }
         })
     except Exception as e:
-        print(f"Error generating feedback: {e}")
+        logger.exception("Error generating feedback: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -201,7 +216,7 @@ def end_interview():
             'improvement_tips': random.sample(improvement_tips, 3)
         })
     except Exception as e:
-        print(f"Error ending interview: {e}")
+        logger.exception("Error ending interview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
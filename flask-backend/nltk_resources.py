@@ -0,0 +1,123 @@
+# Lazy, offline NLTK resources shared by the summarizers.
+#
+# Nothing here touches the network or even imports nltk until a tokenizer or
+# the stopword set is first requested. Each resource is then looked up in the
+# local nltk_data directories once and cached for the life of the process;
+# when the data is missing the bundled regex tokenizers and stopword list are
+# used instead. Fetch the data explicitly during setup with:
+#
+#     python nltk_resources.py --download
+import logging
+import sys
+import threading
+
+# Fallback tokenizers, used when the punkt model is not installed
+from tokenization import split_sentences as _regex_split_sentences
+from tokenization import tokenize_words as _regex_tokenize_words
+
+# NLTK's English stopword list, used when the stopwords corpus is not installed
+BUNDLED_STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours
+yourself yourselves he him his himself she she's her hers herself it it's its
+itself they them their theirs themselves what which who whom this that that'll
+these those am is are was were be been being have has had having do does did
+doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down
+in out on off over under again further then once here there when where why how
+all any both each few more most other some such no nor not only own same so
+than too very s t can will just don don't should should've now d ll m o re ve
+y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn
+hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't
+shan shan't shouldn shouldn't wasn wasn't weren weren't won won't wouldn
+wouldn't
+""".split())
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_resources = {}
+
+def _load_once(name, loader):
+    """Run loader at most once per process and cache its result (even None)"""
+    if name not in _resources:
+        with _lock:
+            if name not in _resources:
+                _resources[name] = loader()
+    return _resources[name]
+
+def _load_punkt():
+    """Load the English punkt model from local data, or return None"""
+    try:
+        import nltk
+        try:
+            # nltk >= 3.8.2 ships the model as punkt_tab
+            from nltk.tokenize import PunktTokenizer
+            return PunktTokenizer('english')
+        except ImportError:
+            return nltk.data.load('tokenizers/punkt/english.pickle')
+    except (LookupError, OSError, ImportError) as e:
+        logger.info("NLTK punkt model not available, using regex tokenizers: %s", e.__class__.__name__)
+        return None
+
+def _get_punkt():
+    return _load_once('punkt', _load_punkt)
+
+def _load_sentence_tokenizer():
+    punkt = _get_punkt()
+    if punkt is None:
+        return _regex_split_sentences
+    return punkt.tokenize
+
+def _load_word_tokenizer():
+    punkt = _get_punkt()
+    if punkt is None:
+        return _regex_tokenize_words
+
+    from nltk.tokenize.destructive import NLTKWordTokenizer
+    treebank = NLTKWordTokenizer()
+
+    def tokenize_words(text):
+        # Same as nltk.word_tokenize, without reloading punkt on every call
+        return [token for sentence in punkt.tokenize(text) for token in treebank.tokenize(sentence)]
+
+    return tokenize_words
+
+def _load_stop_words():
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+    except (LookupError, OSError, ImportError) as e:
+        logger.info("NLTK stopwords not available, using the bundled list: %s", e.__class__.__name__)
+        return BUNDLED_STOP_WORDS
+
+def get_sentence_tokenizer():
+    """Return a callable splitting text into a list of sentences"""
+    return _load_once('sentence_tokenizer', _load_sentence_tokenizer)
+
+def get_word_tokenizer():
+    """Return a callable splitting text into word tokens"""
+    return _load_once('word_tokenizer', _load_word_tokenizer)
+
+def get_stop_words():
+    """Return the English stopwords as a frozenset"""
+    return _load_once('stop_words', _load_stop_words)
+
+def warm_up():
+    """Load every resource now instead of on the first request"""
+    get_sentence_tokenizer()
+    get_word_tokenizer()
+    get_stop_words()
+
+def download():
+    """Fetch the NLTK data used by the summarizers (needs network access)"""
+    import nltk
+    for package in ('punkt', 'punkt_tab', 'stopwords'):
+        nltk.download(package, quiet=True)
+
+if __name__ == '__main__':
+    if '--download' in sys.argv[1:]:
+        download()
+    warm_up()
+    print(f"Sentence tokenizer: {get_sentence_tokenizer().__qualname__}")
+    print(f"Word tokenizer: {get_word_tokenizer().__qualname__}")
+    print(f"Stopwords: {len(get_stop_words())}")
@@ -0,0 +1,326 @@
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from multiprocessing import resource_tracker, shared_memory
+
+import PyPDF2
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from structured_logging import configure_logging
+
+# Number of extraction processes (0 extracts in the calling thread, without
+# per-page timeouts) and the time budget of a single page in seconds
+PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+PDF_PAGE_TIMEOUT = float(os.environ.get('PDF_PAGE_TIMEOUT', 10))
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# The reader an extraction worker last opened, as (key, reader)
+_worker_reader = None
+
+# PDF bytes handed to the extraction workers in a shared memory block
+SharedPdf = namedtuple('SharedPdf', ['name', 'size'])
+
+class PageTimeoutError(Exception):
+    """Raised inside an extraction worker when one page exceeds its time budget"""
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeoutError()
+
+def open_reader(source):
+    """Open a PdfReader on a file path or on the raw PDF bytes"""
+    if isinstance(source, (bytes, bytearray)):
+        return PyPDF2.PdfReader(BytesIO(source))
+    return PyPDF2.PdfReader(source)
+
+def _extract_page_text(page, page_timeout):
+    """Extract one page, interrupting it after page_timeout seconds where SIGALRM is available"""
+    use_alarm = (bool(page_timeout) and hasattr(signal, 'setitimer')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout)
+        signal.setitimer(signal.ITIMER_REAL, page_timeout)
+    try:
+        return page.extract_text() or ''
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+def _read_shared_pdf(source):
+    """Copy the bytes of a SharedPdf out of its shared memory block"""
+    # Attaching registers the block with the resource tracker again; the
+    # tracker is the pool owner's (see get_executor), so the registration
+    # is the same one the owner removes when it unlinks the block
+    block = shared_memory.SharedMemory(name=source.name)
+    try:
+        return bytes(block.buf[:source.size])
+    finally:
+        block.close()
+
+def _cached_reader(source):
+    """Open a path or SharedPdf, reusing the reader this process opened last for the same document
+
+    A document's page ranges are sent to the workers one by one, so a
+    worker usually gets several ranges of the same file in a row and only
+    parses it for the first.
+    """
+    global _worker_reader
+    if isinstance(source, SharedPdf):
+        key = source
+    else:
+        status = os.stat(source)
+        key = (source, status.st_size, status.st_mtime_ns)
+    if _worker_reader is None or _worker_reader[0] != key:
+        _worker_reader = None  # Release the previous document before parsing the next
+        document = _read_shared_pdf(source) if isinstance(source, SharedPdf) else source
+        _worker_reader = (key, open_reader(document))
+    return _worker_reader[1]
+
+def extract_page_range(source, start, stop, page_timeout=None, reuse_reader=False):
+    """Extract the text of pages [start, stop); failed or timed-out pages become ''
+
+    source is a file path, PDF bytes or a SharedPdf. With reuse_reader, a
+    path or SharedPdf is opened through the calling process's one-reader
+    cache, as extraction workers do.
+    """
+    if reuse_reader and isinstance(source, (str, SharedPdf)):
+        reader = _cached_reader(source)
+    elif isinstance(source, SharedPdf):
+        reader = open_reader(_read_shared_pdf(source))
+    else:
+        reader = open_reader(source)
+    pages = []
+    for page_num in range(start, stop):
+        try:
+            pages.append(_extract_page_text(reader.pages[page_num], page_timeout))
+        except PageTimeoutError:
+            logger.warning("Timed out extracting text from page %d after %ss", page_num + 1, page_timeout)
+            pages.append('')
+        except Exception as e:
+            logger.warning("Error extracting text from page %d: %s", page_num + 1, e)
+            pages.append('')
+    return pages
+
+def _start_worker():
+    # Workers start from a clean interpreter, without the server's logging setup
+    configure_logging()
+
+def get_executor():
+    """Return the shared extraction process pool, creating it on first use
+
+    Workers are started by a fork server (spawned where there is none)
+    rather than forked from the server process, so they inherit none of its
+    threads, connections or at-fork hooks.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if os.name == 'posix':
+                # Workers must share this process's resource tracker, or one
+                # of their own would unlink shared PDFs when the worker exits
+                resource_tracker.ensure_running()
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['pdf_extract'])
+            else:
+                context = multiprocessing.get_context('spawn')
+            _executor = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS, mp_context=context,
+                                            initializer=_start_worker)
+        return _executor
+
+def _replace_broken_executor(executor):
+    """Drop a pool that lost a worker so the next request gets a fresh one
+
+    A broken pool has already failed every pending task and stopped its
+    processes, so nothing else is interrupted.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _share_bytes(data):
+    """Copy PDF bytes into a new shared memory block; returns the block and its SharedPdf"""
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    block.buf[:len(data)] = data
+    return block, SharedPdf(block.name, len(data))
+
+def count_pages(source):
+    return len(open_reader(source).pages)
+
+# Streams whose bytes never affect extracted text: embedded font programs
+# (glyph shapes; the text comes from /Encoding and /ToUnicode) and images
+_UNREAD_STREAM_KEYS = frozenset(('/FontFile', '/FontFile2', '/FontFile3'))
+
+def _hash_pdf_object(obj, digest, memo, read_stream=True):
+    """Feed a canonical serialization of a PDF object, references resolved, into digest
+
+    memo maps each indirect reference already seen in the document to its
+    digest, so objects shared by many pages (fonts, mostly) are hashed
+    once; a reference met again while it is being hashed (a cycle) counts
+    as empty.
+    """
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key not in memo:
+            memo[key] = b''
+            inner = hashlib.sha256()
+            _hash_pdf_object(obj.get_object(), inner, memo, read_stream)
+            memo[key] = inner.digest()
+        digest.update(b'R' + memo[key])
+    elif isinstance(obj, DictionaryObject):
+        digest.update(b'<<')
+        for name in sorted(obj):
+            digest.update(name.encode() + b' ')
+            _hash_pdf_object(obj.raw_get(name), digest, memo, name not in _UNREAD_STREAM_KEYS)
+        digest.update(b'>>')
+        if isinstance(obj, StreamObject) and read_stream and obj.get('/Subtype') != '/Image':
+            digest.update(b'stream ' + obj.get_data())
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'[')
+        for item in obj:
+            _hash_pdf_object(item, digest, memo, read_stream)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode() + b' ')
+
+# Fingerprint of every page without drawing operators, whatever its resources
+EMPTY_PAGE_FINGERPRINT = hashlib.sha256(b'').hexdigest()
+
+def _page_fingerprint(page, memo):
+    digest = hashlib.sha256()
+    contents = page.get('/Contents')
+    if contents is not None:
+        contents = contents.get_object()
+        # Hash the raw content streams without parsing their operators
+        data = b''.join(stream.get_object().get_data()
+                        for stream in (contents if isinstance(contents, list) else [contents]))
+        digest.update(data)
+    if contents is None or not data.strip():
+        return EMPTY_PAGE_FINGERPRINT
+    # The fonts (encodings, /ToUnicode maps) and form XObjects the
+    # operators refer to decide the text as much as the operators do
+    resources = page.raw_get('/Resources') if '/Resources' in page else None
+    if resources is not None:
+        digest.update(b'/Resources ')
+        _hash_pdf_object(resources, digest, memo)
+    return digest.hexdigest()
+
+def page_fingerprints(source):
+    """SHA-256 of every page's content streams and resolved resources, in page order
+
+    Pages whose drawing operators and resources are unchanged get the same
+    fingerprint even when other pages of the file were edited, so their
+    extracted text can be reused. This is much cheaper than extracting the
+    text: resources shared between pages are hashed once per document.
+    Blank pages all get EMPTY_PAGE_FINGERPRINT.
+    """
+    memo = {}
+    return [_page_fingerprint(page, memo) for page in open_reader(source).pages]
+
+def _page_ranges(page_numbers, range_size):
+    """Split sorted page numbers into contiguous [start, stop) runs of at most range_size pages"""
+    ranges = []
+    for page_number in page_numbers:
+        if ranges and ranges[-1][1] == page_number and ranges[-1][1] - ranges[-1][0] < range_size:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([page_number, page_number + 1])
+    return [tuple(page_range) for page_range in ranges]
+
+def iter_pdf_pages(source, workers=None, page_timeout=None, pages=None):
+    """Yield the text of every page in page order
+
+    source is a file path or the raw PDF bytes. Page ranges are extracted in
+    parallel by a shared process pool, and pages are yielded as soon as their
+    range is done. Bytes are handed to the workers in one shared memory
+    block, never written to disk, and each worker parses a document once
+    for all the ranges it gets. A page that takes longer than page_timeout
+    seconds yields '' instead of blocking the whole document; if the
+    document runs past its overall deadline, its remaining ranges are
+    cancelled and yield ''. pages, if given, is a sorted list of page
+    numbers (0-based) to extract instead of all of them.
+    """
+    if workers is None:
+        workers = PDF_EXTRACT_WORKERS
+    if page_timeout is None:
+        page_timeout = PDF_PAGE_TIMEOUT
+    if pages is None:
+        pages = range(count_pages(source))
+
+    total_pages = len(pages)
+    if total_pages == 0:
+        return
+    if workers <= 0:
+        for start, stop in _page_ranges(pages, total_pages):
+            yield from extract_page_range(source, start, stop)
+        return
+
+    # A couple of ranges per worker keeps the pool busy when pages are uneven
+    range_size = max(1, math.ceil(total_pages / (workers * 2)))
+    ranges = _page_ranges(pages, range_size)
+
+    executor = get_executor()
+    block = None
+    futures = []
+    try:
+        # Workers get a path or a shared memory block rather than the whole
+        # document pickled with every range
+        shared = source
+        if isinstance(source, (bytes, bytearray)):
+            block, shared = _share_bytes(source)
+        try:
+            for start, stop in ranges:
+                futures.append(executor.submit(extract_page_range, shared, start, stop, page_timeout, True))
+        except BrokenProcessPool:
+            _replace_broken_executor(executor)
+            for start, stop in ranges:
+                yield from extract_page_range(source, start, stop)
+            return
+
+        # Workers interrupt slow pages themselves; this deadline only matters
+        # where SIGALRM is unavailable or a worker hangs outside page extraction
+        deadline = time.monotonic() + page_timeout * total_pages + page_timeout
+        timed_out = False
+        for future, (start, stop) in zip(futures, ranges):
+            if timed_out:
+                yield from [''] * (stop - start)
+                continue
+            try:
+                yield from future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                logger.warning("Timed out extracting pages %d-%d", start + 1, ranges[-1][1])
+                timed_out = True
+                yield from [''] * (stop - start)
+            except BrokenProcessPool:
+                logger.warning("Extraction worker died on pages %d-%d, extracting in-process", start + 1, stop)
+                _replace_broken_executor(executor)
+                yield from extract_page_range(source, start, stop)
+    finally:
+        # Only this document's ranges that have not started are dropped; the
+        # pool is shared with other requests and its workers stay up
+        for future in futures:
+            future.cancel()
+        if block is not None:
+            block.close()
+            block.unlink()
+
+def extract_text_from_pdf(source, page_separator='', workers=None, page_timeout=None):
+    """Extract text from a PDF file path or PDF bytes, joining the pages once"""
+    return ''.join(page_text + page_separator
+                   for page_text in iter_pdf_pages(source, workers, page_timeout)
+                   if page_text)
@@ -0,0 +1,157 @@
+"""Serve the summarizer or the interview service with a production WSGI server
+
+Run from the flask-backend directory:
+
+    python serve.py summarizer [--workers 4] [--threads 4]
+    python serve.py interview [--app enhanced_mock_interview_app]
+
+On Linux and macOS this runs gunicorn: a master process that imports the
+app and loads NLTK data and the question bank once, then forks --workers
+processes of --threads threads each. Send the master SIGHUP to replace
+every worker gracefully (in-flight requests finish first), SIGTERM to
+drain and stop, and SIGUSR2 followed by SIGTERM to the old master to
+start new code without dropping connections. On Windows, which has no
+fork, it runs waitress: one process with --threads threads.
+"""
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+
+from structured_logging import configure_logging
+
+logger = configure_logging('serve')
+
+SERVICES = {
+    'summarizer': {
+        'apps': ('app', 'simple_app', 'simple_summarizer'),
+        'port': 5000,
+        'workers': os.cpu_count() or 1,
+        'threads': 4,
+    },
+    'interview': {
+        'apps': ('simple_interview_app', 'enhanced_mock_interview_app', 'mock_interview_app'),
+        'port': 5001,
+        'workers': os.cpu_count() or 1,
+        'threads': 32,
+    },
+}
+
+def prepare_environment(service, workers):
+    """Set defaults the app modules read at import time for a multi-process server"""
+    if workers > 1:
+        # Workers write metric snapshots here so /metrics on any of them
+        # reports the whole server; drop the last run's, or its counters
+        # would be added to this one's
+        if not os.environ.get('METRICS_DIR'):
+            os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='metrics-')
+        directory = os.environ['METRICS_DIR']
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(directory, name))
+    if service == 'summarizer' and workers > 1:
+        # Job status requests may reach any worker, so job records must be shared
+        os.environ.setdefault('JOB_STORE', 'sqlite')
+        # Each worker has its own extraction pool; keep the total near the CPU count
+        os.environ.setdefault('PDF_EXTRACT_WORKERS', str(max(1, min(4, (os.cpu_count() or 1) // workers))))
+    if service == 'interview' and workers > 1:
+        # Any worker may get a session's next request, so sessions must be shared
+        os.environ.setdefault('SESSION_STORE', 'sqlite')
+
+def load_app(service, module_name):
+    """Import the Flask app and load the state its first request would otherwise load"""
+    module = importlib.import_module(module_name)
+    if service == 'summarizer':
+        import nltk_resources
+        nltk_resources.warm_up()
+    else:
+        module.load_questions()
+    logger.info("Loaded %s", module_name)
+    return module.app
+
+def run_gunicorn(service, module_name, args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("gunicorn is not installed: pip install gunicorn")
+
+    options = {
+        'bind': f"{args.host}:{args.port}",
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'preload_app': args.preload,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'keepalive': 5,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+    }
+    if os.path.isdir('/dev/shm'):
+        # Worker heartbeats on tmpfs, so a slow disk never gets a worker killed
+        options['worker_tmp_dir'] = '/dev/shm'
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Runs once in the master with --preload, otherwise in every worker
+            return load_app(service, module_name)
+
+    Server().run()
+
+def run_waitress(service, module_name, args):
+    try:
+        import waitress
+    except ImportError:
+        sys.exit("waitress is not installed: pip install waitress")
+
+    waitress.serve(load_app(service, module_name), host=args.host, port=args.port, threads=args.threads)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('service', choices=list(SERVICES))
+    parser.add_argument('--app', help='module to serve (default: app for the summarizer, '
+                                      'simple_interview_app for the interview service)')
+    parser.add_argument('--host', default=os.environ.get('SERVE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, help='default 5000 for the summarizer, 5001 for the interview service')
+    parser.add_argument('--workers', type=int, default=os.environ.get('SERVE_WORKERS'),
+                        help='processes (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=os.environ.get('SERVE_THREADS'),
+                        help='threads per process (default 4 for the summarizer, 32 for the interview service)')
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('SERVE_TIMEOUT', 120)),
+                        help='seconds before an unresponsive worker is restarted')
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.environ.get('SERVE_GRACEFUL_TIMEOUT', 30)),
+                        help='seconds in-flight requests get to finish on restart or shutdown')
+    parser.add_argument('--max-requests', type=int, default=int(os.environ.get('SERVE_MAX_REQUESTS', 0)),
+                        help='replace a worker after this many requests (0: never)')
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        help='import the app in every worker instead of once in the master')
+    parser.add_argument('--server', choices=('gunicorn', 'waitress'),
+                        default='waitress' if os.name == 'nt' else 'gunicorn')
+    args = parser.parse_args()
+
+    service = SERVICES[args.service]
+    module_name = args.app or service['apps'][0]
+    if module_name not in service['apps']:
+        parser.error(f"--app for {args.service} must be one of {', '.join(service['apps'])}")
+    args.port = args.port or service['port']
+    args.workers = args.workers or service['workers']
+    args.threads = args.threads or service['threads']
+    if args.server == 'waitress' and args.workers > 1:
+        logger.warning("waitress runs a single process; ignoring --workers %d", args.workers)
+        args.workers = 1
+
+    prepare_environment(args.service, args.workers)
+    if args.service == 'interview' and args.workers > 1 and os.environ['SESSION_STORE'] == 'memory':
+        logger.warning("SESSION_STORE=memory keeps sessions per process; with %d workers a session "
+                       "is only found by the worker that started it", args.workers)
+    runner = run_waitress if args.server == 'waitress' else run_gunicorn
+    runner(args.service, module_name, args)
+
+if __name__ == '__main__':
+    main()
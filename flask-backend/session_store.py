@@ -0,0 +1,296 @@
+import heapq
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Random bytes per session ID; 12 bytes are 96 bits, 16 URL-safe characters
+SESSION_ID_BYTES = 12
+
+def new_session_id():
+    return secrets.token_urlsafe(SESSION_ID_BYTES)
+
+def create_session(store, session):
+    """Add session to store under a new random ID and return the ID
+
+    store.add never replaces an existing session, so in the vanishingly
+    rare case of a duplicate ID another one is drawn.
+    """
+    while True:
+        session_id = new_session_id()
+        if store.add(session_id, session):
+            return session_id
+
+def session_size(value):
+    """Approximate bytes of memory held by a session's objects, dicts, lists and values"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(session_size(key) + session_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(session_size(item) for item in value)
+    elif hasattr(type(value), '__slots__'):
+        size += sum(session_size(getattr(value, name)) for name in type(value).__slots__ if hasattr(value, name))
+    return size
+
+class MemorySessionStore:
+    """Interview sessions in a dict; each server process has its own
+
+    The session objects themselves are stored and changed in place under
+    the store's lock, so no call copies a session. get returns the stored
+    object: read it, but change it only through update.
+
+    A min-heap of (last activity, session ID) on the monotonic clock finds
+    idle sessions without looking at the others. Every add and update
+    pushes an entry; entries superseded by a later one are dropped when
+    they reach the top.
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self):
+        self._sessions = {}  # session_id -> (last_activity, session)
+        self._activity = []  # heap of (last_activity, session_id), superseded entries included
+        self._lock = threading.Lock()
+
+    def _touch(self, session_id, session):
+        # Called with the lock held
+        now = self.clock()
+        self._sessions[session_id] = (now, session)
+        heapq.heappush(self._activity, (now, session_id))
+        if len(self._activity) > 2 * len(self._sessions) + 64:
+            # Mostly superseded entries: rebuild, keeping pushes O(log n) amortized
+            self._activity = [(last_activity, key) for key, (last_activity, _) in self._sessions.items()]
+            heapq.heapify(self._activity)
+
+    def _superseded(self, last_activity, session_id):
+        entry = self._sessions.get(session_id)
+        return entry is None or entry[0] != last_activity
+
+    def add(self, session_id, session):
+        """Insert session unless session_id is taken; return whether it was inserted"""
+        with self._lock:
+            if session_id in self._sessions:
+                return False
+            self._touch(session_id, session)
+            return True
+
+    def get(self, session_id):
+        """Return the stored session, or None if it is unknown"""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry[1] if entry is not None else None
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def update(self, session_id, change):
+        """Apply change(session), which edits the session in place, atomically
+
+        Returns False if the session is unknown. If change raises, the
+        edits it made before raising are kept but the session's activity
+        time is not updated.
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return False
+            change(entry[1])
+            self._touch(session_id, entry[1])
+            return True
+
+    def count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def oldest_activity(self):
+        """Clock time of the least recently active session, or None if there are none"""
+        with self._lock:
+            while self._activity and self._superseded(*self._activity[0]):
+                heapq.heappop(self._activity)
+            return self._activity[0][0] if self._activity else None
+
+    def purge_inactive(self, idle_seconds):
+        """Delete sessions not added or updated for idle_seconds
+
+        Returns (session ID, approximate bytes freed) for each. Costs
+        O(log n) per heap entry removed.
+        """
+        cutoff = self.clock() - idle_seconds
+        expired = []
+        with self._lock:
+            while self._activity and self._activity[0][0] < cutoff:
+                last_activity, session_id = heapq.heappop(self._activity)
+                if not self._superseded(last_activity, session_id):
+                    expired.append((session_id, self._sessions.pop(session_id)[1]))
+        return [(session_id, session_size(session)) for session_id, session in expired]
+
+class SQLiteSessionStore:
+    """Interview sessions in a local SQLite file, shared by every server process on the host
+
+    Sessions are stored as the text encode(session) returns, JSON by
+    default, and read back with decode. update runs its read-modify-write in one
+    immediate transaction, so concurrent updates from any process are
+    applied one after the other. Activity times are wall-clock times,
+    which unlike the monotonic clock mean the same in every process and
+    after a restart; an index on them finds idle sessions.
+    """
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, path, encode=json.dumps, decode=json.loads):
+        self.path = path
+        self.encode = encode
+        self.decode = decode
+        self._lock = threading.Lock()
+        self._connect()
+        if hasattr(os, 'register_at_fork'):
+            # A SQLite connection must not be used across fork (preloaded server workers)
+            os.register_at_fork(after_in_child=self._reconnect_after_fork)
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'session_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_activity REAL NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS sessions_last_activity ON sessions (last_activity)')
+
+    def _reconnect_after_fork(self):
+        # Keep the inherited connection referenced: closing it here could
+        # checkpoint or remove WAL files the parent process still uses
+        self._inherited_connection = self._connection
+        self._lock = threading.Lock()
+        self._connect()
+
+    def add(self, session_id, session):
+        with self._lock:
+            cursor = self._connection.execute('INSERT OR IGNORE INTO sessions VALUES (?, ?, ?)',
+                                              (session_id, self.encode(session), self.clock()))
+            return cursor.rowcount == 1
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM sessions WHERE session_id = ?',
+                                           (session_id,)).fetchone()
+        return self.decode(row[0]) if row is not None else None
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return self._connection.execute('SELECT 1 FROM sessions WHERE session_id = ?',
+                                            (session_id,)).fetchone() is not None
+
+    def update(self, session_id, change):
+        with self._lock:
+            # IMMEDIATE takes the write lock before reading, so no other
+            # process can change the session between the read and the write
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._connection.execute('SELECT data FROM sessions WHERE session_id = ?',
+                                               (session_id,)).fetchone()
+                if row is None:
+                    self._connection.execute('COMMIT')
+                    return False
+                session = self.decode(row[0])
+                change(session)
+                self._connection.execute('UPDATE sessions SET data = ?, last_activity = ? WHERE session_id = ?',
+                                         (self.encode(session), self.clock(), session_id))
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+        return True
+
+    def count(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def oldest_activity(self):
+        with self._lock:
+            return self._connection.execute('SELECT MIN(last_activity) FROM sessions').fetchone()[0]
+
+    def purge_inactive(self, idle_seconds):
+        cutoff = self.clock() - idle_seconds
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._connection.execute(
+                    'SELECT session_id, length(CAST(data AS BLOB)) FROM sessions WHERE last_activity < ?',
+                    (cutoff,)).fetchall()
+                self._connection.execute('DELETE FROM sessions WHERE last_activity < ?', (cutoff,))
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+        return rows
+
+class SessionExpiry:
+    """Background thread deleting sessions once they have been idle for idle_seconds
+
+    Instead of scanning on a fixed period, it sleeps until the least
+    recently active session is due (at least min_interval seconds, to
+    batch deletions), so a session outlives its idle time by about
+    min_interval at most. Each sweep that deletes sessions is logged with
+    the memory it reclaimed and counted in the session expiry metrics.
+    """
+
+    def __init__(self, store, idle_seconds, min_interval=1.0):
+        self.store = store
+        self.idle_seconds = idle_seconds
+        self.min_interval = min_interval
+        self._thread = None
+        if hasattr(os, 'register_at_fork'):
+            # Server workers forked after this module was preloaded need their own thread
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='session-expiry', daemon=True)
+        self._thread.start()
+        return self
+
+    def _restart_after_fork(self):
+        if self._thread is not None:
+            self.start()
+
+    def sweep(self):
+        """Delete every session idle for idle_seconds; return [(session ID, bytes reclaimed)]"""
+        expired = self.store.purge_inactive(self.idle_seconds)
+        if expired:
+            reclaimed = sum(size for _, size in expired)
+            metrics.add('interview_sessions_expired_total', (), len(expired))
+            metrics.add('interview_session_bytes_reclaimed_total', (), reclaimed)
+            logger.info("Expired %d idle sessions, reclaiming %d bytes", len(expired), reclaimed,
+                        extra={'expired_sessions': len(expired), 'reclaimed_bytes': reclaimed})
+        return expired
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+                oldest = self.store.oldest_activity()
+                # Nothing can expire sooner than idle_seconds after the next add
+                delay = self.idle_seconds if oldest is None else oldest + self.idle_seconds - self.store.clock()
+            except Exception as e:
+                logger.exception("Error expiring sessions: %s", e)
+                delay = self.idle_seconds
+            time.sleep(min(max(delay, self.min_interval), self.idle_seconds))
+
+def open_session_store(kind, path, encode=json.dumps, decode=json.loads):
+    """Return the session store named by SESSION_STORE: 'memory' or 'sqlite' (in the file at path)
+
+    encode and decode convert sessions to and from text for SQLite.
+    """
+    if kind == 'sqlite':
+        return SQLiteSessionStore(path, encode, decode)
+    if kind == 'memory':
+        return MemorySessionStore()
+    raise ValueError(f"Unknown session store {kind!r}")
@@ -1,10 +1,17 @@
 from flask import Flask, request, jsonify, make_response
 from flask_cors import CORS
-import PyPDF2
-import re
 import numpy as np
 import os
-from werkzeug.utils import secure_filename
+from pdf_extract import count_pages, iter_pdf_pages, open_reader
+from upload_buffer import SpooledUploadRequest, pdf_source
+from instrumentation import instrument, record_cache, stage
+from structured_logging import configure_logging
+from summary_cache import SummaryCache, hash_stream, summary_key, text_key
+from tokenization import (ABBREVIATION_PATTERN, CAPITALIZED_SENTENCE_BOUNDARY_PATTERN,
+                          WHITESPACE_PATTERN, tokenize_sentences_words)
+
+# JSON-lines logs, written by a background thread
+logger = configure_logging('simple_app')
 
 app = Flask(__name__)
 # Enable CORS with more specific settings
@@ -16,72 +23,88 @@ def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    response.headers['Access-Control-Expose-Headers'] = 'X-Cache, X-Cache-Text, Server-Timing, X-Profile-File'
     return response
 
+# Stage timers, request metrics and opt-in profiling; Prometheus metrics at /metrics
+instrument(app)
+
+# Parse uploads from memory; only very large ones spill to a unique temp file
+app.request_class = SpooledUploadRequest
+app.config['UPLOAD_MAX_MEMORY'] = int(os.environ.get('UPLOAD_MAX_MEMORY', 16 << 20))
+
 # Create upload folder if it doesn't exist
 UPLOAD_FOLDER = 'uploads'
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-def extract_text_from_pdf(pdf_file_path):
-    """Extract text from PDF file"""
+# Summaries are cached by the SHA-256 of the uploaded PDF, in memory and
+# under uploads/cache. Bump ALGORITHM_VERSION or TEXT_VERSION whenever a
+# change alters summaries or extracted text so stale entries are not reused.
+ALGORITHM_VERSION = 'frequency-1'
+TEXT_VERSION = 'simple-pdf-text-1'
+summary_cache = SummaryCache(os.path.join(UPLOAD_FOLDER, 'cache'),
+                             max_memory_bytes=int(os.environ.get('SUMMARY_CACHE_MEMORY_BYTES', 64 << 20)),
+                             max_disk_bytes=int(os.environ.get('SUMMARY_CACHE_DISK_BYTES', 512 << 20)),
+                             ttl=int(os.environ.get('SUMMARY_CACHE_TTL', 7 * 24 * 3600)))
+
+def extract_text_from_pdf(pdf_source):
+    """Extract text from PDF bytes or file path"""
     try:
-        with open(pdf_file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            total_pages = len(pdf_reader.pages)
-            print(f"PDF has {total_pages} pages")
-
-            text = ""
+        total_pages = count_pages(pdf_source)
+        logger.debug("PDF has %d pages", total_pages)
+
+        # Pages are extracted in parallel and joined once, in page order
+        page_texts = []
+        for page_num, page_text in enumerate(iter_pdf_pages(pdf_source)):
+            if page_text:
+                page_texts.append(page_text + "\n\n")  # Add double newline between pages
+            else:
+                logger.warning("Empty text extracted from page %d", page_num + 1)
+        text = ''.join(page_texts)
+
+        # Check if we got any text
+        if not text.strip():
+            logger.warning("No text extracted from PDF, trying alternative method")
+            # Try an alternative approach (simplified)
+            pdf_reader = open_reader(pdf_source)
+            page_texts = []
             for page_num in range(total_pages):
                 try:
-                    page_text = pdf_reader.pages[page_num].extract_text()
-                    if page_text:
-                        text += page_text + "\n\n"  # Add double newline between pages
-                    else:
-                        print(f"Warning: Empty text extracted from page {page_num + 1}")
+                    page = pdf_reader.pages[page_num]
+                    page_text = ""
+                    # Try to extract text from page objects directly
+                    if '/Contents' in page:
+                        page_text = str(page['/Contents'])
+                    if not page_text.strip():
+                        page_text = str(page)
+                    page_texts.append(page_text + "\n\n")
                 except Exception as e:
-                    print(f"Error extracting text from page {page_num + 1}: {str(e)}")
-
-            # Check if we got any text
-            if not text.strip():
-                print("Warning: No text extracted from PDF, trying alternative method")
-                # Try an alternative approach (simplified)
-                text = ""
-                for page_num in range(total_pages):
-                    try:
-                        page = pdf_reader.pages[page_num]
-                        page_text = ""
-                        # Try to extract text from page objects directly
-                        if '/Contents' in page:
-                            page_text = str(page['/Contents'])
-                        if not page_text.strip():
-                            page_text = str(page)
-                        text += page_text + "\n\n"
-                    except Exception as e:
-                        print(f"Alternative extraction failed for page {page_num + 1}: {str(e)}")
-
-            print(f"Extracted {len(text)} characters from PDF")
-            return text
+                    logger.warning("Alternative extraction failed for page %d: %s", page_num + 1, e)
+            text = ''.join(page_texts)
+
+        logger.debug("Extracted %d characters from PDF", len(text))
+        return text
     except Exception as e:
-        print(f"Error opening or processing PDF: {str(e)}")
+        logger.error("Error opening or processing PDF: %s", e)
         raise
 
 def tokenize_sentences(text):
     """Split text into sentences using regex"""
     if not text or len(text.strip()) == 0:
-        print("Warning: Empty text provided to tokenize_sentences")
+        logger.warning("Empty text provided to tokenize_sentences")
         return []
 
     # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = WHITESPACE_PATTERN.sub(' ', text)
 
     # Replace common abbreviations to prevent false sentence breaks
-    text = re.sub(r'(Mr\.|Mrs\.|Dr\.|Prof\.|etc\.)', lambda m: m.group(0).replace('.', '<DOT>'), text)
+    text = ABBREVIATION_PATTERN.sub(lambda m: m.group(0).replace('.', '<DOT>'), text)
 
     # Split on sentence boundaries (period, question mark, exclamation point)
     # followed by a space and capital letter or end of string
-    sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z]|$)', text)
+    sentences = CAPITALIZED_SENTENCE_BOUNDARY_PATTERN.split(text)
 
     # Restore abbreviation dots
     sentences = [s.replace('<DOT>', '.') for s in sentences]
@@ -91,12 +114,12 @@ def tokenize_sentences(text):
 
     # If we have no sentences (possibly due to poor PDF extraction), fall back to splitting by newlines
     if not sentences:
-        print("Warning: No sentences found with primary method, falling back to newline splitting")
+        logger.warning("No sentences found with primary method, falling back to newline splitting")
         sentences = [s.strip() for s in text.split('\n') if s.strip() and len(s.strip()) > 10]
 
     # If we still have no sentences, create artificial chunks
     if not sentences:
-        print("Warning: No sentences found with fallback method, creating artificial chunks")
+        logger.warning("No sentences found with fallback method, creating artificial chunks")
         # Split text into chunks of approximately 100 characters
         words = text.split()
         chunks = []
@@ -113,31 +136,25 @@ def tokenize_sentences(text):
 
         sentences = chunks
 
-    print(f"Tokenized {len(sentences)} sentences")
+    logger.debug("Tokenized %d sentences", len(sentences))
     return sentences
 
-def tokenize_words(text):
-    """Split text into words using regex"""
-    # Split on word boundaries and filter out non-word characters
-    return re.findall(r'\b\w+\b', text.lower())
+def tokenize_words(sentences):
+    """Split every sentence once into lowercase, interned word lists"""
+    return tokenize_sentences_words(sentences)
 
-def calculate_word_frequency(sentences):
-    """Calculate word frequency across all sentences"""
+def calculate_word_frequency(token_lists):
+    """Calculate word frequency across all tokenized sentences"""
     word_freq = {}
-    for sentence in sentences:
-        words = tokenize_words(sentence)
+    for words in token_lists:
         for word in words:
-            if word not in word_freq:
-                word_freq[word] = 1
-            else:
-                word_freq[word] += 1
+            word_freq[word] = word_freq.get(word, 0) + 1
     return word_freq
 
-def score_sentences(sentences, word_freq):
-    """Score sentences based on word frequency"""
+def score_sentences(token_lists, word_freq):
+    """Score tokenized sentences based on word frequency"""
     sentence_scores = {}
-    for i, sentence in enumerate(sentences):
-        words = tokenize_words(sentence)
+    for i, words in enumerate(token_lists):
         # Avoid division by zero for empty sentences
         if len(words) == 0:
             continue
@@ -148,20 +165,26 @@ def score_sentences(sentences, word_freq):
 def generate_summary(text, num_sentences=5):
     """Generate summary by selecting top-scoring sentences"""
     # Tokenize text into sentences
-    sentences = tokenize_sentences(text)
+    with stage('split_sentences'):
+        sentences = tokenize_sentences(text)
 
     # Handle case with fewer sentences than requested summary length
     if len(sentences) <= num_sentences:
         return ' '.join(sentences)
 
-    # Calculate word frequency
-    word_freq = calculate_word_frequency(sentences)
+    # Tokenize each sentence once; both scoring passes reuse the token lists
+    with stage('tokenize'):
+        token_lists = tokenize_words(sentences)
 
-    # Score sentences
-    sentence_scores = score_sentences(sentences, word_freq)
+    with stage('frequency_scoring'):
+        # Calculate word frequency
+        word_freq = calculate_word_frequency(token_lists)
 
-    # Get top-scoring sentence indices
-    top_indices = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
+        # Score sentences
+        sentence_scores = score_sentences(token_lists, word_freq)
+
+        # Get top-scoring sentence indices
+        top_indices = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
 
     # Sort indices to maintain original order
     top_indices.sort(key=lambda x: x[0])
@@ -171,51 +194,74 @@ def generate_summary(text, num_sentences=5):
 
     return summary
 
+def summary_response(text, summary, cache_status, text_cache_status):
+    """Build the summarize response; X-Cache reports whether the summary came from the cache"""
+    response_data = {
+        'original_text': text,
+        'summary': summary,
+        'original_length': len(text),
+        'summary_length': len(summary)
+    }
+    response = jsonify(response_data)
+
+    # Explicitly set content type
+    response.headers['Content-Type'] = 'application/json'
+    response.headers['X-Cache'] = cache_status
+    response.headers['X-Cache-Text'] = text_cache_status
+
+    return response
+
 @app.route('/api/summarize', methods=['POST'])
 def summarize_pdf():
     """API endpoint to summarize PDF"""
-    print("\n\n===== Received summarize request =====")
-    print(f"Request files: {list(request.files.keys()) if request.files else 'None'}")
-    print(f"Request form: {dict(request.form) if request.form else 'None'}")
+    logger.debug("Received summarize request", extra={'files': list(request.files.keys()), 'form_fields': list(request.form)})
 
     if 'file' not in request.files:
-        print("Error: No file part in request")
+        logger.warning("No file part in request")
         return jsonify({'error': 'No file part'}), 400
 
     file = request.files['file']
-    print(f"Received file: {file.filename}, size: {file.content_length if hasattr(file, 'content_length') else 'unknown'}")
+    logger.debug("Received file", extra={'upload_name': file.filename, 'upload_size': file.content_length})
 
     if file.filename == '':
-        print("Error: Empty filename")
+        logger.warning("Empty filename")
         return jsonify({'error': 'No selected file'}), 400
 
     if file and file.filename.endswith('.pdf'):
-        # Save the uploaded file
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        print(f"Saved file to {file_path}")
+        # Identify the upload by its content so repeated uploads hit the cache
+        content_hash = hash_stream(file.stream)
 
         try:
-            # Extract text from PDF
-            text = extract_text_from_pdf(file_path)
-            print(f"Extracted text length: {len(text)} characters")
-
             # Get summary length from request or use default
             summary_length = int(request.form.get('summary_length', 5))
-            print(f"Summary length: {summary_length} sentences")
+            logger.debug("Summary length: %d sentences", summary_length)
+
+            cached_text = summary_cache.get(text_key(content_hash, TEXT_VERSION))
+            cached_summary = summary_cache.get(summary_key(content_hash, summary_length, ALGORITHM_VERSION))
+            record_cache('pdf_text', cached_text is not None)
+            record_cache('summary', cached_summary is not None)
+            if cached_text is not None and cached_summary is not None:
+                logger.debug("Cache hit for %s", content_hash[:12])
+                return summary_response(cached_text['text'], cached_summary['summary'], 'HIT', 'HIT')
+
+            if cached_text is not None:
+                # A different summary_length of a known PDF skips extraction
+                text = cached_text['text']
+                logger.debug("Using cached text for %s", content_hash[:12])
+            else:
+                # Extract text straight from the buffered upload
+                with stage('pdf_extract'):
+                    text = extract_text_from_pdf(pdf_source(file))
+                logger.debug("Extracted text length: %d characters", len(text))
+                summary_cache.set(text_key(content_hash, TEXT_VERSION), {'text': text})
 
             # Generate summary
             summary = generate_summary(text, summary_length)
-            print(f"Generated summary length: {len(summary)} characters")
-
-            # Clean up - remove the uploaded file
-            os.remove(file_path)
-            print(f"Removed temporary file: {file_path}")
+            logger.debug("Generated summary length: %d characters", len(summary))
 
             # Ensure the summary is not empty
             if not summary or len(summary.strip()) == 0:
-                print("Warning: Generated summary is empty, using a portion of the original text")
+                logger.warning("Generated summary is empty, using a portion of the original text")
                 # Use the first few sentences of the original text as a fallback
                 sentences = tokenize_sentences(text)
                 if sentences:
@@ -224,34 +270,17 @@ def summarize_pdf():
                     # Last resort: use the first 500 characters
                     summary = text[:500] + "..."
 
-            # Print the actual summary content for debugging
-            print(f"Summary content (first 100 chars): {summary[:100]}...")
-
-            response_data = {
-                'original_text': text,
-                'summary': summary,
-                'original_length': len(text),
-                'summary_length': len(summary)
-            }
+            # Log the start of the summary for debugging
+            logger.debug("Summary content (first 100 chars): %s...", summary[:100])
 
-            print("Sending response with summary")
-            response = jsonify(response_data)
+            summary_cache.set(summary_key(content_hash, summary_length, ALGORITHM_VERSION), {'summary': summary})
 
-            # Explicitly set content type
-            response.headers['Content-Type'] = 'application/json'
-
-            return response
+            logger.debug("Sending response with summary")
+            return summary_response(text, summary, 'MISS', 'MISS' if cached_text is None else 'HIT')
 
         except Exception as e:
-            # Clean up in case of error
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"Removed temporary file due to error: {file_path}")
-
             error_message = str(e)
-            print(f"Error processing PDF: {error_message}")
-            import traceback
-            print(traceback.format_exc())
+            logger.exception("Error processing PDF: %s", error_message)
 
             return jsonify({'error': error_message}), 500
 
@@ -5,6 +5,15 @@ import json
 import os
 import time
 from datetime import datetime
+from analysis_pool import AUDIO, VIDEO, AnalysisPool
+from instrumentation import instrument, register_gauge, stage
+from interview_session import InterviewSession
+from interview_stream import add_stream_endpoint
+from session_store import SessionExpiry, create_session, open_session_store
+from structured_logging import configure_logging
+
+# JSON-lines logs, written by a background thread
+logger = configure_logging('simple_interview_app')
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": "*"}})
@@ -17,6 +26,9 @@ def add_cors_headers(response):
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
     return response
 
+# Stage timers, request metrics and opt-in profiling; Prometheus metrics at /metrics
+instrument(app)
+
 # Simple ping endpoint to check if the server is running
 @app.route('/api/ping', methods=['GET', 'OPTIONS'])
 def ping():
@@ -38,6 +50,8 @@ def create_directories():
 create_directories()
 
 # Load interview questions from JSON file
+question_bank = {'mtime': None, 'questions': None}
+
 def load_questions():
     # Create default questions file if it doesn't exist
     default_questions_path = os.path.join('questions', 'default_questions.json')
@@ -68,12 +82,16 @@ def load_questions():
         with open(default_questions_path, 'w') as f:
             json.dump(default_questions, f, indent=4)
 
-    # Load questions from file
+    # Load questions from file, re-reading it only after it changes
     try:
-        with open(default_questions_path, 'r') as f:
-            return json.load(f)
+        mtime = os.path.getmtime(default_questions_path)
+        if question_bank['mtime'] != mtime:
+            with open(default_questions_path, 'r') as f:
+                question_bank['questions'] = json.load(f)
+            question_bank['mtime'] = mtime
+        return question_bank['questions']
     except Exception as e:
-        print(f"Error loading questions: {e}")
+        logger.exception("Error loading questions: %s", e)
         return {
             "general": ["Tell me about yourself."],
             "technical": ["What is your technical background?"],
@@ -134,8 +152,52 @@ communication_feedback = {
     }
 }
 
-# Active interview sessions
-active_sessions = {}
+# Active interview sessions. SESSION_STORE is 'memory', which keeps them
+# in this process, or 'sqlite', which keeps them in SESSION_DATABASE so
+# every server process on the host can serve every session.
+app.config['SESSION_STORE'] = os.environ.get('SESSION_STORE', 'memory')
+app.config['SESSION_DATABASE'] = os.environ.get('SESSION_DATABASE', 'interview_sessions.sqlite3')
+active_sessions = open_session_store(app.config['SESSION_STORE'], app.config['SESSION_DATABASE'],
+                                     InterviewSession.to_json, InterviewSession.from_json)
+# Every process counts the same sessions in a shared store
+register_gauge('interview_active_sessions', 'Interview sessions in the session store', active_sessions.count,
+               aggregate='max' if app.config['SESSION_STORE'] == 'sqlite' else 'sum')
+
+# Sessions idle for SESSION_IDLE_SECONDS are deleted as soon as they expire
+app.config['SESSION_IDLE_SECONDS'] = float(os.environ.get('SESSION_IDLE_SECONDS', 3600))
+session_expiry = SessionExpiry(active_sessions, app.config['SESSION_IDLE_SECONDS']).start()
+
+# Generate random scores for demonstration purposes, without actual processing
+def analyze_video_frame(frame):
+    return {
+        "eye_contact": random.uniform(0.5, 1.0),
+        "facial_expressions": random.uniform(0.4, 0.9),
+        "posture": random.uniform(0.6, 1.0),
+        "engagement": random.uniform(0.5, 0.95)
+    }
+
+def analyze_audio(audio):
+    return {
+        "speaking_pace": random.uniform(0.6, 0.95),
+        "voice_clarity": random.uniform(0.5, 0.9),
+        "filler_words": random.uniform(0.4, 0.85),
+        "tone": random.uniform(0.5, 0.9)
+    }
+
+# Frames and audio chunks streamed over the WebSocket at /api/interview/stream
+# are analysed by ANALYSIS_WORKERS background threads.
+# Each session keeps at most ANALYSIS_PENDING_FRAMES frames and
+# ANALYSIS_PENDING_AUDIO audio chunks waiting; when more arrive, the oldest
+# waiting one is dropped.
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', 8))
+app.config['ANALYSIS_PENDING_FRAMES'] = int(os.environ.get('ANALYSIS_PENDING_FRAMES', 1))
+app.config['ANALYSIS_PENDING_AUDIO'] = int(os.environ.get('ANALYSIS_PENDING_AUDIO', 4))
+analysis_pool = AnalysisPool(active_sessions, {VIDEO: analyze_video_frame, AUDIO: analyze_audio},
+                             {VIDEO: app.config['ANALYSIS_PENDING_FRAMES'], AUDIO: app.config['ANALYSIS_PENDING_AUDIO']},
+                             app.config['ANALYSIS_WORKERS'])
+register_gauge('interview_analysis_pending', 'Frames and audio chunks waiting for or in analysis',
+               analysis_pool.pending_count)
+add_stream_endpoint(app, active_sessions, analysis_pool)
 
 # API endpoint to start a new interview session
 @app.route('/api/interview/start', methods=['POST'])
@@ -156,19 +218,8 @@ def start_interview():
             selected_questions = random.sample(questions.get(interview_type, questions['general']),
                                              min(5, len(questions.get(interview_type, questions['general']))))
 
-        # Generate a unique session ID
-        session_id = random.randint(1000, 9999)
-
-        # Initialize session data
-        active_sessions[session_id] = {
-            'type': interview_type,
-            'questions': selected_questions,
-            'answers': [None] * len(selected_questions),
-            'feedback': [None] * len(selected_questions),
-            'communication_scores': [None] * len(selected_questions),
-            'start_time': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
-        }
+        # Store the new session under a unique random ID
+        session_id = create_session(active_sessions, InterviewSession(interview_type, selected_questions))
 
         return jsonify({
             'success': True,
@@ -176,7 +227,7 @@ def start_interview():
             'questions': selected_questions
         })
     except Exception as e:
-        print(f"Error starting interview: {e}")
+        logger.exception("Error starting interview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -190,38 +241,29 @@ def process_frame():
         session_id = data.get('session_id')
         question_idx = data.get('question_idx', 0)
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            known_session = bool(session_id) and session_id in active_sessions
+        if not known_session:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        # Update last activity timestamp
-        active_sessions[session_id]['last_activity'] = datetime.now().isoformat()
+        frame_scores = analyze_video_frame(data.get('frame_data'))
 
-        # Generate random scores for demonstration purposes
-        frame_scores = {
-            "eye_contact": random.uniform(0.5, 1.0),
-            "facial_expressions": random.uniform(0.4, 0.9),
-            "posture": random.uniform(0.6, 1.0),
-            "engagement": random.uniform(0.5, 0.95)
-        }
+        # Store the communication scores and the last activity timestamp
+        def record_frame(session):
+            session.touch()
+            session.record_video(question_idx, frame_scores)
 
-        # Store or update communication scores
-        if active_sessions[session_id]['communication_scores'][question_idx] is None:
-            active_sessions[session_id]['communication_scores'][question_idx] = {
-                'video': frame_scores,
-                'audio': None
-            }
-        else:
-            active_sessions[session_id]['communication_scores'][question_idx]['video'] = frame_scores
+        active_sessions.update(session_id, record_frame)
 
         return jsonify({
             'success': True,
             'scores': frame_scores
         })
     except Exception as e:
-        print(f"Error processing frame: {e}")
+        logger.exception("Error processing frame: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -235,38 +277,29 @@ def process_audio():
         session_id = data.get('session_id')
         question_idx = data.get('question_idx', 0)
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            known_session = bool(session_id) and session_id in active_sessions
+        if not known_session:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        # Update last activity timestamp
-        active_sessions[session_id]['last_activity'] = datetime.now().isoformat()
+        audio_scores = analyze_audio(data.get('audio_data'))
 
-        # Generate random scores for demonstration purposes
-        audio_scores = {
-            "speaking_pace": random.uniform(0.6, 0.95),
-            "voice_clarity": random.uniform(0.5, 0.9),
-            "filler_words": random.uniform(0.4, 0.85),
-            "tone": random.uniform(0.5, 0.9)
-        }
+        # Store the communication scores and the last activity timestamp
+        def record_audio(session):
+            session.touch()
+            session.record_audio(question_idx, audio_scores)
 
-        # Store or update communication scores
-        if active_sessions[session_id]['communication_scores'][question_idx] is None:
-            active_sessions[session_id]['communication_scores'][question_idx] = {
-                'video': None,
-                'audio': audio_scores
-            }
-        else:
-            active_sessions[session_id]['communication_scores'][question_idx]['audio'] = audio_scores
+        active_sessions.update(session_id, record_audio)
 
         return jsonify({
             'success': True,
             'scores': audio_scores
         })
     except Exception as e:
-        print(f"Error processing audio: {e}")
+        logger.exception("Error processing audio: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -284,118 +317,115 @@ def get_feedback():
         video_data = data.get('video_data', {})  # Aggregated video analysis data
         audio_data = data.get('audio_data', {})  # Aggregated audio analysis data
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            known_session = bool(session_id) and session_id in active_sessions
+        if not known_session:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        # Update last activity timestamp
-        active_sessions[session_id]['last_activity'] = datetime.now().isoformat()
-
-        # Store the answer
-        active_sessions[session_id]['answers'][question_idx] = answer
-
-        # Content feedback logic based on answer length and quality
-        answer_length = len(answer)
-
-        # Base score calculation
-        if answer_length < 20:  # Very short answer
-            feedback_type = "constructive"
-            content_score = random.uniform(5.0, 6.5)
-        elif answer_length < 50:  # Short answer
-            feedback_type = "constructive"
-            content_score = random.uniform(6.0, 7.5)
-        elif answer_length < 100:  # Brief answer
-            feedback_type = "neutral"
-            content_score = random.uniform(7.0, 8.0)
-        elif answer_length < 200:  # Moderate answer
-            feedback_type = "neutral"
-            content_score = random.uniform(7.5, 8.5)
-        else:  # Detailed answer
-            feedback_type = "positive"
-            content_score = random.uniform(8.0, 9.5)
-
-        # Round to one decimal place
-        content_score = round(content_score, 1)
-
-        content_feedback = random.choice(feedback_templates[feedback_type])
-
-        # Add question-specific feedback
-        if "yourself" in question.lower():
-            content_feedback += " When introducing yourself, remember to keep it professional but personable."
-        elif "strength" in question.lower() or "weakness" in question.lower():
-            content_feedback += " For strengths and weaknesses, always show how you're working on improving."
-        elif "technical" in question.lower() or "programming" in question.lower():
-            content_feedback += " Technical questions should demonstrate both knowledge and practical experience."
-
-        # Communication feedback based on video and audio analysis
-        eye_contact_score = video_data.get('eye_contact', random.uniform(0.5, 1.0))
-        facial_expressions_score = video_data.get('facial_expressions', random.uniform(0.4, 0.9))
-        speaking_pace_score = audio_data.get('speaking_pace', random.uniform(0.6, 0.95))
-        voice_clarity_score = audio_data.get('voice_clarity', random.uniform(0.5, 0.9))
-        filler_words_score = audio_data.get('filler_words', random.uniform(0.4, 0.85))
-
-        # Generate communication feedback
-        comm_feedback = []
-
-        # Eye contact feedback
-        if eye_contact_score > 0.8:
-            comm_feedback.append(communication_feedback["eye_contact"]["good"])
-        elif eye_contact_score > 0.5:
-            comm_feedback.append(communication_feedback["eye_contact"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["eye_contact"]["poor"])
-
-        # Facial expressions feedback
-        if facial_expressions_score > 0.8:
-            comm_feedback.append(communication_feedback["facial_expressions"]["good"])
-        elif facial_expressions_score > 0.5:
-            comm_feedback.append(communication_feedback["facial_expressions"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["facial_expressions"]["poor"])
-
-        # Speaking pace feedback
-        if speaking_pace_score > 0.8:
-            comm_feedback.append(communication_feedback["speaking_pace"]["good"])
-        elif speaking_pace_score > 0.5:
-            comm_feedback.append(communication_feedback["speaking_pace"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["speaking_pace"]["poor"])
-
-        # Voice clarity feedback
-        if voice_clarity_score > 0.8:
-            comm_feedback.append(communication_feedback["voice_clarity"]["good"])
-        elif voice_clarity_score > 0.5:
-            comm_feedback.append(communication_feedback["voice_clarity"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["voice_clarity"]["poor"])
-
-        # Filler words feedback
-        if filler_words_score > 0.8:
-            comm_feedback.append(communication_feedback["filler_words"]["good"])
-        elif filler_words_score > 0.5:
-            comm_feedback.append(communication_feedback["filler_words"]["average"])
-        else:
-            comm_feedback.append(communication_feedback["filler_words"]["poor"])
-
-        # Select 2 random communication feedback items to avoid overwhelming the user
-        selected_comm_feedback = random.sample(comm_feedback, min(2, len(comm_feedback)))
-
-        # Calculate overall communication score
-        communication_score = round((
-            eye_contact_score * 2.5 +
-            facial_expressions_score * 2.0 +
-            speaking_pace_score * 1.8 +
-            voice_clarity_score * 1.8 +
-            filler_words_score * 1.9
-        ) / 10.0 * 10, 1)  # Scale to 0-10
-
-        # Ensure communication score is never below 5.0 for better user experience
-        communication_score = max(communication_score, 5.0)
-
-        # Calculate overall score with higher weight on communication (60%)
-        overall_score = round(content_score * 0.4 + communication_score * 0.6, 1)
+        with stage('feedback_scoring'):
+            # Content feedback logic based on answer length and quality
+            answer_length = len(answer)
+
+            # Base score calculation
+            if answer_length < 20:  # Very short answer
+                feedback_type = "constructive"
+                content_score = random.uniform(5.0, 6.5)
+            elif answer_length < 50:  # Short answer
+                feedback_type = "constructive"
+                content_score = random.uniform(6.0, 7.5)
+            elif answer_length < 100:  # Brief answer
+                feedback_type = "neutral"
+                content_score = random.uniform(7.0, 8.0)
+            elif answer_length < 200:  # Moderate answer
+                feedback_type = "neutral"
+                content_score = random.uniform(7.5, 8.5)
+            else:  # Detailed answer
+                feedback_type = "positive"
+                content_score = random.uniform(8.0, 9.5)
+
+            # Round to one decimal place
+            content_score = round(content_score, 1)
+
+            content_feedback = random.choice(feedback_templates[feedback_type])
+
+            # Add question-specific feedback
+            if "yourself" in question.lower():
+                content_feedback += " When introducing yourself, remember to keep it professional but personable."
+            elif "strength" in question.lower() or "weakness" in question.lower():
+                content_feedback += " For strengths and weaknesses, always show how you're working on improving."
+            elif "technical" in question.lower() or "programming" in question.lower():
+                content_feedback += " Technical questions should demonstrate both knowledge and practical experience."
+
+            # Communication feedback based on video and audio analysis
+            eye_contact_score = video_data.get('eye_contact', random.uniform(0.5, 1.0))
+            facial_expressions_score = video_data.get('facial_expressions', random.uniform(0.4, 0.9))
+            speaking_pace_score = audio_data.get('speaking_pace', random.uniform(0.6, 0.95))
+            voice_clarity_score = audio_data.get('voice_clarity', random.uniform(0.5, 0.9))
+            filler_words_score = audio_data.get('filler_words', random.uniform(0.4, 0.85))
+
+            # Generate communication feedback
+            comm_feedback = []
+
+            # Eye contact feedback
+            if eye_contact_score > 0.8:
+                comm_feedback.append(communication_feedback["eye_contact"]["good"])
+            elif eye_contact_score > 0.5:
+                comm_feedback.append(communication_feedback["eye_contact"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["eye_contact"]["poor"])
+
+            # Facial expressions feedback
+            if facial_expressions_score > 0.8:
+                comm_feedback.append(communication_feedback["facial_expressions"]["good"])
+            elif facial_expressions_score > 0.5:
+                comm_feedback.append(communication_feedback["facial_expressions"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["facial_expressions"]["poor"])
+
+            # Speaking pace feedback
+            if speaking_pace_score > 0.8:
+                comm_feedback.append(communication_feedback["speaking_pace"]["good"])
+            elif speaking_pace_score > 0.5:
+                comm_feedback.append(communication_feedback["speaking_pace"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["speaking_pace"]["poor"])
+
+            # Voice clarity feedback
+            if voice_clarity_score > 0.8:
+                comm_feedback.append(communication_feedback["voice_clarity"]["good"])
+            elif voice_clarity_score > 0.5:
+                comm_feedback.append(communication_feedback["voice_clarity"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["voice_clarity"]["poor"])
+
+            # Filler words feedback
+            if filler_words_score > 0.8:
+                comm_feedback.append(communication_feedback["filler_words"]["good"])
+            elif filler_words_score > 0.5:
+                comm_feedback.append(communication_feedback["filler_words"]["average"])
+            else:
+                comm_feedback.append(communication_feedback["filler_words"]["poor"])
+
+            # Select 2 random communication feedback items to avoid overwhelming the user
+            selected_comm_feedback = random.sample(comm_feedback, min(2, len(comm_feedback)))
+
+            # Calculate overall communication score
+            communication_score = round((
+                eye_contact_score * 2.5 +
+                facial_expressions_score * 2.0 +
+                speaking_pace_score * 1.8 +
+                voice_clarity_score * 1.8 +
+                filler_words_score * 1.9
+            ) / 10.0 * 10, 1)  # Scale to 0-10
+
+            # Ensure communication score is never below 5.0 for better user experience
+            communication_score = max(communication_score, 5.0)
+
+            # Calculate overall score with higher weight on communication (60%)
+            overall_score = round(content_score * 0.4 + communication_score * 0.6, 1)
 
         # Store feedback
         feedback_data = {
@@ -414,7 +444,12 @@ def get_feedback():
             }
         }
 
-        active_sessions[session_id]['feedback'][question_idx] = feedback_data
+        # Store the answer, its feedback and the last activity timestamp
+        def record_feedback(session):
+            session.touch()
+            session.record_feedback(question_idx, answer, feedback_data)
+
+        active_sessions.update(session_id, record_feedback)
 
         return jsonify({
             'success': True,
@@ -433,7 +468,7 @@ def get_feedback():
             }
         })
     except Exception as e:
-        print(f"Error generating feedback: {e}")
+        logger.exception("Error generating feedback: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -446,20 +481,20 @@ def end_interview():
         data = request.json
         session_id = data.get('session_id')
 
-        if not session_id or session_id not in active_sessions:
+        with stage('session_lookup'):
+            session_data = active_sessions.get(session_id) if session_id else None
+        if session_data is None:
             return jsonify({
                 'success': False,
                 'error': 'Invalid or expired session ID'
             }), 400
 
-        session_data = active_sessions[session_id]
-
         # Calculate average scores
         content_scores = []
         communication_scores = []
         overall_scores = []
 
-        for feedback in session_data['feedback']:
+        for feedback in session_data.all_feedback():
             if feedback:
                 content_scores.append(feedback['content_score'])
                 communication_scores.append(feedback['communication_score'])
@@ -511,7 +546,7 @@ def end_interview():
         all_tips = selected_content_tips + selected_communication_tips
 
         # Store end time
-        session_data['end_time'] = datetime.now().isoformat()
+        active_sessions.update(session_id, InterviewSession.end)
 
         # Calculate detailed scores
         detailed_scores = {
@@ -532,7 +567,7 @@ def end_interview():
         }
 
         count = 0
-        for feedback in session_data['feedback']:
+        for feedback in session_data.all_feedback():
             if feedback and 'detailed_scores' in feedback:
                 for key in detailed_scores:
                     if key in feedback['detailed_scores']:
@@ -598,12 +633,12 @@ def end_interview():
 
         return jsonify(response_data)
     except Exception as e:
-        print(f"Error ending interview: {e}")
+        logger.exception("Error ending interview: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 if __name__ == '__main__':
-    print("Starting Mock Interview Flask server on http://localhost:5001")
+    logger.info("Starting Mock Interview Flask server on http://localhost:5001")
     app.run(host='0.0.0.0', port=5001, debug=True, threaded=True)
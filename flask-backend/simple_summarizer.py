@@ -1,10 +1,22 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
-from werkzeug.utils import secure_filename
+from instrumentation import instrument, stage
+from structured_logging import configure_logging
+from upload_buffer import SpooledUploadRequest, pdf_source
+
+# JSON-lines logs, written by a background thread
+logger = configure_logging('simple_summarizer')
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['Server-Timing', 'X-Profile-File'])
+
+# Stage timers, request metrics and opt-in profiling; Prometheus metrics at /metrics
+instrument(app)
+
+# Parse uploads from memory; only very large ones spill to a unique temp file
+app.request_class = SpooledUploadRequest
+app.config['UPLOAD_MAX_MEMORY'] = int(os.environ.get('UPLOAD_MAX_MEMORY', 16 << 20))
 
 # Create upload folder if it doesn't exist
 UPLOAD_FOLDER = 'uploads'
@@ -12,18 +24,13 @@ if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-def extract_text_from_pdf(file_path):
-    """Simple function to extract text from PDF"""
+def extract_text_from_pdf(source):
+    """Simple function to extract text from PDF bytes or a file path"""
     try:
         # Try to use PyPDF2 if available
         try:
-            import PyPDF2
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            from pdf_extract import extract_text_from_pdf as extract_pdf_pages
+            return extract_pdf_pages(source, page_separator="\n")
         except ImportError:
             # If PyPDF2 is not available, return a placeholder
             return "PDF text extraction not available. Please install PyPDF2."
@@ -50,14 +57,10 @@ def summarize_pdf():
         return jsonify({'error': 'No selected file'}), 400
 
     if file and file.filename.endswith('.pdf'):
-        # Save the uploaded file
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-
         try:
-            # Extract text from PDF
-            text = extract_text_from_pdf(file_path)
+            # Extract text straight from the buffered upload
+            with stage('pdf_extract'):
+                text = extract_text_from_pdf(pdf_source(file))
 
             # Get summary length from request or use default
             summary_length = int(request.form.get('summary_length', 5))
@@ -65,9 +68,6 @@ def summarize_pdf():
             # Generate summary
             summary = generate_summary(text, summary_length)
 
-            # Clean up - remove the uploaded file
-            os.remove(file_path)
-
             return jsonify({
                 'original_text': text,
                 'summary': summary,
@@ -75,13 +75,10 @@ def summarize_pdf():
                 'summary_length': len(summary)
             })
         except Exception as e:
-            # Clean up in case of error
-            if os.path.exists(file_path):
-                os.remove(file_path)
             return jsonify({'error': str(e)}), 500
 
     return jsonify({'error': 'Invalid file format. Please upload a PDF file.'}), 400
 
 if __name__ == '__main__':
-    print("Starting PDF Summarizer Flask server on http://localhost:5000")
+    logger.info("Starting PDF Summarizer Flask server on http://localhost:5000")
     app.run(host='0.0.0.0', port=5000, debug=True)
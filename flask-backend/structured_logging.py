@@ -0,0 +1,171 @@
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# Attributes of every LogRecord; any other attribute came from extra= and is logged as a field
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the record's extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, extra= fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = ' '.join(f"{key}={value}" for key, value in record.__dict__.items() if key not in RECORD_ATTRIBUTES)
+        return f"{line} {fields}" if fields else line
+
+class SamplingFilter(logging.Filter):
+    """Pass only 1 in every rate DEBUG records from each call site
+
+    Passed records carry sample_rate, so counts can be scaled back up.
+    Records above DEBUG always pass.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self._counters = defaultdict(itertools.count)  # (pathname, lineno) -> count
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate <= 1:
+            return True
+        if next(self._counters[(record.pathname, record.lineno)]) % self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when its queue is full
+
+    The calling thread only renders the message; JSON encoding and writing
+    happen on the listener thread. The first record after a drop carries
+    the number of records dropped before it.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        # Guards dropped, which enqueue may update from several threads at once
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Render the message now, while its arguments are unchanged
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        with self._dropped_lock:
+            dropped = self.dropped
+        if dropped:
+            record.dropped_records = dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+        if dropped:
+            with self._dropped_lock:
+                self.dropped -= dropped
+
+def parse_levels(spec):
+    """Parse 'pdf_extract=DEBUG,werkzeug=WARNING' into {logger name: level}"""
+    levels = {}
+    for item in spec.split(','):
+        if item.strip():
+            name, _, level = item.partition('=')
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+_lock = threading.Lock()
+_handler = None
+_listener = None
+
+def _start_listener(output_handler, queue_size):
+    global _listener
+    log_queue = queue.Queue(queue_size)
+    _handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, output_handler)
+    _listener.start()
+
+def _restart_listener_after_fork():
+    # The parent's listener thread does not exist in a forked child
+    if _listener is not None:
+        _start_listener(_listener.handlers[0], _handler.queue.maxsize)
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+def configure_logging(name=None):
+    """Set up the process's logging once and return the logger called name
+
+    Records are written to stdout as JSON lines by a background thread, so
+    slow log capture never blocks a request. Configured from the
+    environment:
+
+    - LOG_LEVEL (default INFO): level of every logger
+    - LOG_LEVELS: per-logger overrides, e.g. 'pdf_extract=DEBUG,werkzeug=WARNING'
+    - LOG_FORMAT: json (default) or text
+    - LOG_DEBUG_SAMPLE_RATE (default 1): keep 1 in this many DEBUG records per call site
+    - LOG_QUEUE_SIZE (default 10000): records buffered before new ones are
+      dropped; 0 writes synchronously from the logging thread
+    """
+    global _handler
+    with _lock:
+        if _handler is None:
+            output_handler = logging.StreamHandler(sys.stdout)
+            output_handler.setFormatter(TextFormatter() if os.environ.get('LOG_FORMAT') == 'text'
+                                        else JsonFormatter())
+            queue_size = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+            if queue_size > 0:
+                _handler = BoundedQueueHandler(None)
+                _start_listener(output_handler, queue_size)
+                atexit.register(_stop_listener)
+                if hasattr(os, 'register_at_fork'):
+                    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+            else:
+                _handler = output_handler
+            _handler.addFilter(SamplingFilter(int(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1))))
+
+            root = logging.getLogger()
+            root.addHandler(_handler)
+            root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+            for logger_name, level in parse_levels(os.environ.get('LOG_LEVELS', '')).items():
+                logging.getLogger(logger_name).setLevel(level)
+    return logging.getLogger(name)
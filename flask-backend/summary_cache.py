@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+def hash_stream(stream, chunk_size=1 << 20):
+    """SHA-256 of a file-like object, read in chunks; the stream is rewound afterwards"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def hash_source(source):
+    """SHA-256 of PDF bytes or of the file at a path"""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    with open(source, 'rb') as f:
+        return hash_stream(f)
+
+def summary_key(content_hash, summary_length, algorithm_version):
+    return f"summary-{algorithm_version}-{summary_length}-{content_hash}"
+
+def text_key(content_hash, extractor_version):
+    return f"text-{extractor_version}-{content_hash}"
+
+class SummaryCache:
+    """Two-tier cache of JSON-serializable values keyed by content hash
+
+    The memory tier is an LRU bounded by the serialized size of its
+    entries. The disk tier keeps one JSON file per key under directory and
+    evicts the least recently used files once it grows past max_disk_bytes.
+    Entries in both tiers expire ttl seconds after they were stored.
+    """
+
+    def __init__(self, directory, max_memory_bytes=64 << 20, max_disk_bytes=512 << 20, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+
+        self._memory = OrderedDict()  # key -> (expires_at, size, value)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(directory)
+                               if entry.name.endswith('.json'))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return value
+                self._drop_memory(key)
+
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if stored_at + self.ttl <= now:
+                self._remove_file(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = f.read()
+        except OSError:
+            return None
+
+        value = json.loads(payload)
+        with self._lock:
+            self._store_memory(key, value, len(payload), stored_at + self.ttl)
+        # Record the access in atime for LRU eviction; mtime stays the time
+        # the entry was stored, which the TTL is measured from
+        try:
+            os.utime(path, (now, stored_at))
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        """Store a JSON-serializable value in both tiers"""
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._store_memory(key, value, len(payload), now + self.ttl)
+
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("Error writing cache entry %s: %s", key, e)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        with self._lock:
+            self._disk_bytes += len(payload) - previous_size
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _store_memory(self, key, value, size, expires_at):
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._drop_memory(key)
+        self._memory[key] = (expires_at, size, value)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            oldest_key = next(iter(self._memory))
+            self._drop_memory(oldest_key)
+
+    def _drop_memory(self, key):
+        _, size, _ = self._memory.pop(key)
+        self._memory_bytes -= size
+
+    def _remove_file(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+
+    def _evict_disk(self):
+        """Delete expired files, then least recently used ones until under budget"""
+        # Evict down to 90% of the budget so every new entry does not trigger a scan
+        target_bytes = self.max_disk_bytes * 0.9
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if stat.st_mtime + self.ttl <= now:
+                self._remove_file(entry.path)
+            else:
+                entries.append((stat.st_atime, entry.path))
+
+        entries.sort()
+        for _, path in entries:
+            with self._lock:
+                if self._disk_bytes <= target_bytes:
+                    break
+            self._remove_file(path)
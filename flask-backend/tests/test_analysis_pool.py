@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+import enhanced_mock_interview_app as interview
+from analysis_pool import AUDIO, VIDEO, AnalysisPool
+from interview_session import InterviewSession
+from session_store import SQLiteSessionStore, create_session
+
+VIDEO_SCORES = {'eye_contact': 0.12, 'facial_expressions': 0.23, 'posture': 0.34, 'engagement': 0.45}
+AUDIO_SCORES = {'speaking_pace': 0.31, 'voice_clarity': 0.22, 'filler_words': 0.18, 'tone': 0.27}
+
+@pytest.fixture
+def store(tmp_path):
+    """A session store shared the way server processes share it"""
+    return SQLiteSessionStore(str(tmp_path / 'sessions.sqlite3'), InterviewSession.to_json, InterviewSession.from_json)
+
+def slow_analyzers(release):
+    def analyze_video(frame):
+        release.wait(10)
+        return VIDEO_SCORES
+
+    def analyze_audio(audio):
+        release.wait(10)
+        return AUDIO_SCORES
+
+    return {VIDEO: analyze_video, AUDIO: analyze_audio}
+
+def test_wait_covers_chunks_queued_by_another_pool(store):
+    session_id = create_session(store, InterviewSession('general', ['Q1', 'Q2']))
+    release = threading.Event()
+    other_worker = AnalysisPool(store, slow_analyzers(release), {VIDEO: 1, AUDIO: 4}, workers=1)
+    this_worker = AnalysisPool(store, slow_analyzers(release), {VIDEO: 1, AUDIO: 4}, workers=1)
+
+    other_worker.submit(session_id, 0, VIDEO, b'frame')
+    assert store.get(session_id).pending_chunks(0) == 1
+    assert not this_worker.wait(session_id, 0, timeout=0.2)
+    assert this_worker.wait(session_id, 1, timeout=0.2)  # Nothing queued for question 1
+
+    release.set()
+    assert this_worker.wait(session_id, 0, timeout=5)
+    session = store.get(session_id)
+    assert session.pending_chunks(0) == 0
+    assert session.communication_scores(0) == VIDEO_SCORES
+
+def test_displaced_and_failed_chunks_are_uncounted(store):
+    session_id = create_session(store, InterviewSession('general', ['Q1']))
+    release = threading.Event()
+    analyzers = slow_analyzers(release)
+    analyzers[AUDIO] = lambda audio: 1 / 0
+    pool = AnalysisPool(store, analyzers, {VIDEO: 1, AUDIO: 1}, workers=1)
+
+    pool.submit(session_id, 0, VIDEO, b'running')
+    pool.submit(session_id, 0, VIDEO, b'displaced')
+    assert pool.submit(session_id, 0, VIDEO, b'latest') == 1
+    pool.submit(session_id, 0, AUDIO, b'fails')
+    release.set()
+
+    assert pool.wait(session_id, 0, timeout=5)
+    assert store.get(session_id).pending_chunks(0) == 0
+
+def test_feedback_includes_chunks_answered_202_by_another_worker(store, monkeypatch, tmp_path):
+    # questions/, frames/ and recordings/ live in the working directory
+    (tmp_path / 'questions').mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(interview, 'active_sessions', store)
+    release = threading.Event()
+    other_worker = AnalysisPool(store, slow_analyzers(release), {VIDEO: 1, AUDIO: 4}, workers=2)
+    this_worker = AnalysisPool(store, slow_analyzers(release), {VIDEO: 1, AUDIO: 4}, workers=2)
+    client = interview.app.test_client()
+    session_id = client.post('/api/interview/start', json={'type': 'general'}).get_json()['interview_id']
+
+    # The uploads are answered by the other worker...
+    monkeypatch.setattr(interview, 'analysis_pool', other_worker)
+    response = client.post('/api/interview/process-frame', data=b'\xff\xd8frame',
+                           content_type='application/octet-stream', headers={'X-Session-Id': session_id})
+    assert response.status_code == 202
+    response = client.post('/api/interview/process-audio', json={'session_id': session_id, 'audio_data': 'UklGRg=='})
+    assert response.status_code == 202
+
+    # ...and feedback by this one, while the other is still analysing
+    monkeypatch.setattr(interview, 'analysis_pool', this_worker)
+    threading.Timer(0.3, release.set).start()
+    started = time.monotonic()
+    response = client.post('/api/interview/feedback', json={
+        'session_id': session_id, 'question_idx': 0, 'question': 'Tell me about yourself.',
+        'answer': 'I have led several projects and enjoy solving hard problems.'})
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 0.25
+
+    detailed_scores = response.get_json()['detailed_scores']
+    assert detailed_scores['eye_contact'] == 1.2
+    assert detailed_scores['facial_expressions'] == 2.3
+    assert detailed_scores['speaking_pace'] == 3.1
+    assert detailed_scores['voice_clarity'] == 2.2
+    assert detailed_scores['filler_words'] == 1.8
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+import pytest
+
+import app
+from incremental import DocumentStateCache
+from summary_cache import SummaryCache
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+@pytest.mark.parametrize('text', [42, 1.5, ['A sentence.'], {'text': 'A sentence.'}, None, True])
+def test_summarize_text_rejects_text_that_is_not_a_string(client, text):
+    response = client.post('/api/summarize-text', json={'text': text})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'text must be a string'}
+
+def test_summarize_text_accepts_json_text(client):
+    text = "The first sentence is here. The second sentence follows it. A third one ends the text."
+    response = client.post('/api/summarize-text', json={'text': text, 'summary_length': 1})
+
+    assert response.status_code == 200
+    assert response.get_json()['original_text'] == text
+
+def parse_sse(body):
+    """Split an event stream into ('comment', text) and (event, data) frames, checking the framing"""
+    assert body.endswith('\n\n')
+    frames = []
+    for frame in body[:-2].split('\n\n'):
+        lines = frame.split('\n')
+        if lines[0].startswith(':'):
+            assert len(lines) == 1
+            frames.append(('comment', lines[0][1:].strip()))
+            continue
+        assert len(lines) == 2 and lines[0].startswith('event: ') and lines[1].startswith('data: ')
+        frames.append((lines[0][len('event: '):], json.loads(lines[1][len('data: '):])))
+    return frames
+
+@pytest.fixture
+def fresh_caches(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'summary_cache', SummaryCache(str(tmp_path)))
+    monkeypatch.setattr(app, 'document_states', DocumentStateCache(1 << 20))
+
+def post_stream(client, **form):
+    with open(os.path.join(BACKEND_DIR, 'test_document.pdf'), 'rb') as f:
+        return client.post('/api/summarize/stream', data={'file': (f, 'test_document.pdf'), **form})
+
+def test_format_sse_keeps_multiline_data_in_one_data_line():
+    frame = app.format_sse('summary', {'summary': "Two\nlines", 'n': 1})
+
+    assert frame == 'event: summary\ndata: {"summary": "Two\\nlines", "n": 1}\n\n'
+    assert parse_sse(frame) == [('summary', {'summary': "Two\nlines", 'n': 1})]
+
+def test_stream_reports_progress_then_the_summary(client, fresh_caches):
+    response = post_stream(client, summary_length='2')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    frames = parse_sse(response.get_data(as_text=True))
+    events = [event for event, _ in frames]
+    assert frames[0] == ('comment', 'started')
+    assert events[-1] == 'summary'
+    for earlier, later in [('extracting', 'sentences'), ('sentences', 'provisional'), ('provisional', 'summary')]:
+        assert events.index(earlier) < events.index(later)
+    summary = frames[-1][1]
+    assert summary['cache'] == 'MISS'
+    assert summary['summary_length'] == len(summary['summary'])
+    assert summary['original_length'] == len(summary['original_text'])
+
+def test_cached_stream_goes_straight_to_the_summary(client, fresh_caches):
+    post_stream(client, summary_length='2').get_data()
+    frames = parse_sse(post_stream(client, summary_length='2').get_data(as_text=True))
+
+    assert [event for event, _ in frames] == ['comment', 'summary']
+    assert frames[1][1]['cache'] == 'HIT'
+
+def test_stream_sends_keep_alives_and_ends_with_an_error_event(client, monkeypatch):
+    def slow_failure(source, content_hash, summary_length, progress):
+        time.sleep(0.2)
+        raise ValueError("no text in PDF")
+
+    monkeypatch.setitem(app.app.config, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    monkeypatch.setattr(app, 'summarize_pdf_source', slow_failure)
+    frames = parse_sse(post_stream(client).get_data(as_text=True))
+
+    assert frames[0] == ('comment', 'started')
+    assert ('comment', 'keep-alive') in frames[1:-1]
+    assert frames[-1] == ('error', {'error': 'no text in PDF'})
@@ -0,0 +1,96 @@
+import io
+import threading
+import time
+import zipfile
+
+from werkzeug.datastructures import FileStorage
+
+from batch import BatchItem, iter_batch_items, iter_batch_results
+
+def item(name, loaded=None):
+    def load():
+        if loaded is not None:
+            loaded.append(name)
+        if name.startswith('unreadable'):
+            raise OSError(f"cannot read {name}")
+        return name
+    return BatchItem(name, load=load)
+
+def process(source):
+    if source.startswith('broken'):
+        raise ValueError(f"{source} has no text")
+    return source.upper()
+
+def by_name(results):
+    return {entry.filename: (result, error) for _, entry, result, error in results}
+
+def test_an_error_in_one_item_does_not_stop_the_others():
+    items = [item('a.pdf'), item('broken.pdf'), item('unreadable.pdf'), item('b.pdf'),
+             BatchItem('notes.txt', error='Invalid file format. Please upload a PDF file.')]
+
+    results = list(iter_batch_results(items, process, max_workers=2))
+
+    assert sorted(index for index, _, _, _ in results) == [0, 1, 2, 3, 4]
+    assert by_name(results) == {
+        'a.pdf': ('A.PDF', None),
+        'broken.pdf': (None, 'broken.pdf has no text'),
+        'unreadable.pdf': (None, 'cannot read unreadable.pdf'),
+        'b.pdf': ('B.PDF', None),
+        'notes.txt': (None, 'Invalid file format. Please upload a PDF file.'),
+    }
+
+def test_items_past_the_limit_are_reported_without_being_loaded():
+    loaded = []
+    items = [item(f'{n}.pdf', loaded) for n in range(5)]
+
+    results = by_name(iter_batch_results(items, process, max_workers=2, max_items=3))
+
+    assert sorted(loaded) == ['0.pdf', '1.pdf', '2.pdf']
+    assert results['3.pdf'] == (None, 'Batch limit of 3 files reached')
+    assert results['4.pdf'] == (None, 'Batch limit of 3 files reached')
+
+def test_at_most_max_workers_items_are_loaded_at_once():
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def slow(source):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return source
+
+    results = list(iter_batch_results([item(f'{n}.pdf') for n in range(12)], slow, max_workers=3))
+
+    assert len(results) == 12
+    assert peak[0] <= 3
+
+def test_closing_the_results_drops_queued_items():
+    loaded = []
+    results = iter_batch_results((item(f'{n}.pdf', loaded) for n in range(50)), process, max_workers=2)
+    next(results)
+    results.close()
+
+    # The yielded item, the one still running and at most one more
+    assert len(loaded) <= 3
+
+def test_a_bad_zip_is_reported_as_one_item():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('inside.pdf', b'%PDF-1.4')
+        zf.writestr('big.pdf', b'x' * 100)
+        zf.writestr('readme.txt', b'not a pdf')
+    archive.seek(0)
+    files = [FileStorage(io.BytesIO(b'not a zip'), filename='broken.zip'),
+             FileStorage(archive, filename='docs.zip')]
+
+    items = list(iter_batch_items(files, max_member_bytes=50))
+
+    assert [(entry.filename, entry.error) for entry in items] == [
+        ('broken.zip', 'Invalid zip archive: File is not a zip file'),
+        ('inside.pdf', None),
+        ('big.pdf', 'File is larger than 50 bytes uncompressed'),
+    ]
+    assert items[1].load() == b'%PDF-1.4'
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+import app
+from pdf_extract import extract_text_from_pdf
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+@pytest.fixture
+def fixture_text():
+    return extract_text_from_pdf(os.path.join(BACKEND_DIR, 'test_document.pdf'))
+
+def rank(monkeypatch, text, num_sentences, **config):
+    """generate_summary with config overrides; returns (summary, stats, scores)"""
+    for name, value in config.items():
+        monkeypatch.setitem(app.app.config, name, value)
+    scores = []
+    for name in ('rank_term_matrix', 'rank_on_disk'):
+        def spy(*args, _rank=getattr(app, name), **kwargs):
+            result = _rank(*args, **kwargs)
+            scores.append(result[0] if isinstance(result, tuple) else result)
+            return result
+        monkeypatch.setattr(app, name, spy)
+    stats = {}
+    summary = app.generate_summary(text, num_sentences, stats)
+    monkeypatch.undo()
+    return summary, stats, scores[0]
+
+@pytest.mark.parametrize('max_term_sentences', [0, 1000])
+@pytest.mark.parametrize('num_sentences', [1, 3, 5])
+def test_disk_mode_ranks_like_sparse_mode(monkeypatch, tmp_path, fixture_text, num_sentences, max_term_sentences):
+    sparse_summary, sparse_stats, sparse_scores = rank(monkeypatch, fixture_text, num_sentences,
+                                                       SPARSE_MODE_MIN_SENTENCES=1)
+    disk_summary, disk_stats, disk_scores = rank(monkeypatch, fixture_text, num_sentences,
+                                                 SPARSE_MODE_MIN_SENTENCES=1, SUMMARY_MAX_MEMORY=1,
+                                                 UPLOAD_FOLDER=str(tmp_path),
+                                                 DISK_MODE_MAX_TERM_SENTENCES=max_term_sentences)
+
+    assert (sparse_stats['mode'], disk_stats['mode']) == ('sparse', 'disk')
+    # No term of the fixture is frequent enough to be dropped
+    assert disk_stats['pruned_terms'] == 0
+    assert disk_stats['edge_count'] == sparse_stats['edge_count']
+    np.testing.assert_allclose(disk_scores, sparse_scores, atol=1e-9)
+    assert disk_summary == sparse_summary
+    assert os.listdir(tmp_path) == []
+
+def test_disk_mode_drops_frequent_terms_from_the_graph(monkeypatch, tmp_path, fixture_text):
+    _, sparse_stats, _ = rank(monkeypatch, fixture_text, 3, SPARSE_MODE_MIN_SENTENCES=1)
+    _, disk_stats, disk_scores = rank(monkeypatch, fixture_text, 3,
+                                      SPARSE_MODE_MIN_SENTENCES=1, SUMMARY_MAX_MEMORY=1,
+                                      UPLOAD_FOLDER=str(tmp_path), DISK_MODE_MAX_TERM_SENTENCES=2)
+
+    # The documented approximation: pairs linked only through dropped terms lose their edge
+    assert disk_stats['pruned_terms'] > 0
+    assert disk_stats['edge_count'] < sparse_stats['edge_count']
+    assert disk_scores.sum() == pytest.approx(1.0)
@@ -0,0 +1,74 @@
+import io
+
+import numpy as np
+import pytest
+
+import app
+from incremental import DocumentState, DocumentStateCache
+from pdf_extract import EMPTY_PAGE_FINGERPRINT, page_fingerprints
+from summary_cache import SummaryCache, hash_source
+
+def state(content_hash, fingerprints):
+    return DocumentState(content_hash, fingerprints, {}, ['A sentence.'], [[0]], None, np.ones(1))
+
+def test_blank_pages_get_the_empty_fingerprint():
+    from PyPDF2 import PdfWriter
+
+    writer = PdfWriter()
+    writer.add_blank_page(612, 792)
+    writer.add_blank_page(300, 400)
+    output = io.BytesIO()
+    writer.write(output)
+
+    assert page_fingerprints(output.getvalue()) == [EMPTY_PAGE_FINGERPRINT] * 2
+
+def test_a_shared_blank_page_does_not_match():
+    cache = DocumentStateCache(min_shared_pages=0.5)
+    cache.put(state('old', [EMPTY_PAGE_FINGERPRINT, 'a', 'b']))
+
+    assert cache.find('new', [EMPTY_PAGE_FINGERPRINT, 'c', 'd']) is None
+    assert cache.find('new', [EMPTY_PAGE_FINGERPRINT]) is None
+
+def test_matches_need_the_minimum_share_of_pages():
+    cache = DocumentStateCache(min_shared_pages=0.5)
+    cache.put(state('old', ['a', 'b', 'c', 'd']))
+
+    # One page of four in common: a different document with the same cover
+    assert cache.find('new', ['a', 'x', 'y', 'z']) is None
+    # Half of the pages, blank pages not counted
+    assert cache.find('new', ['a', 'b', 'y', 'z', EMPTY_PAGE_FINGERPRINT]).content_hash == 'old'
+
+def test_the_best_match_wins():
+    cache = DocumentStateCache(min_shared_pages=0.5)
+    cache.put(state('one', ['a', 'b', 'x']))
+    cache.put(state('two', ['a', 'b', 'c']))
+
+    assert cache.find('new', ['a', 'b', 'c', 'd']).content_hash == 'two'
+
+def make_pdf(pages):
+    pytest.importorskip('reportlab')
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+    styles = getSampleStyleSheet()
+    elements = []
+    for text in pages:
+        elements += [Paragraph(text, styles['Normal']), PageBreak()]
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, invariant=1).build(elements)
+    return buffer.getvalue()
+
+def test_edited_reupload_reuses_unchanged_pages(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'summary_cache', SummaryCache(str(tmp_path)))
+    monkeypatch.setattr(app, 'document_states', DocumentStateCache(1 << 24))
+    pages = [f"Section {n} describes topic number {n} in some detail. "
+             f"Topic {n} matters because page {n} says so. "
+             f"Readers of page {n} learn one more fact about topic {n}." for n in range(6)]
+    original = make_pdf(pages)
+    edited = make_pdf(pages[:5] + ["This final page was rewritten entirely. It now covers something else."])
+
+    first = app.summarize_pdf_source(original, hash_source(original), 3)[1]
+    second = app.summarize_pdf_source(edited, hash_source(edited), 3)[1]
+
+    assert first['metadata']['reuse']['pages'] == 0.0
+    assert second['metadata']['reuse']['pages'] == pytest.approx(5 / 6)
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from instrumentation import Metrics
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+WORKER = textwrap.dedent('''
+    import sys
+    from instrumentation import metrics
+    metrics.add('cache_lookups_total', (('cache', 'summary'), ('result', 'hit')), 3)
+    metrics.add('http_requests_in_flight', (), 2)
+    metrics.observe('stage_duration_seconds', (('stage', 'pagerank'),), 0.003)
+    metrics.register_gauge('sessions', 'Shared', lambda: 7, aggregate='max')
+    metrics.register_gauge('queued', 'Per process', lambda: 4)
+    metrics.flush()
+    print('ready', flush=True)
+    sys.stdin.readline()
+''')
+
+def start_worker(directory):
+    """Another server process with metrics in directory; it exits when its stdin is closed"""
+    env = dict(os.environ, METRICS_DIR=str(directory), METRICS_FLUSH_SECONDS='3600')
+    worker = subprocess.Popen([sys.executable, '-c', WORKER], cwd=BACKEND_DIR, env=env,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    assert worker.stdout.readline() == 'ready\n'
+    return worker
+
+def samples(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+@pytest.fixture
+def local(tmp_path):
+    metrics = Metrics(str(tmp_path), flush_interval=3600)
+    metrics.add('cache_lookups_total', (('cache', 'summary'), ('result', 'miss')), 1)
+    metrics.add('http_requests_in_flight', (), 1)
+    metrics.observe('stage_duration_seconds', (('stage', 'pagerank'),), 0.003)
+    metrics.register_gauge('sessions', 'Shared', lambda: 7, aggregate='max')
+    metrics.register_gauge('queued', 'Per process', lambda: 1)
+    return metrics
+
+def test_metrics_of_every_process_are_merged(local, tmp_path):
+    worker = start_worker(tmp_path)
+    try:
+        merged = samples(local.render())
+    finally:
+        worker.stdin.close()
+        worker.wait()
+
+    assert float(merged['cache_lookups_total{cache="summary",result="hit"}']) == 3
+    assert float(merged['cache_lookups_total{cache="summary",result="miss"}']) == 1
+    assert float(merged['cache_hit_ratio{cache="summary"}']) == 0.75
+    assert float(merged['http_requests_in_flight']) == 3
+    assert merged['stage_duration_seconds_count{stage="pagerank"}'] == '2'
+    assert float(merged['sessions']) == 7
+    assert float(merged['queued']) == 5
+
+def test_an_exited_process_keeps_its_counters_but_not_its_gauges(local, tmp_path):
+    worker = start_worker(tmp_path)
+    worker.stdin.close()
+    worker.wait()
+
+    merged = samples(local.render())
+    assert float(merged['cache_lookups_total{cache="summary",result="hit"}']) == 3
+    assert merged['stage_duration_seconds_count{stage="pagerank"}'] == '2'
+    assert float(merged['http_requests_in_flight']) == 1
+    assert float(merged['queued']) == 1
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_a_forked_worker_starts_with_empty_metrics(local, tmp_path):
+    local.flush()
+    pid = os.fork()
+    if pid == 0:
+        local.add('cache_lookups_total', (('cache', 'summary'), ('result', 'hit')), 1)
+        local.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    merged = samples(local.render())
+    assert float(merged['cache_lookups_total{cache="summary",result="miss"}']) == 1
+    assert float(merged['cache_lookups_total{cache="summary",result="hit"}']) == 1
+
+def test_without_a_directory_only_this_process_is_reported():
+    metrics = Metrics()
+    metrics.add('cache_lookups_total', (('cache', 'summary'), ('result', 'hit')), 2)
+    metrics.register_gauge('queued', 'Per process', lambda: {'high': 1}, label='priority')
+
+    rendered = samples(metrics.render())
+    assert float(rendered['cache_lookups_total{cache="summary",result="hit"}']) == 2
+    assert float(rendered['queued{priority="high"}']) == 1
@@ -0,0 +1,160 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import jobs
+from jobs import CANCELLED, DONE, FAILED, JobQueue, MemoryJobStore, QueueFull, SQLiteJobStore
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteJobStore(str(tmp_path / 'jobs.sqlite3'))
+    return MemoryJobStore()
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def status(queue, job_id):
+    record = queue.get(job_id)
+    return record['status'] if record is not None else None
+
+class Gate:
+    """process() for JobQueue that records payloads and holds the 'block' job until opened"""
+
+    def __init__(self):
+        self.opened = threading.Event()
+        self.started = threading.Event()
+        self.ran = []
+
+    def __call__(self, payload, progress):
+        if payload == 'block':
+            self.started.set()
+            self.opened.wait(5)
+        self.ran.append(payload)
+        return {'payload': payload}
+
+def blocked_queue(store, **options):
+    """A one-worker queue whose worker is busy with a job until gate.opened is set"""
+    gate = Gate()
+    queue = JobQueue(store, gate, workers=1, **options)
+    queue.submit('block')
+    assert gate.started.wait(5)
+    return queue, gate
+
+def test_higher_priorities_run_first_and_ties_in_submission_order(store):
+    queue, gate = blocked_queue(store)
+    job_ids = [queue.submit(name, priority=priority)
+               for name, priority in [('low', -1), ('normal', 0), ('urgent', 5), ('normal-2', 0), ('urgent-2', 5)]]
+    gate.opened.set()
+
+    wait_for(lambda: all(status(queue, job_id) == DONE for job_id in job_ids))
+    assert gate.ran == ['block', 'urgent', 'urgent-2', 'normal', 'normal-2', 'low']
+    assert queue.get(job_ids[2])['result'] == {'payload': 'urgent'}
+
+def test_a_full_queue_refuses_jobs(store):
+    queue, gate = blocked_queue(store, max_queued=2)
+    queue.submit('a')
+    queue.submit('b')
+
+    with pytest.raises(QueueFull):
+        queue.submit('c')
+    # The running job does not count against the queue
+    assert queue.queued_count() == 2
+
+    gate.opened.set()
+    wait_for(lambda: queue.queued_count() == 0)
+    queue.submit('c')
+
+def test_cancelling_a_queued_job_skips_it_and_releases_its_payload(store):
+    queue, gate = blocked_queue(store)
+    released = []
+    job_id = queue.submit('doomed', cleanup=lambda: released.append('doomed'))
+    later = queue.submit('later')
+
+    record = queue.cancel(job_id)
+    gate.opened.set()
+
+    assert record['status'] == CANCELLED
+    assert released == ['doomed']
+    wait_for(lambda: status(queue, later) == DONE)
+    assert 'doomed' not in gate.ran
+    assert status(queue, job_id) == CANCELLED
+
+def test_cancelling_a_running_job_stops_it_at_its_next_stage(store):
+    started = threading.Event()
+    stages = []
+
+    def process(payload, progress):
+        started.set()
+        while True:
+            progress(f'stage-{len(stages)}')
+            stages.append(len(stages))
+            time.sleep(0.005)
+
+    queue = JobQueue(store, process, workers=1)
+    job_id = queue.submit('long')
+    assert started.wait(5)
+
+    record = queue.cancel(job_id)
+    assert record['cancel_requested']
+    wait_for(lambda: status(queue, job_id) == CANCELLED)
+    assert queue.get(job_id)['finished_at'] is not None
+
+def test_a_job_running_in_another_process_sees_a_cancel_through_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'CANCEL_POLL_INTERVAL', 0.01)
+    path = str(tmp_path / 'jobs.sqlite3')
+    started = threading.Event()
+
+    def process(payload, progress):
+        started.set()
+        while True:
+            progress('working')
+            time.sleep(0.005)
+
+    owner = JobQueue(SQLiteJobStore(path), process, workers=1)
+    other = JobQueue(SQLiteJobStore(path), process, workers=1)
+    job_id = owner.submit('long')
+    assert started.wait(5)
+
+    other.cancel(job_id)
+    wait_for(lambda: status(other, job_id) == CANCELLED)
+
+def test_a_failing_job_records_its_error(store):
+    def process(payload, progress):
+        raise ValueError("PDF has no pages")
+
+    queue = JobQueue(store, process, workers=1)
+    job_id = queue.submit('broken')
+
+    wait_for(lambda: status(queue, job_id) == FAILED)
+    assert queue.get(job_id)['error'] == "PDF has no pages"
+
+def test_finished_jobs_are_kept_for_the_retention_period(store, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(jobs.time, 'time', lambda: now[0])
+    queue = JobQueue(store, lambda payload, progress: payload, workers=1, retention=60)
+    job_id = queue.submit('quick')
+    wait_for(lambda: status(queue, job_id) == DONE)
+
+    now[0] += 59
+    assert status(queue, job_id) == DONE
+    now[0] += 2
+    assert queue.get(job_id) is None
+
+def test_a_job_whose_process_is_gone_is_reported_failed(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                            capture_output=True, text=True, check=True)
+    record = jobs.new_job_record('orphan', 0, time.time())
+    record['owner_pid'] = int(exited.stdout)
+    SQLiteJobStore(path).add(record)
+
+    queue = JobQueue(SQLiteJobStore(path), lambda payload, progress: payload)
+    assert queue.get('orphan')['status'] == FAILED
+    assert queue.get('orphan')['error'] == 'Interrupted by a server restart'
@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+
+import pytest
+
+import app
+import pdf_extract
+from incremental import DocumentStateCache
+from summary_cache import SummaryCache
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+with open(os.path.join(BACKEND_DIR, 'test_document.pdf'), 'rb') as f:
+    PDF_BYTES = f.read()
+
+def shared_memory_blocks():
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')} if os.path.isdir('/dev/shm') else set()
+
+@pytest.fixture
+def no_temp_files(monkeypatch, tmp_path):
+    """Point tempfile and uploads at an empty directory and fail any tempfile call"""
+    def refuse(*args, **kwargs):
+        raise AssertionError("a temporary file was created")
+
+    # Start the pool first: the fork server keeps its socket in a temp dir
+    pdf_extract.get_executor().submit(os.getpid).result()
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    for name in ('NamedTemporaryFile', 'TemporaryFile', 'SpooledTemporaryFile', 'mkstemp'):
+        monkeypatch.setattr(tempfile, name, refuse)
+    return tmp_path
+
+def test_bytes_are_extracted_by_the_pool_without_temp_files(no_temp_files):
+    blocks = shared_memory_blocks()
+    expected = list(pdf_extract.iter_pdf_pages(PDF_BYTES, workers=0))
+
+    assert list(pdf_extract.iter_pdf_pages(PDF_BYTES, workers=1)) == expected
+    assert os.listdir(no_temp_files) == []
+    assert shared_memory_blocks() == blocks
+
+def test_small_upload_creates_no_temp_file(no_temp_files, monkeypatch, tmp_path_factory):
+    extracted = []
+
+    def iter_pdf_pages(source, *args, **kwargs):
+        extracted.append(type(source))
+        return pdf_extract.iter_pdf_pages(source, *args, **kwargs)
+
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(no_temp_files))
+    monkeypatch.setattr(app, 'summary_cache', SummaryCache(str(tmp_path_factory.mktemp('cache'))))
+    monkeypatch.setattr(app, 'document_states', DocumentStateCache(1 << 20))
+    monkeypatch.setattr(app, 'iter_pdf_pages', iter_pdf_pages)
+
+    response = app.app.test_client().post('/api/summarize', data={
+        'file': (io.BytesIO(PDF_BYTES), 'test_document.pdf'), 'summary_length': '2'})
+
+    assert response.status_code == 200, response.get_json()
+    assert extracted == [bytes]  # Extracted from the in-memory upload
+    assert os.listdir(no_temp_files) == []
+
+def rewritten_pdf(encoding=None):
+    """test_document.pdf written out again, optionally with its font's /Encoding replaced"""
+    from PyPDF2 import PdfReader, PdfWriter
+    from PyPDF2.generic import NameObject
+
+    writer = PdfWriter()
+    for page in PdfReader(io.BytesIO(PDF_BYTES)).pages:
+        writer.add_page(page)
+    if encoding is not None:
+        font = writer.pages[0]['/Resources']['/Font']['/F1']
+        font[NameObject('/Encoding')] = NameObject(encoding)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+def test_fingerprint_covers_page_resources():
+    original = pdf_extract.page_fingerprints(PDF_BYTES)
+
+    # Same operators and resources in a differently laid out file
+    assert pdf_extract.page_fingerprints(rewritten_pdf()) == original
+    # Same operators, but a font encoding that changes what they spell
+    assert pdf_extract.page_fingerprints(rewritten_pdf('/MacRomanEncoding')) != original
+
+_fork_markers = None
+
+def _mark_fork():
+    if _fork_markers is not None:
+        open(os.path.join(_fork_markers, str(os.getpid())), 'w').close()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_mark_fork)
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason="needs at-fork hooks")
+def test_extraction_workers_do_not_run_the_servers_fork_hooks(monkeypatch, tmp_path):
+    global _fork_markers
+    monkeypatch.setattr(pdf_extract, '_executor', None)
+    _fork_markers = str(tmp_path)
+    try:
+        executor = pdf_extract.get_executor()
+        try:
+            assert list(pdf_extract.iter_pdf_pages(PDF_BYTES, workers=1)) == \
+                list(pdf_extract.iter_pdf_pages(PDF_BYTES, workers=0))
+        finally:
+            executor.shutdown()
+    finally:
+        _fork_markers = None
+    assert os.listdir(tmp_path) == []
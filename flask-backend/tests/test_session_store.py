@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+import session_store
+from instrumentation import metrics
+from session_store import (MemorySessionStore, SessionExpiry, SQLiteSessionStore, create_session,
+                           open_session_store)
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    return open_session_store(request.param, str(tmp_path / 'sessions.sqlite3'))
+
+def append(item):
+    def change(session):
+        session['answers'].append(item)
+    return change
+
+def test_add_never_replaces_a_session(store):
+    assert store.add('s1', {'answers': []})
+    assert not store.add('s1', {'answers': ['other']})
+
+    assert store.get('s1') == {'answers': []}
+    assert 's1' in store and 's2' not in store
+    assert store.get('s2') is None
+    assert store.count() == 1
+
+def test_update_changes_the_stored_session(store):
+    store.add('s1', {'answers': []})
+
+    assert store.update('s1', append('first'))
+    assert store.update('s1', append('second'))
+    assert not store.update('missing', append('lost'))
+
+    assert store.get('s1') == {'answers': ['first', 'second']}
+    assert store.count() == 1
+
+def test_create_session_draws_another_id_on_a_collision(store, monkeypatch):
+    ids = iter(['taken', 'taken', 'fresh'])
+    monkeypatch.setattr(session_store, 'new_session_id', lambda: next(ids))
+    store.add('taken', {'answers': ['existing']})
+
+    assert create_session(store, {'answers': []}) == 'fresh'
+    assert store.get('taken') == {'answers': ['existing']}
+
+def test_a_failed_sqlite_update_is_rolled_back(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.sqlite3'))
+    store.add('s1', {'answers': []})
+
+    def fail(session):
+        session['answers'].append('partial')
+        raise ValueError("bad answer")
+
+    with pytest.raises(ValueError):
+        store.update('s1', fail)
+    assert store.get('s1') == {'answers': []}
+    assert store.update('s1', append('next'))
+
+def test_sqlite_stores_on_one_file_share_sessions_and_serialize_updates(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    stores = [SQLiteSessionStore(path) for _ in range(2)]
+    stores[0].add('s1', {'answers': []})
+
+    def answer(store, worker):
+        for n in range(25):
+            store.update('s1', append(f'{worker}-{n}'))
+
+    threads = [threading.Thread(target=answer, args=(stores[worker % 2], worker)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 's1' in stores[1]
+    assert len(stores[1].get('s1')['answers']) == 100
+
+def test_memory_store_keeps_the_session_object():
+    store = MemorySessionStore()
+    session = {'answers': []}
+    store.add('s1', session)
+    store.update('s1', append('first'))
+
+    assert store.get('s1') is session
+    assert session == {'answers': ['first']}
+
+def test_unknown_store_kind_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_session_store('redis', str(tmp_path / 'sessions.sqlite3'))
+
+@pytest.fixture
+def clock(store):
+    """Drive the store's activity clock by hand"""
+    now = [1_000_000.0]
+    store.clock = lambda: now[0]
+    return now
+
+def test_only_sessions_idle_past_the_limit_expire(store, clock):
+    store.add('old', {'answers': []})
+    store.add('active', {'answers': []})
+    clock[0] += 30
+    store.update('active', append('still here'))
+    clock[0] += 40
+
+    expired = store.purge_inactive(60)
+
+    assert [session_id for session_id, _ in expired] == ['old']
+    assert all(size > 0 for _, size in expired)
+    assert 'old' not in store and store.count() == 1
+    assert store.oldest_activity() == clock[0] - 40
+
+    clock[0] += 20
+    assert store.purge_inactive(60) == []
+    clock[0] += 1
+    assert [session_id for session_id, _ in store.purge_inactive(60)] == ['active']
+    assert store.count() == 0
+    assert store.oldest_activity() is None
+
+def test_reading_a_session_does_not_keep_it_alive(store, clock):
+    store.add('s1', {'answers': []})
+    clock[0] += 50
+    assert store.get('s1') is not None and 's1' in store
+    clock[0] += 20
+
+    assert [session_id for session_id, _ in store.purge_inactive(60)] == ['s1']
+
+def test_memory_store_activity_heap_stays_bounded():
+    store = MemorySessionStore()
+    store.add('s1', {'answers': []})
+    store.add('s2', {'answers': []})
+    for n in range(1000):
+        store.update('s1', append(n))
+
+    assert len(store._activity) <= 2 * store.count() + 65
+    # The superseded entries of s1 do not expire it with s2
+    store.clock = lambda: time.monotonic() + 10
+    store.update('s1', append('latest'))
+    store.clock = lambda: time.monotonic() + 15
+    assert [session_id for session_id, _ in store.purge_inactive(10)] == ['s2']
+
+def test_expiry_sweep_counts_expired_sessions(store, clock):
+    store.add('s1', {'answers': ['x' * 1000]})
+    clock[0] += 120
+    before = metrics._values[('interview_sessions_expired_total', ())]
+    reclaimed_before = metrics._values[('interview_session_bytes_reclaimed_total', ())]
+
+    expired = SessionExpiry(store, 60).sweep()
+
+    assert [session_id for session_id, _ in expired] == ['s1']
+    assert metrics._values[('interview_sessions_expired_total', ())] == before + 1
+    assert metrics._values[('interview_session_bytes_reclaimed_total', ())] == reclaimed_before + expired[0][1]
+
+def test_expiry_thread_deletes_idle_sessions_soon_after_they_are_due(store):
+    store.add('s1', {'answers': []})
+    SessionExpiry(store, idle_seconds=0.3, min_interval=0.05).start()
+
+    assert 's1' in store
+    deadline = time.monotonic() + 5
+    while 's1' in store:
+        assert time.monotonic() < deadline, "session was not expired"
+        time.sleep(0.01)
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+import summary_cache
+from summary_cache import SummaryCache
+
+def value(name):
+    """A value that serializes to exactly 100 bytes"""
+    return {'v': name + 'x' * (100 - len(json.dumps({'v': name})))}
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Make summary_cache's time.time() return clock[0]"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(summary_cache.time, 'time', lambda: now[0])
+    return now
+
+def memory_keys(cache):
+    return list(cache._memory)
+
+def test_memory_tier_evicts_the_least_recently_used(tmp_path):
+    cache = SummaryCache(str(tmp_path), max_memory_bytes=250)
+    cache.set('a', value('a'))
+    cache.set('b', value('b'))
+    assert cache.get('a') == value('a')
+
+    cache.set('c', value('c'))
+
+    assert memory_keys(cache) == ['a', 'c']
+    # b is still on disk and comes back into memory, evicting a
+    assert cache.get('b') == value('b')
+    assert memory_keys(cache) == ['c', 'b']
+
+def test_values_larger_than_the_memory_tier_stay_on_disk(tmp_path):
+    cache = SummaryCache(str(tmp_path), max_memory_bytes=50)
+    cache.set('a', value('a'))
+
+    assert memory_keys(cache) == []
+    assert cache.get('a') == value('a')
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path), ttl=60)
+    cache.set('a', value('a'))
+    os.utime(tmp_path / 'a.json', (clock[0], clock[0]))
+
+    clock[0] += 59
+    assert cache.get('a') == value('a')
+
+    clock[0] += 1
+    assert cache.get('a') is None
+    assert not (tmp_path / 'a.json').exists()
+    assert memory_keys(cache) == []
+
+def test_reading_an_entry_does_not_extend_its_ttl(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path), ttl=60)
+    cache.set('a', value('a'))
+    os.utime(tmp_path / 'a.json', (clock[0], clock[0]))
+
+    clock[0] += 30
+    # A second process, with an empty memory tier, reads it from disk
+    assert SummaryCache(str(tmp_path), ttl=60).get('a') == value('a')
+
+    clock[0] += 30
+    assert SummaryCache(str(tmp_path), ttl=60).get('a') is None
+
+def test_disk_tier_evicts_the_least_recently_used(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path), max_memory_bytes=0, max_disk_bytes=300)
+    for offset, name in enumerate('abc'):
+        cache.set(name, value(name))
+        os.utime(tmp_path / f'{name}.json', (clock[0] + offset, clock[0] + offset))
+    clock[0] += 10
+    assert cache.get('a') == value('a')
+
+    cache.set('d', value('d'))
+
+    # Over 300 bytes, files go in access order down to 90% of the budget
+    assert sorted(os.listdir(tmp_path)) == ['a.json', 'd.json']
+    assert cache._disk_bytes == 200
+
+def test_overwriting_an_entry_keeps_the_disk_size_accurate(tmp_path):
+    cache = SummaryCache(str(tmp_path))
+    cache.set('a', value('a'))
+    cache.set('a', {'v': 'short'})
+
+    assert cache._disk_bytes == os.path.getsize(tmp_path / 'a.json')
+    assert SummaryCache(str(tmp_path))._disk_bytes == cache._disk_bytes
+    assert cache.get('a') == {'v': 'short'}
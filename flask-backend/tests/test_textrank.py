@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+from nltk.cluster.util import cosine_distance
+
+import app
+from nltk_resources import get_stop_words
+from pdf_extract import extract_text_from_pdf
+from textrank import build_term_matrix, cosine_similarity_matrix
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SENTENCES = [
+    "The summarizer ranks sentences by how similar they are to each other.",
+    "Similar sentences share words, and shared words raise their similarity.",
+    "A sentence with no words in common with the others scores zero.",
+    "Stop words like the and of are ignored when sentences are compared.",
+    "The the the of of of.",
+    "Ranking sentences by similarity picks the most central ones for the summary.",
+]
+
+def pairwise_similarity(tokens1, tokens2, stop_words):
+    """The cosine similarity of two token lists as the original pairwise implementation computed it"""
+    all_words = list(set(tokens1 + tokens2))
+    vector1 = [0] * len(all_words)
+    vector2 = [0] * len(all_words)
+    for w in tokens1:
+        if w not in stop_words:
+            vector1[all_words.index(w)] += 1
+    for w in tokens2:
+        if w not in stop_words:
+            vector2[all_words.index(w)] += 1
+    if sum(vector1) == 0 or sum(vector2) == 0:
+        return 0.0
+    return 1 - cosine_distance(vector1, vector2)
+
+def pairwise_similarity_matrix(sentences, stop_words):
+    tokens = app.tokenize_words(sentences)
+    matrix = np.zeros((len(sentences), len(sentences)))
+    for idx1 in range(len(sentences)):
+        for idx2 in range(len(sentences)):
+            if idx1 != idx2:
+                matrix[idx1][idx2] = pairwise_similarity(tokens[idx1], tokens[idx2], stop_words)
+    return matrix
+
+def pairwise_top_indices(sentences, stop_words, count):
+    """Indices of the top sentences as the original networkx pipeline ranked them"""
+    nx = pytest.importorskip('networkx')
+    scores = nx.pagerank(nx.from_numpy_array(pairwise_similarity_matrix(sentences, stop_words)))
+    ranked = sorted(((scores[i], i) for i in range(len(sentences))), reverse=True)
+    return sorted(i for _, i in ranked[:count])
+
+def test_cosine_similarity_matrix_matches_pairwise():
+    stop_words = get_stop_words()
+    term_matrix, _ = build_term_matrix(app.tokenize_words(SENTENCES), stop_words)
+
+    np.testing.assert_allclose(cosine_similarity_matrix(term_matrix),
+                               pairwise_similarity_matrix(SENTENCES, stop_words), atol=1e-12)
+
+@pytest.mark.parametrize('count', [1, 3, 5])
+def test_summary_of_fixture_matches_pairwise_ranking(count):
+    text = extract_text_from_pdf(os.path.join(BACKEND_DIR, 'test_document.pdf'), workers=0)
+    sentences = app.split_sentences(text)
+    assert len(sentences) > count
+
+    expected = ' '.join(sentences[i] for i in pairwise_top_indices(sentences, get_stop_words(), count))
+    assert app.generate_summary(text, count) == expected
@@ -0,0 +1,45 @@
+import codecs
+
+def iter_text_chunks(stream, chunk_size=64 << 10, encoding='utf-8'):
+    """Read and decode a binary stream chunk by chunk
+
+    Multi-byte characters split across chunk boundaries are carried over by
+    an incremental decoder, so the whole body never has to be in memory.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def iter_sentence_batches(chunks, split_sentences, max_pending=1 << 20):
+    """Split a stream of text chunks into sentences as they arrive
+
+    Yields a list of complete sentences per chunk. The last sentence of the
+    text seen so far may still continue in the next chunk, so it is held back
+    (with its trailing whitespace) and re-split together with that chunk. A
+    pending tail longer than max_pending characters is emitted as one
+    sentence so unpunctuated input cannot grow the buffer without bound.
+    """
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        sentences = split_sentences(pending)
+        if len(sentences) > 1:
+            tail_start = pending.rfind(sentences[-1])
+            if tail_start >= 0:
+                yield sentences[:-1]
+                pending = pending[tail_start:]
+                continue
+        if len(pending) > max_pending:
+            yield sentences
+            pending = ''
+
+    if pending.strip():
+        yield split_sentences(pending)
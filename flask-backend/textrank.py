@@ -0,0 +1,212 @@
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+class TermMatrixBuilder:
+    """Accumulate a sparse sentence x term count matrix one sentence at a time"""
+
+    def __init__(self, stop_words=None):
+        self.stop_words = stop_words if stop_words is not None else frozenset()
+        self.vocabulary = {}
+        # Column indices are kept in a typed array (8 bytes per token) rather
+        # than a list of Python ints
+        self.indices = array('q')
+        self.indptr = array('q', [0])
+
+    def add(self, tokens):
+        """Append one tokenized sentence as the next row"""
+        vocabulary = self.vocabulary
+        stop_words = self.stop_words
+        indices = self.indices
+        # The vocabulary dict replaces the per-pair list.index() lookups of
+        # the pairwise implementation
+        for word in tokens:
+            if word in stop_words:
+                continue
+            column = vocabulary.get(word)
+            if column is None:
+                column = vocabulary[word] = len(vocabulary)
+            indices.append(column)
+        self.indptr.append(len(indices))
+
+    @property
+    def sentence_count(self):
+        return len(self.indptr) - 1
+
+    def build(self):
+        """Return the CSR term matrix and the vocabulary (term -> column)"""
+        indices = np.array(self.indices, dtype=np.int64)
+        term_matrix = sparse.csr_matrix(
+            (np.ones(len(indices)), indices, np.array(self.indptr, dtype=np.int64)),
+            shape=(self.sentence_count, len(self.vocabulary))
+        )
+        # Repeated words in a sentence become a single entry holding their count
+        term_matrix.sum_duplicates()
+
+        return term_matrix, self.vocabulary
+
+def build_term_matrix(token_lists, stop_words=None):
+    """Build a sparse sentence x term count matrix over one shared vocabulary"""
+    builder = TermMatrixBuilder(stop_words)
+
+    # Each sentence is walked exactly once
+    for tokens in token_lists:
+        builder.add(tokens)
+
+    return builder.build()
+
+def normalize_rows(term_matrix):
+    """Scale every row of a term matrix to unit length (empty rows stay zero)"""
+    norms = np.sqrt(np.asarray(term_matrix.multiply(term_matrix).sum(axis=1)).ravel())
+    inverse_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.diags(inverse_norms) @ term_matrix
+
+def cosine_similarity_matrix(term_matrix):
+    """Compute the dense cosine similarity matrix with one normalized matrix product"""
+    normalized = normalize_rows(term_matrix)
+    similarity_matrix = (normalized @ normalized.T).toarray()
+
+    # A sentence is never compared with itself
+    np.fill_diagonal(similarity_matrix, 0.0)
+
+    return similarity_matrix
+
+def frequency_scores(term_matrix):
+    """Score sentences by the mean document frequency of their terms
+
+    The frequency summarizer's heuristic computed from the term matrix in two
+    sparse products. Much cheaper than building a similarity graph, so it
+    is used for a provisional ranking while PageRank runs.
+    """
+    term_counts = np.asarray(term_matrix.sum(axis=0)).ravel()
+    lengths = np.asarray(term_matrix.sum(axis=1)).ravel()
+    totals = term_matrix @ term_counts
+    return np.divide(totals, lengths, out=np.zeros_like(totals), where=lengths > 0)
+
+def sparse_similarity_graph(term_matrix, top_k=20, threshold=0.0, block_entries=1 << 22):
+    """Build a sparse cosine similarity graph that keeps only the strongest edges
+
+    Candidate neighbours are found through an inverted index over shared
+    terms: the transposed, normalized term matrix maps every term to the
+    sentences that contain it, and the sparse product of a block of rows
+    with it holds entries only for pairs with a common term, so no other
+    pair is scored and no dense block or n x n matrix is materialized.
+    Rows are multiplied in blocks of at most block_entries // n rows. Each
+    sentence keeps its top_k neighbours (every neighbour when top_k is
+    None) with a similarity above threshold, chosen among its row's
+    nonzeros, and the result is symmetrized so the graph stays undirected
+    like the dense one.
+    """
+    normalized = normalize_rows(term_matrix).tocsr()
+    inverted_index = normalized.T.tocsr()
+    n = normalized.shape[0]
+    if n == 0:
+        return sparse.csr_matrix((0, 0))
+    block_size = max(1, min(n, block_entries // max(n, 1)))
+
+    rows, columns, values = [], [], []
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = (normalized[start:stop] @ inverted_index).tocsr()
+        block_rows = np.repeat(np.arange(stop - start), np.diff(block.indptr))
+        # A sentence is never its own neighbour
+        keep = (block.indices != block_rows + start) & (block.data > threshold)
+        block_rows, block_columns, block_values = block_rows[keep], block.indices[keep], block.data[keep]
+
+        if top_k is not None:
+            row_starts = np.searchsorted(block_rows, np.arange(stop - start + 1))
+            selected = []
+            for row_start, row_stop in zip(row_starts[:-1], row_starts[1:]):
+                if row_stop - row_start <= top_k:
+                    selected.append(np.arange(row_start, row_stop))
+                else:
+                    best = np.argpartition(block_values[row_start:row_stop], -top_k)[-top_k:]
+                    selected.append(best + row_start)
+            selected = np.concatenate(selected)
+            block_rows, block_columns, block_values = block_rows[selected], block_columns[selected], block_values[selected]
+
+        rows.append(block_rows + start)
+        columns.append(block_columns)
+        values.append(block_values)
+
+    graph = sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+        shape=(n, n)
+    )
+    return graph.maximum(graph.T).tocsr()
+
+def row_normalize(matrix):
+    """Turn a weighted adjacency matrix into a row-stochastic transition matrix
+
+    Returns the transition matrix (CSR when the input is sparse) and a boolean
+    mask of dangling rows, i.e. sentences with no outgoing edges.
+    """
+    if sparse.issparse(matrix):
+        matrix = sparse.csr_matrix(matrix, dtype=float)
+        row_sums = np.asarray(matrix.sum(axis=1)).ravel()
+    else:
+        matrix = np.asarray(matrix, dtype=float)
+        row_sums = matrix.sum(axis=1)
+
+    dangling = row_sums == 0
+    inverse_sums = np.divide(1.0, row_sums, out=np.zeros_like(row_sums), where=~dangling)
+
+    if sparse.issparse(matrix):
+        transition = sparse.diags(inverse_sums) @ matrix
+    else:
+        transition = matrix * inverse_sums[:, np.newaxis]
+
+    return transition, dangling
+
+def pagerank(matrix, damping=0.85, tol=1.0e-6, max_iter=100, callback=None, initial=None):
+    """Rank graph nodes by power iteration directly on a NumPy or sparse matrix
+
+    Follows the same update, dangling-node handling and stopping rule as
+    networkx.pagerank (uniform teleport, stop once the L1 change drops
+    below n * tol), without building Python node and edge objects.
+
+    Returns (scores, iterations, converged). callback, if given, is called
+    as callback(iteration, error) after every iteration. initial, like
+    networkx's nstart, is a starting vector (normalized to sum to 1) used
+    instead of the uniform one, e.g. the scores of a previous version of
+    the graph to warm-start from.
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0), 0, True
+
+    transition, dangling = row_normalize(matrix)
+    # x @ P for a sparse P is computed as P^T @ x so it stays a CSR product
+    transition_t = transition.T.tocsr() if sparse.issparse(transition) else transition.T
+
+    return power_iteration(lambda scores: transition_t @ scores, dangling,
+                           damping, tol, max_iter, callback, initial)
+
+def power_iteration(step, dangling, damping=0.85, tol=1.0e-6, max_iter=100, callback=None, initial=None):
+    """The PageRank power iteration of pagerank, for any way of applying the transition matrix
+
+    step(scores) returns scores @ P for the row-stochastic transition
+    matrix P, and dangling masks the nodes without outgoing edges. Lets
+    graphs that never fit in memory as one matrix be ranked window by
+    window with the same numerics.
+    """
+    n = len(dangling)
+    teleport = np.full(n, 1.0 / n)
+    if initial is not None and np.sum(initial) > 0:
+        scores = np.asarray(initial, dtype=float) / np.sum(initial)
+    else:
+        scores = teleport.copy()
+
+    for iteration in range(1, max_iter + 1):
+        previous = scores
+        dangling_mass = previous[dangling].sum()
+        scores = damping * (step(previous) + dangling_mass * teleport) + (1.0 - damping) * teleport
+
+        error = np.abs(scores - previous).sum()
+        if callback is not None:
+            callback(iteration, error)
+        if error < n * tol:
+            return scores, iteration, True
+
+    return scores, max_iter, False
@@ -0,0 +1,40 @@
+import re
+from sys import intern
+
+# Every pattern is compiled once here. Module-level re.sub/re.findall calls
+# look the pattern string up in re's bounded cache on every call and
+# recompile it once it has been evicted.
+WORD_PATTERN = re.compile(r'\b\w+\b')
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])(\s+)')
+
+# Used by the frequency summarizer's sentence splitter
+WHITESPACE_PATTERN = re.compile(r'\s+')
+ABBREVIATION_PATTERN = re.compile(r'(Mr\.|Mrs\.|Dr\.|Prof\.|etc\.)')
+CAPITALIZED_SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z]|$)')
+
+def split_sentences(text):
+    """Split text after '.', '!' or '?' followed by whitespace"""
+    sentences = SENTENCE_BOUNDARY_PATTERN.split(text)
+    # Filter out the captured whitespace and empty strings
+    return [s.strip() for s in sentences if s.strip()]
+
+def tokenize_words(text):
+    """Split text into lowercase, interned word tokens"""
+    return [intern(word) for word in WORD_PATTERN.findall(text.lower())]
+
+def tokenize_sentences_words(sentences, tokenize=None):
+    """Tokenize every sentence once into lowercase, interned word lists
+
+    tokenize splits one sentence into words (the regex tokenizer by
+    default). Interning makes each distinct word a single string object
+    shared by every token list, so repeated words cost one pointer and
+    dict/set lookups of them hit the identity fast path. The lists are
+    meant to be built once per document and reused by every scoring stage.
+    """
+    if tokenize is None or tokenize is tokenize_words:
+        return [tokenize_words(sentence) for sentence in sentences]
+    return [[intern(word.lower()) for word in tokenize(sentence)] for sentence in sentences]
+
+def without_stop_words(tokens, stop_words):
+    """Drop stop words from a token list; stop_words should be a frozenset"""
+    return [word for word in tokens if word not in stop_words]
@@ -0,0 +1,85 @@
+import os
+import tempfile
+from io import BytesIO
+
+from flask import Request, current_app
+from werkzeug.datastructures import MultiDict
+
+# Uploads up to this many bytes are parsed straight from memory
+DEFAULT_UPLOAD_MAX_MEMORY = 16 << 20
+
+class SpooledUploadRequest(Request):
+    """Request that keeps file uploads in memory instead of on disk
+
+    Werkzeug's default stream factory writes every upload over 500 KB to a
+    temporary file. Here uploads stay in a BytesIO up to the app's
+    UPLOAD_MAX_MEMORY setting; larger (or unsized) ones spill to a uniquely
+    named file in UPLOAD_FOLDER, so concurrent uploads never collide and
+    extraction workers in other processes can open it by path. Spilled files
+    are deleted when the request is closed.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_memory = current_app.config.get('UPLOAD_MAX_MEMORY', DEFAULT_UPLOAD_MAX_MEMORY)
+        if total_content_length is not None and total_content_length <= max_memory:
+            return BytesIO()
+
+        spill = tempfile.NamedTemporaryFile('wb+', prefix='upload-', suffix='.tmp', delete=False,
+                                            dir=current_app.config.get('UPLOAD_FOLDER'))
+        self.__dict__.setdefault('_spilled_paths', []).append(spill.name)
+        return spill
+
+    def detach_files(self):
+        """Take the uploaded files over from the request
+
+        Closing the request (which Flask does before a streamed response
+        body runs) then leaves them alone. Returns the files and a function
+        that closes them and removes any spilled ones, to call once done,
+        e.g. from Response.call_on_close.
+        """
+        files = self.files
+        spilled_paths = self.__dict__.pop('_spilled_paths', [])
+        self.__dict__['files'] = MultiDict()
+
+        def release():
+            for _, file_storage in files.items(multi=True):
+                file_storage.close()
+            _remove_files(spilled_paths)
+
+        return files, release
+
+    def close(self):
+        super().close()
+        _remove_files(self.__dict__.pop('_spilled_paths', []))
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def pdf_source(file_storage):
+    """Return what pdf_extract needs for an upload: the bytes, or the path of a spilled file"""
+    stream = file_storage.stream
+    if isinstance(stream, BytesIO):
+        return stream.getvalue()
+
+    name = getattr(stream, 'name', None)
+    if isinstance(name, str) and os.path.exists(name):
+        stream.flush()
+        return name
+
+    stream.seek(0)
+    return stream.read()
+
+def read_upload(stream, length):
+    """Read up to length bytes of stream into one bytes object the caller owns"""
+    data = stream.read(length)
+    # A raw stream may return fewer bytes than asked for before it is exhausted
+    while len(data) < length:
+        more = stream.read(length - len(data))
+        if not more:
+            break
+        data += more
+    return data